@@ -0,0 +1,40 @@
+"""
+Compare the memory used by SGFNode trees and arena-backed trees.
+
+Run with `python -m benchmarks.arena [num_moves]`.
+"""
+import gc
+import sys
+import time
+import tracemalloc
+from sgf_tool import ArenaNodeAllocator, NodeAllocator, SGFParser
+from .generators import make_main_line
+
+
+def measure(allocator_factory, sgf):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    root = SGFParser(allocator_factory()).parse(sgf)
+    seconds = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del root
+    return retained, peak, seconds
+
+
+def main():
+    num_moves = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    sgf = make_main_line(num_moves)
+    print(f'{num_moves} nodes, {len(sgf) / 1e6:.2f} MB of SGF')
+    for name, allocator_factory in [
+        ('SGFNode', NodeAllocator),
+        ('arena', ArenaNodeAllocator),
+    ]:
+        retained, peak, seconds = measure(allocator_factory, sgf)
+        print(f'{name:>8}: retained {retained / 1e6:8.2f} MB ({retained / num_moves:6.1f} B/node), '
+              f'peak {peak / 1e6:8.2f} MB, parse {seconds:.3f}s')
+
+
+if __name__ == '__main__':
+    main()
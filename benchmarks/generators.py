@@ -0,0 +1,105 @@
+"""
+Deterministic generators of synthetic SGF records.
+"""
+import random
+
+LETTERS = 'abcdefghijklmnopqrs'
+
+
+def random_point(rng):
+    return rng.choice(LETTERS) + rng.choice(LETTERS)
+
+
+def make_main_line(num_moves, seed=0, comment_rate=0.2):
+    """
+    A single game without variations, with some comments and line breaks.
+    """
+    rng = random.Random(seed)
+    parts = ['(;GM[1]FF[4]SZ[19]PB[Black]PW[White]']
+    for i in range(num_moves):
+        color = 'B' if i % 2 == 0 else 'W'
+        parts.append(f';{color}[{random_point(rng)}]')
+        if rng.random() < comment_rate:
+            parts.append('C[a comment with \\] and some text]')
+        parts.append('\n' if i % 10 == 9 else ' ')
+    parts.append(')')
+    return ''.join(parts)
+
+
+def make_variation_fan(num_variations, variation_length=1, seed=0):
+    """
+    A root with num_variations variations of variation_length moves each.
+    """
+    rng = random.Random(seed)
+    parts = ['(;GM[1]FF[4]SZ[19]']
+    for _ in range(num_variations):
+        parts.append('(')
+        for i in range(variation_length):
+            color = 'B' if i % 2 == 0 else 'W'
+            parts.append(f';{color}[{random_point(rng)}]')
+        parts.append(')')
+    parts.append(')')
+    return ''.join(parts)
+
+
+def make_nested_variations(depth, branching=2, variation_length=3, seed=0):
+    """
+    A tree where every variation of variation_length moves ends with branching nested variations, depth levels deep.
+    With branching=1, the variations are nested in a single chain.
+    """
+    rng = random.Random(seed)
+    parts = ['(;GM[1]FF[4]SZ[19]']
+    # (remaining depth, move number) of the variations to write, None to close a variation
+    stack = [(depth - 1, 0)] * branching if depth > 0 else []
+    while stack:
+        item = stack.pop()
+        if item is None:
+            parts.append(')')
+            continue
+        remaining, move = item
+        parts.append('(')
+        for i in range(variation_length):
+            color = 'B' if (move + i) % 2 == 0 else 'W'
+            parts.append(f';{color}[{random_point(rng)}]')
+        stack.append(None)
+        if remaining > 0:
+            stack.extend([(remaining - 1, move + variation_length)] * branching)
+    parts.append(')')
+    return ''.join(parts)
+
+
+WORDS = ['the', 'move', 'is', 'slow', 'joseki', 'ko', 'threat', 'better', 'here', 'at', 'variation', 'group', 'dead']
+
+
+def make_comment(rng, length):
+    words = []
+    size = 0
+    while size < length:
+        word = rng.choice(WORDS)
+        if rng.random() < 0.02:
+            word += ' [see \\] here\\]'
+        if rng.random() < 0.05:
+            word += '\n'
+        words.append(word)
+        size += len(word) + 1
+    return ' '.join(words)
+
+
+def make_comment_heavy(num_moves, comment_length=500, seed=0):
+    """
+    A single game where every move has a long comment with escaped brackets and line breaks.
+    """
+    rng = random.Random(seed)
+    parts = ['(;GM[1]FF[4]SZ[19]PB[Black]PW[White]GC[', make_comment(rng, comment_length), ']']
+    for i in range(num_moves):
+        color = 'B' if i % 2 == 0 else 'W'
+        parts.append(f';{color}[{random_point(rng)}]C[{make_comment(rng, comment_length)}]\n')
+    parts.append(')')
+    return ''.join(parts)
+
+
+def make_collection(num_games, num_moves, seed=0):
+    """
+    A collection of num_games games of num_moves moves each, one game per line.
+    """
+    return '\n'.join(make_main_line(num_moves, seed + i) for i in range(num_games)) + '\n'
@@ -0,0 +1,80 @@
+"""
+Compare the lexer engines on a synthetic game record.
+
+Run with `python -m benchmarks.lexer [num_moves]`.
+"""
+import sys
+import time
+from sgf_tool import SGFLexer, SGFParser
+from sgf_tool.lexer import SGFToken, SGFTokenRules
+from .generators import make_main_line
+
+
+def rule_by_rule_tokens(sgf):
+    """
+    The previous engine: try every rule in order at every position and create an SGFToken per token.
+    """
+    index = 0
+    length = len(sgf)
+    tokens = []
+    while index < length:
+        for token_type, pattern in SGFTokenRules:
+            match = pattern.match(sgf, index)
+            if match:
+                value = match.group(0)
+                tokens.append(SGFToken(token_type, value, index, index + len(value)))
+                index += len(value)
+                break
+        else:
+            raise ValueError(f'Invalid character at {index}')
+    return tokens
+
+
+def next_token_tokens(sgf):
+    lexer = SGFLexer(sgf)
+    tokens = []
+    while True:
+        token = lexer.next_token()
+        if token is None:
+            return tokens
+        tokens.append(token)
+
+
+def bulk_tokens(sgf):
+    return list(SGFLexer(sgf).tokenize())
+
+
+def measure(func, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    num_moves = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    sgf = make_main_line(num_moves)
+    megabytes = len(sgf) / 1e6
+
+    # the engines must agree on the token stream
+    expected = [(t.type, t.start, t.end) for t in rule_by_rule_tokens(sgf)]
+    assert [(t.type, t.start, t.end) for t in next_token_tokens(sgf)] == expected
+    assert bulk_tokens(sgf) == [t for t in expected if t[0].name != 'IGNORE']
+
+    baseline = None
+    for name, func in [
+        ('rule-by-rule', rule_by_rule_tokens),
+        ('next_token', next_token_tokens),
+        ('tokenize', bulk_tokens),
+        ('parse', SGFParser().parse),
+    ]:
+        seconds = measure(func, sgf)
+        if baseline is None:
+            baseline = seconds
+        print(f'{name:>14}: {seconds:8.3f}s {megabytes / seconds:8.2f} MB/s  x{baseline / seconds:.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+"""
+The benchmark suite: time the lexer, the parser, the serializer, the traversals and the merges on synthetic records
+of several shapes, report the throughput and the peak memory, and save the results as JSON to compare runs.
+
+Run with `python -m benchmarks.suite [--scale 1.0] [--repeat 3] [--output results.json] [--compare old.json]`.
+"""
+import argparse
+import datetime
+import gc
+import json
+import math
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from sgf_tool import SGFLexer, SGFParser, SGFPushParser, TreeIndex, iter_events, scan_headers, subtree_hash
+from sgf_tool.utils import Algorithm
+from .generators import make_collection, make_comment_heavy, make_main_line, make_nested_variations, make_variation_fan
+
+FORMAT_VERSION = 1
+
+
+def make_shapes(scale):
+    """
+    The SGF texts of the suite by shape name. All the shapes are deterministic for a given scale.
+    """
+    return {
+        'main_line': make_main_line(max(1, int(50000 * scale))),
+        'variation_fan': make_variation_fan(max(1, int(5000 * scale)), 4),
+        'nested': make_nested_variations(max(1, 12 + round(math.log2(scale))), 2, 3),
+        'comment_heavy': make_comment_heavy(max(1, int(2000 * scale)), 500),
+        'collection': make_collection(max(1, int(200 * scale)), 100),
+    }
+
+
+def consume(iterator):
+    for _ in iterator:
+        pass
+
+
+def push_parse(text, chunk_size=1 << 16):
+    parser = SGFPushParser()
+    games = []
+    for i in range(0, len(text), chunk_size):
+        games.extend(parser.feed(text[i:i + chunk_size]))
+    games.extend(parser.close())
+    return games
+
+
+def move_comparator(node, other):
+    key = repr(Algorithm.move_key(node))
+    other_key = repr(Algorithm.move_key(other))
+    return (key > other_key) - (key < other_key)
+
+
+def count_nodes(roots):
+    count = 0
+    for root in roots:
+        for _ in Algorithm.dfs_iterator(root):
+            count += 1
+    return count
+
+
+def make_cases(shape, sgf):
+    """
+    The benchmarks of a shape as (name, setup, func): func(*setup()) is timed, setup() is not.
+    """
+    parser = SGFParser()
+    main_line_parser = SGFParser(main_line=True)
+    if shape == 'collection':
+        # parse() and parse_iterator() accept a single game, the collection goes through parse_collection()
+        return [
+            ('lex', lambda: (sgf,), lambda text: consume(SGFLexer(text).tokenize())),
+            ('parse_collection', lambda: (sgf,), lambda text: consume(parser.parse_collection(text))),
+            ('iter_events', lambda: (sgf,), lambda text: consume(iter_events(text))),
+            ('push_parse', lambda: (sgf,), push_parse),
+            ('to_sgf', lambda: (list(parser.parse_collection(sgf)),), lambda roots: [root.to_sgf() for root in roots]),
+        ]
+
+    def parsed():
+        return (parser.parse(sgf),)
+
+    def two_trees():
+        return parser.parse(sgf), parser.parse(sgf)
+
+    def visit(node, depth):
+        pass
+
+    return [
+        ('lex', lambda: (sgf,), lambda text: consume(SGFLexer(text).tokenize())),
+        ('parse', lambda: (sgf,), parser.parse),
+        ('parse_iterator', lambda: (sgf,), lambda text: consume(parser.parse_iterator(text))),
+        ('parse_main_line', lambda: (sgf,), main_line_parser.parse),
+        ('iter_events', lambda: (sgf,), lambda text: consume(iter_events(text))),
+        ('scan_headers', lambda: (sgf,), scan_headers),
+        ('push_parse', lambda: (sgf,), push_parse),
+        ('to_sgf', parsed, lambda root: root.to_sgf()),
+        ('dfs', parsed, lambda root: Algorithm.dfs(root, visit)),
+        ('bfs', parsed, lambda root: Algorithm.bfs(root, visit)),
+        ('dfs_iterator', parsed, lambda root: consume(Algorithm.dfs_iterator(root))),
+        ('bfs_iterator', parsed, lambda root: consume(Algorithm.bfs_iterator(root))),
+        ('bottom_up_dfs', parsed, lambda root: Algorithm.bottom_up_dfs(root, visit)),
+        ('bottom_up_bfs', parsed, lambda root: Algorithm.bottom_up_bfs(root, visit)),
+        ('bottom_up_dfs_iterator', parsed, lambda root: consume(Algorithm.bottom_up_dfs_iterator(root))),
+        ('bottom_up_bfs_iterator', parsed, lambda root: consume(Algorithm.bottom_up_bfs_iterator(root))),
+        ('subtree_hash', parsed, subtree_hash),
+        ('tree_index', parsed, TreeIndex),
+        # merging a tree with a copy of itself matches every node
+        ('merge_tree', two_trees, lambda root, other: Algorithm.merge_tree(root, other, move_comparator)),
+        ('merge_trees', two_trees, lambda root, other: Algorithm.merge_trees(root, [other])),
+    ]
+
+
+def measure(setup, func, repeat):
+    """
+    Run func(*setup()) repeat times, and once more under tracemalloc for the peak memory.
+    Returns (best seconds, mean seconds, peak bytes).
+    """
+    times = []
+    for _ in range(repeat):
+        args = setup()
+        gc.collect()
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+        del args
+
+    args = setup()
+    gc.collect()
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(times), sum(times) / len(times), peak
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(scale=1.0, repeat=3, names=None, shapes=None, log=print):
+    """
+    Run the suite and return the results as a JSON-serializable dict. names and shapes restrict the benchmarks and
+    the shapes that are run.
+    """
+    results = []
+    for shape, sgf in make_shapes(scale).items():
+        if shapes and shape not in shapes:
+            continue
+        parser = SGFParser()
+        roots = list(parser.parse_collection(sgf)) if shape == 'collection' else [parser.parse(sgf)]
+        num_nodes = count_nodes(roots)
+        num_bytes = len(sgf.encode('utf-8'))
+        del roots
+        log(f'{shape}: {num_nodes} nodes, {num_bytes / 1e6:.2f} MB')
+
+        for name, setup, func in make_cases(shape, sgf):
+            if names and name not in names:
+                continue
+            best, mean, peak = measure(setup, func, repeat)
+            result = {
+                'shape': shape,
+                'name': name,
+                'bytes': num_bytes,
+                'nodes': num_nodes,
+                'best_seconds': best,
+                'mean_seconds': mean,
+                'mb_per_second': num_bytes / 1e6 / best if best > 0 else None,
+                'nodes_per_second': num_nodes / best if best > 0 else None,
+                'peak_memory_bytes': peak,
+            }
+            results.append(result)
+            log(f'  {name:>24}: {best:8.4f}s {result["mb_per_second"]:9.2f} MB/s '
+                f'{result["nodes_per_second"] / 1e6:7.2f} M nodes/s  peak {peak / 1e6:8.2f} MB')
+
+    return {
+        'format_version': FORMAT_VERSION,
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'commit': git_commit(),
+        'python': sys.version,
+        'platform': platform.platform(),
+        'scale': scale,
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def compare(report, previous, log=print):
+    """
+    Print the speedup (> 1 is faster) and the memory change of every benchmark also found in the previous report.
+    """
+    old_results = {(result['shape'], result['name']): result for result in previous['results']}
+    log(f'compared with {previous.get("commit") or "unknown commit"} from {previous.get("timestamp")}')
+    for result in report['results']:
+        old = old_results.get((result['shape'], result['name']))
+        if old is None or old['bytes'] != result['bytes']:
+            continue
+        speedup = old['best_seconds'] / result['best_seconds'] if result['best_seconds'] > 0 else float('inf')
+        memory = result['peak_memory_bytes'] / old['peak_memory_bytes'] if old['peak_memory_bytes'] else float('inf')
+        log(f'  {result["shape"]:>14} {result["name"]:>24}: x{speedup:5.2f} time, x{memory:5.2f} peak memory')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the SGFTool benchmark suite.')
+    parser.add_argument('--scale', type=float, default=1.0, help='size of the generated records (default: 1.0)')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per benchmark, the best one is kept (default: 3)')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='compare with the results in this JSON file')
+    parser.add_argument('--name', action='append', help='run only this benchmark (can be repeated)')
+    parser.add_argument('--shape', action='append', help='run only this shape (can be repeated)')
+    args = parser.parse_args(argv)
+
+    report = run(args.scale, args.repeat, args.name, args.shape)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(report, json.load(f))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
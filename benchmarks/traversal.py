@@ -0,0 +1,49 @@
+"""
+Time the traversals of Algorithm on a deep and a wide tree.
+
+Run with `python -m benchmarks.traversal [num_nodes]`.
+"""
+import sys
+import time
+from sgf_tool import SGFParser, Traversal
+from sgf_tool.utils import Algorithm
+from .generators import make_main_line, make_variation_fan
+
+
+def measure(func, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def consume(iterator):
+    for _ in iterator:
+        pass
+
+
+def main():
+    num_nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    trees = [
+        ('deep', SGFParser().parse(make_main_line(num_nodes, comment_rate=0))),
+        ('wide', SGFParser().parse(make_variation_fan(num_nodes // 4, 4))),
+    ]
+    for shape, root in trees:
+        print(f'{shape} tree, {num_nodes} nodes')
+        for name, func in [
+            ('dfs', lambda: Algorithm.dfs(root, lambda node, depth: None)),
+            ('dfs_iterator', lambda: consume(Algorithm.dfs_iterator(root))),
+            ('bfs_iterator', lambda: consume(Algorithm.bfs_iterator(root))),
+            ('bottom_up_dfs_iterator', lambda: consume(Algorithm.bottom_up_dfs_iterator(root))),
+            ('bottom_up_bfs_iterator', lambda: consume(Algorithm.bottom_up_bfs_iterator(root))),
+            ('events', lambda: consume(Traversal(root, events=True))),
+            ('find_nodes_with_property', lambda: Algorithm.find_nodes_with_property(root, 'B', 'pd')),
+        ]:
+            seconds = measure(func)
+            print(f'{name:>26}: {seconds:8.4f}s {num_nodes / seconds / 1e6:8.2f} M nodes/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,18 @@
-from .parser import NodeAllocator, SGFParser
+from .parser import NodeAllocator, SGFParser, scan_headers, scan_headers_file
 from .lexer import SGFToken, SGFTokenType, SGFLexer
 from .node import BaseSGFNode, SGFNode
+from .property_index import PropertyIndex
+from .position import Board, PositionIndex
+from .traversal import Traversal, TraversalEvent, TraversalOrder
 from .exceptions import LexicalError, SGFError
-from . import utils
+from .arena import ArenaNode, ArenaNodeAllocator, SGFArena
+from .binary import BinaryNode, BinaryTree, dump_binary, dumps_binary, load_binary
+from .cache import CacheStats, ParseCache
+from .incremental import SGFDocument
+from .instrumentation import ParseStats, ThrottledProgress, add_timing_hook, remove_timing_hook
+from .events import SGFEventType, SGFHandler, iter_events, parse_events, parse_events_file
+from .stream import SGFPushParser, parse_stream
+from .recovery import SGFDiagnostic, SGFDiagnosticCode
+from .merkle import TreeDifference, diff_trees, group_duplicates, same_subtree, subtree_hash, unique_trees
+from .tree_index import TreeIndex
+from . import batch, serializer, tensors, utils
@@ -0,0 +1,232 @@
+from array import array
+from .node import BaseSGFNode, LazyValues
+from .parser import NodeAllocator
+from . import serializer
+import typing
+
+
+class SGFArena:
+    """
+    Struct-of-arrays storage for the nodes of one or more trees.
+
+    Node links (parent, first/last child, next/previous sibling) are stored as indices in array columns (-1 means no
+    node), and the properties of a node are a contiguous range of the property columns, each property pointing to a
+    contiguous range of the values list.
+    Ranges that are replaced by __setitem__ are appended again at the end, the old ones are left unused.
+    """
+
+    def __init__(self):
+        # node columns
+        self.parent = array('i')
+        self.first_child = array('i')
+        self.last_child = array('i')
+        self.next_sibling = array('i')
+        self.prev_sibling = array('i')
+        self.num_children = array('i')
+        self.property_start = array('i')
+        self.property_count = array('i')
+
+        # property columns
+        self.property_tag = array('i')
+        self.value_start = array('i')
+        self.value_count = array('i')
+
+        self.values: typing.List[str] = []
+        self.tags: typing.List[str] = []
+        self.tag_ids: typing.Dict[str, int] = {}
+        self.short_values: typing.Dict[str, str] = {}  # shared instances of short values such as moves
+
+    def __len__(self):
+        return len(self.parent)
+
+    def new_node(self) -> int:
+        index = len(self.parent)
+        self.parent.append(-1)
+        self.first_child.append(-1)
+        self.last_child.append(-1)
+        self.next_sibling.append(-1)
+        self.prev_sibling.append(-1)
+        self.num_children.append(0)
+        self.property_start.append(len(self.property_tag))
+        self.property_count.append(0)
+        return index
+
+    def find_property(self, index: int, tag: str) -> int:
+        """
+        Get the position of the property in the property columns, or -1 if the node does not have it.
+        """
+        tag_id = self.tag_ids.get(tag)
+        if tag_id is None:
+            return -1
+        start = self.property_start[index]
+        property_tag = self.property_tag
+        for i in range(start, start + self.property_count[index]):
+            if property_tag[i] == tag_id:
+                return i
+        return -1
+
+    def get_values(self, index: int, tag: str) -> typing.List[str]:
+        i = self.find_property(index, tag)
+        if i == -1:
+            raise KeyError(tag)
+        start = self.value_start[i]
+        return self.values[start:start + self.value_count[i]]
+
+    def set_values(self, index: int, tag: str, values: typing.List[str]):
+        short_values = self.short_values
+        for i, value in enumerate(values):
+            if len(value) <= 4:
+                values[i] = short_values.setdefault(value, value)
+
+        i = self.find_property(index, tag)
+        if i == -1:
+            start = self.property_start[index]
+            count = self.property_count[index]
+            if start + count != len(self.property_tag):
+                # the range is not at the end, move it there so that it can grow
+                for j in range(start, start + count):
+                    self.property_tag.append(self.property_tag[j])
+                    self.value_start.append(self.value_start[j])
+                    self.value_count.append(self.value_count[j])
+                self.property_start[index] = start = len(self.property_tag) - count
+            tag_id = self.tag_ids.get(tag)
+            if tag_id is None:
+                tag_id = self.tag_ids[tag] = len(self.tags)
+                self.tags.append(tag)
+            self.property_tag.append(tag_id)
+            self.value_start.append(len(self.values))
+            self.value_count.append(len(values))
+            self.property_count[index] = count + 1
+        else:
+            self.value_start[i] = len(self.values)
+            self.value_count[i] = len(values)
+        self.values.extend(values)
+
+    def get_tags(self, index: int) -> typing.List[str]:
+        start = self.property_start[index]
+        tags = self.tags
+        return [tags[tag_id] for tag_id in self.property_tag[start:start + self.property_count[index]]]
+
+    def get_child(self, index: int, child_index: int) -> int:
+        ptr = self.first_child[index]
+        for _ in range(child_index):
+            if ptr == -1:
+                return -1
+            ptr = self.next_sibling[ptr]
+        return ptr
+
+    def add_child(self, index: int, child: int):
+        self.detach(child)
+        last = self.last_child[index]
+        if last == -1:
+            self.first_child[index] = child
+        else:
+            self.next_sibling[last] = child
+            self.prev_sibling[child] = last
+        self.last_child[index] = child
+        self.parent[child] = index
+        self.num_children[index] += 1
+
+    def detach(self, index: int):
+        parent = self.parent[index]
+        if parent != -1:
+            prev_sibling = self.prev_sibling[index]
+            next_sibling = self.next_sibling[index]
+            if prev_sibling == -1:
+                self.first_child[parent] = next_sibling
+            else:
+                self.next_sibling[prev_sibling] = next_sibling
+            if next_sibling == -1:
+                self.last_child[parent] = prev_sibling
+            else:
+                self.prev_sibling[next_sibling] = prev_sibling
+            self.num_children[parent] -= 1
+            self.parent[index] = -1
+            self.next_sibling[index] = -1
+            self.prev_sibling[index] = -1
+
+
+class ArenaNode(BaseSGFNode):
+    """
+    A lightweight handle to a node stored in an SGFArena.
+
+    Handles are created on demand and compare equal when they refer to the same node of the same arena.
+    """
+    __slots__ = ('arena', 'index')
+
+    def __init__(self, arena: SGFArena, index: int):
+        self.arena = arena
+        self.index = index
+
+    def __eq__(self, other):
+        return isinstance(other, ArenaNode) and self.index == other.index and self.arena is other.arena
+
+    def __hash__(self):
+        return hash((id(self.arena), self.index))
+
+    def __setitem__(self, key, value):
+        if type(value) is LazyValues:
+            value = value.materialize()
+        elif not hasattr(value, '__iter__') or isinstance(value, str):
+            raise ValueError('Value must be an iterable object other than str.')
+        self.arena.set_values(self.index, key, list(value))
+
+    def __getitem__(self, key):
+        return self.arena.get_values(self.index, key)
+
+    def __contains__(self, key):
+        return self.arena.find_property(self.index, key) != -1
+
+    def __str__(self):
+        result = ';'
+        for key in self.get_tags():
+            result += f'{key}[{"][".join(self[key])}]'
+        return result
+
+    def to_sgf(self):
+        return serializer.dumps(self)
+
+    def get_tags(self):
+        return self.arena.get_tags(self.index)
+
+    def get_parent(self):
+        parent = self.arena.parent[self.index]
+        return None if parent == -1 else ArenaNode(self.arena, parent)
+
+    def get_child(self, index):
+        child = self.arena.get_child(self.index, index)
+        return None if child == -1 else ArenaNode(self.arena, child)
+
+    def get_num_children(self):
+        return self.arena.num_children[self.index]
+
+    def add_child(self, child):
+        if not isinstance(child, ArenaNode) or child.arena is not self.arena:
+            raise ValueError('Child must be a node of the same arena.')
+        self.arena.add_child(self.index, child.index)
+
+    def detach(self):
+        self.arena.detach(self.index)
+        return self
+
+    def get_children_iter(self):
+        arena = self.arena
+        next_sibling = arena.next_sibling
+        ptr = arena.first_child[self.index]
+        while ptr != -1:
+            yield ArenaNode(arena, ptr)
+            ptr = next_sibling[ptr]
+
+
+class ArenaNodeAllocator(NodeAllocator):
+    """
+    Allocate the nodes of SGFParser in an SGFArena.
+
+    All the trees parsed with the same allocator share its arena.
+    """
+
+    def __init__(self, arena: typing.Optional[SGFArena] = None):
+        self.arena = arena if arena is not None else SGFArena()
+
+    def allocate(self) -> ArenaNode:
+        return ArenaNode(self.arena, self.arena.new_node())
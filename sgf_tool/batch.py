@@ -0,0 +1,182 @@
+"""
+Parse many SGF files in parallel.
+
+Run `python -m sgf_tool.batch --help` for the command line interface.
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import pickle
+import sys
+import typing
+from .binary import dumps_binary, load_binary
+from .exceptions import BaseSGFException
+from .node import BaseSGFNode
+from .parser import SGFParser
+from .utils import Algorithm
+
+
+class BatchResult(typing.NamedTuple):
+    path: str
+    value: typing.Any  # the result of func, None if the file failed
+    error: typing.Optional[str]  # a short description of the error, None if the file succeeded
+
+
+def summarize(root: typing.Optional[BaseSGFNode]) -> dict:
+    """
+    A compact summary of a tree: the root properties, the number of nodes and the depth.
+    """
+    if root is None:
+        return {'properties': {}, 'nodes': 0, 'depth': 0}
+    nodes = 0
+    max_depth = 0
+    for _, depth in Algorithm.dfs_iterator(root):
+        nodes += 1
+        max_depth = max(max_depth, depth)
+    return {
+        'properties': {tag: list(root[tag]) for tag in root.get_tags()},
+        'nodes': nodes,
+        'depth': max_depth,
+    }
+
+
+def describe_error(error: Exception) -> str:
+    if isinstance(error, BaseSGFException):
+        # without the source, which may be large
+        return f'{type(error).__name__}: {error.message} at {error.start}:{error.end}'
+    return f'{type(error).__name__}: {error}'
+
+
+def _parse_chunk(args) -> typing.List[BatchResult]:
+    """
+    Parse the files of a chunk. If serialize is True (in a worker process), every value is serialized here so that a
+    value that cannot be sent back is reported as the error of its file: trees in the binary format, which keeps no
+    reference to the mapped file and needs no recursion, and the results of func with pickle.
+    """
+    paths, func, encoding, serialize = args
+    parser = SGFParser()
+    results = []
+    for path in paths:
+        try:
+            root = parser.parse_file(path, encoding=encoding)
+            value = func(root) if func is not None else root
+            if serialize:
+                if func is not None:
+                    value = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+                elif value is not None:
+                    value = dumps_binary(value)
+            results.append(BatchResult(path, value, None))
+        except Exception as e:
+            results.append(BatchResult(path, None, describe_error(e)))
+    return results
+
+
+def _deserialize(result: BatchResult, func) -> BatchResult:
+    """
+    Restore the value of a result serialized by _parse_chunk() in a worker.
+    """
+    if result.value is None:
+        return result
+    try:
+        value = pickle.loads(result.value) if func is not None else load_binary(result.value)
+    except Exception as e:
+        return BatchResult(result.path, None, describe_error(e))
+    return BatchResult(result.path, value, None)
+
+
+def parse_many(
+    paths: typing.Iterable[str],
+    workers: typing.Optional[int] = None,
+    func: typing.Optional[typing.Callable[[typing.Optional[BaseSGFNode]], typing.Any]] = summarize,
+    chunksize: int = 64,
+    progress_callback: typing.Optional[typing.Callable[[int, int], None]] = None,
+    encoding: typing.Optional[str] = None,
+) -> typing.Generator[BatchResult, None, None]:
+    """
+    Parse files in a pool of processes and generate a BatchResult for each file, in completion order.
+
+    Each worker parses chunks of up to chunksize files and applies func to every tree, so only the results of func are
+    sent back; func must be picklable (e.g. a module-level function), and so must its results. With func=None the
+    trees themselves are sent back in the binary format and loaded as SGFNode trees, which is expensive for large
+    trees. Errors, including a result that cannot be sent back, are reported in the results and do not stop the run.
+
+    Args:
+        paths (Iterable[str]): The files to parse.
+        workers (int, optional): The number of processes, os.cpu_count() by default. 1 parses in this process.
+        func (Callable, optional): Applied to each parsed tree (None for an empty file) in the worker.
+        chunksize (int): The maximum number of files sent to a worker at once. Smaller chunks are used when there
+            are not enough files for about 4 chunks per worker.
+        progress_callback (Callable[[int, int], None], optional): Called with (files done, total files) after each
+            chunk.
+        encoding (str, optional): Forwarded to SGFParser.parse_file.
+    """
+    paths = list(paths)
+    total = len(paths)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    parallel = workers > 1 and total > 1
+    if parallel:
+        # about 4 chunks per worker, so that the work is spread over all of them and balanced at the end
+        chunksize = max(1, min(chunksize, math.ceil(total / (workers * 4))))
+    chunks = [(paths[i:i + chunksize], func, encoding, parallel) for i in range(0, total, chunksize)]
+
+    done = 0
+    if not parallel:
+        for chunk in chunks:
+            results = _parse_chunk(chunk)
+            done += len(results)
+            yield from results
+            if progress_callback:
+                progress_callback(done, total)
+        return
+
+    with multiprocessing.Pool(min(workers, len(chunks))) as pool:
+        for results in pool.imap_unordered(_parse_chunk, chunks):
+            done += len(results)
+            for result in results:
+                yield _deserialize(result, func)
+            if progress_callback:
+                progress_callback(done, total)
+
+
+def find_sgf_files(paths: typing.Iterable[str]) -> typing.List[str]:
+    """
+    Expand directories (recursively) into the .sgf files they contain.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, _, names in os.walk(path):
+                files.extend(os.path.join(directory, name) for name in sorted(names) if name.lower().endswith('.sgf'))
+        else:
+            files.append(path)
+    return files
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Parse SGF files in parallel and print a JSON summary per file.')
+    parser.add_argument('paths', nargs='+', help='SGF files or directories containing .sgf files')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='number of processes (default: number of CPUs)')
+    parser.add_argument('--chunksize', type=int, default=64, help='files per task (default: 64)')
+    parser.add_argument('--encoding', default=None, help='encoding of the files (default: CA[] property)')
+    parser.add_argument('-q', '--quiet', action='store_true', help='do not report progress')
+    args = parser.parse_args(argv)
+
+    def report(done, total):
+        print(f'\r{done}/{total}', end='', file=sys.stderr, flush=True)
+
+    files = find_sgf_files(args.paths)
+    failed = 0
+    for result in parse_many(files, args.workers, summarize, args.chunksize, None if args.quiet else report, args.encoding):
+        if result.error is not None:
+            failed += 1
+        print(json.dumps({'path': result.path, 'summary': result.value, 'error': result.error}, ensure_ascii=False))
+    if not args.quiet:
+        print(f'\r{len(files)} files, {failed} failed', file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,323 @@
+"""
+A compact binary format for parsed trees.
+
+Layout (little-endian, every section aligned to 8 bytes):
+
+    header           magic b'SGFB', version (u16), flags (u16), number of nodes N, properties P, values V, tags T (u64)
+    parent           i32[N]      index of the parent node, -1 for the root
+    first_child      i32[N]      -1 if the node has no children
+    next_sibling     i32[N]      -1 for the last child
+    num_children     u32[N]
+    property_start   u32[N + 1]  the properties of node i are property_start[i]:property_start[i + 1]
+    property_tag     u32[P]      index into the tag table
+    value_start      u32[P + 1]  the values of property j are value_start[j]:value_start[j + 1]
+    value_offset     u32[V + 1]  the value k is value_blob[value_offset[k]:value_offset[k + 1]] (u64 if the flags
+                                 have FLAG_WIDE_OFFSETS)
+    tag_offset       u32[T + 1]  the tag t is tag_blob[tag_offset[t]:tag_offset[t + 1]]
+    tag_blob         UTF-8
+    value_blob       UTF-8
+
+Nodes are numbered in pre-order, so node 0 is the root.
+"""
+from array import array
+from .node import BaseSGFNode
+from .parser import NodeAllocator, map_file
+from . import serializer
+import struct
+import sys
+import typing
+
+MAGIC = b'SGFB'
+VERSION = 1
+HEADER = struct.Struct('<4sHHQQQQ')
+
+FLAG_WIDE_OFFSETS = 1  # value_offset is u64 instead of u32
+MAX_NARROW_OFFSET = (1 << 32) - 1  # value blobs up to this size are written without FLAG_WIDE_OFFSETS
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _little_endian(column: array) -> bytes:
+    if sys.byteorder != 'little':
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def dumps_binary(root: BaseSGFNode) -> bytes:
+    """
+    Convert the tree to the binary format.
+    """
+    parent = array('i')
+    first_child = array('i')
+    next_sibling = array('i')
+    num_children = array('I')
+    last_child = []
+    property_start = array('I', [0])
+    property_tag = array('I')
+    value_start = array('I', [0])
+    value_offset = [0]
+    values = []
+    tag_ids = {}
+    value_size = 0
+
+    # number the nodes in pre-order, linking each one to its parent and previous sibling
+    stack = [(root, -1)]
+    while stack:
+        node, parent_index = stack.pop()
+        index = len(parent)
+        parent.append(parent_index)
+        first_child.append(-1)
+        next_sibling.append(-1)
+        last_child.append(-1)
+        num_children.append(node.get_num_children())
+        if parent_index != -1:
+            if last_child[parent_index] == -1:
+                first_child[parent_index] = index
+            else:
+                next_sibling[last_child[parent_index]] = index
+            last_child[parent_index] = index
+
+        for tag in node.get_tags():
+            tag_id = tag_ids.get(tag)
+            if tag_id is None:
+                tag_id = tag_ids[tag] = len(tag_ids)
+            property_tag.append(tag_id)
+            for value in node[tag]:
+                encoded = value.encode('utf-8')
+                values.append(encoded)
+                value_size += len(encoded)
+                value_offset.append(value_size)
+            value_start.append(len(values))
+        property_start.append(len(property_tag))
+
+        for child in reversed(list(node.get_children_iter())):
+            stack.append((child, index))
+
+    flags = 0 if value_size <= MAX_NARROW_OFFSET else FLAG_WIDE_OFFSETS
+    value_offset = array('Q' if flags & FLAG_WIDE_OFFSETS else 'I', value_offset)
+
+    tags = [tag.encode('utf-8') for tag in tag_ids]
+    tag_offset = array('I', [0])
+    for tag in tags:
+        tag_offset.append(tag_offset[-1] + len(tag))
+
+    sections = [
+        _little_endian(parent),
+        _little_endian(first_child),
+        _little_endian(next_sibling),
+        _little_endian(num_children),
+        _little_endian(property_start),
+        _little_endian(property_tag),
+        _little_endian(value_start),
+        _little_endian(value_offset),
+        _little_endian(tag_offset),
+        b''.join(tags),
+        b''.join(values),
+    ]
+    header = HEADER.pack(MAGIC, VERSION, flags, len(parent), len(property_tag), len(values), len(tags))
+    parts = [header]
+    offset = len(header)
+    for section in sections:
+        padding = _align(offset) - offset
+        parts.append(b'\0' * padding)
+        parts.append(section)
+        offset += padding + len(section)
+    return b''.join(parts)
+
+
+def dump_binary(root: BaseSGFNode, fp):
+    """
+    Write the tree in the binary format to a binary file-like object.
+    """
+    fp.write(dumps_binary(root))
+
+
+class BinaryTree:
+    """
+    A tree in the binary format, read in place from a bytes-like object (bytes, memoryview, mmap, ...).
+
+    Only the header and the tag table are read when the tree is opened; the node columns are views of the buffer and
+    values are decoded when they are accessed through the read-only BinaryNode handles.
+    """
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        view = memoryview(buffer)
+        if len(view) < HEADER.size:
+            raise ValueError('Not an SGF binary tree: the data is too short')
+        magic, version, flags, num_nodes, num_properties, num_values, num_tags = HEADER.unpack_from(view, 0)
+        if magic != MAGIC:
+            raise ValueError('Not an SGF binary tree: bad magic number')
+        if version != VERSION:
+            raise ValueError(f'Unsupported SGF binary tree version {version}')
+
+        offset = HEADER.size
+
+        def column(typecode, count):
+            nonlocal offset
+            offset = _align(offset)
+            size = array(typecode).itemsize * count
+            data = view[offset:offset + size]
+            offset += size
+            if sys.byteorder == 'little':
+                return data.cast(typecode)
+            values = array(typecode, data)
+            values.byteswap()
+            return values
+
+        self.parent = column('i', num_nodes)
+        self.first_child = column('i', num_nodes)
+        self.next_sibling = column('i', num_nodes)
+        self.num_children = column('I', num_nodes)
+        self.property_start = column('I', num_nodes + 1)
+        self.property_tag = column('I', num_properties)
+        self.value_start = column('I', num_properties + 1)
+        self.value_offset = column('Q' if flags & FLAG_WIDE_OFFSETS else 'I', num_values + 1)
+        tag_offset = column('I', num_tags + 1)
+
+        offset = _align(offset)
+        tag_blob = bytes(view[offset:offset + tag_offset[-1]])
+        self.tags = [tag_blob[tag_offset[i]:tag_offset[i + 1]].decode('utf-8') for i in range(num_tags)]
+        self.tag_ids = {tag: i for i, tag in enumerate(self.tags)}
+        offset = _align(offset + tag_offset[-1])
+        self.value_blob = view[offset:offset + self.value_offset[-1]]
+
+    @classmethod
+    def open(cls, path) -> 'BinaryTree':
+        """
+        Open a binary tree file through a read-only memory map.
+        """
+        return cls(map_file(path))
+
+    def __len__(self):
+        return len(self.parent)
+
+    @property
+    def root(self) -> typing.Optional['BinaryNode']:
+        return BinaryNode(self, 0) if len(self.parent) > 0 else None
+
+    def get_tags(self, index: int) -> typing.List[str]:
+        tags = self.tags
+        return [tags[self.property_tag[j]] for j in range(self.property_start[index], self.property_start[index + 1])]
+
+    def find_property(self, index: int, tag: str) -> int:
+        tag_id = self.tag_ids.get(tag)
+        if tag_id is None:
+            return -1
+        property_tag = self.property_tag
+        for j in range(self.property_start[index], self.property_start[index + 1]):
+            if property_tag[j] == tag_id:
+                return j
+        return -1
+
+    def get_property_values(self, j: int) -> typing.List[str]:
+        value_offset = self.value_offset
+        blob = self.value_blob
+        return [str(blob[value_offset[k]:value_offset[k + 1]], 'utf-8') for k in range(self.value_start[j], self.value_start[j + 1])]
+
+    def to_node(self, node_allocator: NodeAllocator = NodeAllocator()) -> typing.Optional[BaseSGFNode]:
+        """
+        Build a regular tree with the node allocator.
+        """
+        # decode all the values at once, they are stored in the order they are needed
+        blob = bytes(self.value_blob)
+        value_offset = self.value_offset.tolist()
+        values = [blob[value_offset[k]:value_offset[k + 1]].decode('utf-8') for k in range(len(value_offset) - 1)]
+        value_start = self.value_start.tolist()
+        property_start = self.property_start.tolist()
+        property_tag = self.property_tag.tolist()
+        tags = self.tags
+
+        nodes = []
+        allocate = node_allocator.allocate
+        for index, parent in enumerate(self.parent.tolist()):
+            node = allocate()
+            for j in range(property_start[index], property_start[index + 1]):
+                node[tags[property_tag[j]]] = values[value_start[j]:value_start[j + 1]]
+            if parent != -1:
+                # nodes are in pre-order, so siblings are added in their order
+                nodes[parent].add_child(node)
+            nodes.append(node)
+        return nodes[0] if nodes else None
+
+
+class BinaryNode(BaseSGFNode):
+    """
+    A read-only handle to a node of a BinaryTree. Use BinaryTree.to_node() to get a tree that can be modified.
+    """
+    __slots__ = ('tree', 'index')
+
+    def __init__(self, tree: BinaryTree, index: int):
+        self.tree = tree
+        self.index = index
+
+    def __eq__(self, other):
+        return isinstance(other, BinaryNode) and self.index == other.index and self.tree is other.tree
+
+    def __hash__(self):
+        return hash((id(self.tree), self.index))
+
+    def __setitem__(self, key, value):
+        raise TypeError('BinaryNode is read-only')
+
+    def __getitem__(self, key):
+        j = self.tree.find_property(self.index, key)
+        if j == -1:
+            raise KeyError(key)
+        return self.tree.get_property_values(j)
+
+    def __contains__(self, key):
+        return self.tree.find_property(self.index, key) != -1
+
+    def __str__(self):
+        result = ';'
+        for key in self.get_tags():
+            result += f'{key}[{"][".join(self[key])}]'
+        return result
+
+    def to_sgf(self):
+        return serializer.dumps(self)
+
+    def get_tags(self):
+        return self.tree.get_tags(self.index)
+
+    def get_parent(self):
+        parent = self.tree.parent[self.index]
+        return None if parent == -1 else BinaryNode(self.tree, parent)
+
+    def get_child(self, index):
+        ptr = self.tree.first_child[self.index]
+        for _ in range(index):
+            if ptr == -1:
+                return None
+            ptr = self.tree.next_sibling[ptr]
+        return None if ptr == -1 else BinaryNode(self.tree, ptr)
+
+    def get_num_children(self):
+        return self.tree.num_children[self.index]
+
+    def add_child(self, child):
+        raise TypeError('BinaryNode is read-only')
+
+    def detach(self):
+        raise TypeError('BinaryNode is read-only')
+
+    def get_children_iter(self):
+        tree = self.tree
+        next_sibling = tree.next_sibling
+        ptr = tree.first_child[self.index]
+        while ptr != -1:
+            yield BinaryNode(tree, ptr)
+            ptr = next_sibling[ptr]
+
+
+def load_binary(data, node_allocator: NodeAllocator = NodeAllocator()) -> typing.Optional[BaseSGFNode]:
+    """
+    Load a tree from binary data (a bytes-like object or a binary file-like object) into regular nodes.
+    """
+    if hasattr(data, 'read'):
+        data = data.read()
+    return BinaryTree(data).to_node(node_allocator)
@@ -0,0 +1,163 @@
+from collections import OrderedDict
+from .binary import dumps_binary, load_binary
+from .node import BaseSGFNode
+from .parser import SGFParser, map_file
+import hashlib
+import os
+import tempfile
+import typing
+
+
+class CacheStats:
+    """
+    Counters of a ParseCache.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_hits = 0
+        self.disk_writes = 0
+
+    @property
+    def lookups(self) -> int:
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def __repr__(self):
+        return (
+            f'CacheStats(hits={self.hits}, misses={self.misses}, evictions={self.evictions}, '
+            f'disk_hits={self.disk_hits}, disk_writes={self.disk_writes})'
+        )
+
+
+class ParseCache:
+    """
+    A content-addressed cache in front of SGFParser.
+
+    Entries are keyed by the SHA-256 of the input and the parser options, and hold an immutable snapshot of the parsed
+    tree in the binary format (see sgf_tool.binary). Every call, hit or miss, returns a new tree built from the
+    snapshot with regular values, so callers may modify the trees they get without corrupting the cache.
+
+    The in-memory tier is an LRU bounded by the total size of the snapshots. If a directory is given, snapshots are
+    also stored there as <key>.sgfb files and looked up when they are not in memory.
+    """
+
+    def __init__(self, parser: typing.Optional[SGFParser] = None, max_bytes: int = 64 << 20, directory: typing.Optional[str] = None):
+        self.parser = parser if parser is not None else SGFParser()
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.entries: OrderedDict[str, bytes] = OrderedDict()
+        self.size = 0
+        self.stats = CacheStats()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def key(self, sgf: typing.Union[str, bytes], start: int = 0, encoding: typing.Optional[str] = None, default_encoding: str = 'iso-8859-1', errors: str = 'strict') -> str:
+        """
+        The cache key of an input: a hash of the content and of every option that affects the parsed tree.
+        """
+        parser = self.parser
+        options = (
+            type(parser.node_allocator).__qualname__,
+            parser.lazy_values,
+            bool(parser.property_index) if isinstance(parser.property_index, bool) else sorted(parser.property_index),
+            None if parser.projection is None else sorted(parser.projection),
+            parser.main_line,
+            isinstance(sgf, str),
+            start,
+            # the decoding of a bytes-like input
+            None if isinstance(sgf, str) else (encoding, default_encoding, errors),
+        )
+        digest = hashlib.sha256(repr(options).encode('utf-8'))
+        digest.update(sgf.encode('utf-8', 'surrogatepass') if isinstance(sgf, str) else sgf)
+        return digest.hexdigest()
+
+    def parse(self, sgf: typing.Union[str, bytes], start: int = 0, encoding: typing.Optional[str] = None, default_encoding: str = 'iso-8859-1', errors: str = 'strict') -> typing.Optional[BaseSGFNode]:
+        """
+        Parse a str (SGFParser.parse) or a bytes-like object (SGFParser.parse_bytes, with the encoding arguments)
+        through the cache. The tree is built from the snapshot on a miss too, so it is the same as on a later hit.
+        """
+        key = self.key(sgf, start, encoding, default_encoding, errors)
+        snapshot = self._get(key)
+        if snapshot is None:
+            if isinstance(sgf, str):
+                root = self.parser.parse(sgf, start)
+            else:
+                root = self.parser.parse_bytes(sgf, start, encoding=encoding, default_encoding=default_encoding, errors=errors)
+            snapshot = dumps_binary(root) if root is not None else b''
+            self._put(key, snapshot)
+        return self._load(snapshot)
+
+    def parse_file(self, path, encoding: typing.Optional[str] = None, default_encoding: str = 'iso-8859-1', errors: str = 'strict') -> typing.Optional[BaseSGFNode]:
+        """
+        Parse a file through the cache. The file is read to compute its key.
+        """
+        return self.parse(map_file(path), 0, encoding, default_encoding, errors)
+
+    def clear(self):
+        """
+        Drop the in-memory entries. The files of the disk tier are kept.
+        """
+        self.entries.clear()
+        self.size = 0
+
+    def _load(self, snapshot: bytes) -> typing.Optional[BaseSGFNode]:
+        if not snapshot:
+            return None
+        root = load_binary(snapshot, self.parser.node_allocator)
+        self.parser._attach_index(root)
+        return root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.sgfb')
+
+    def _get(self, key: str) -> typing.Optional[bytes]:
+        snapshot = self.entries.get(key)
+        if snapshot is not None:
+            self.entries.move_to_end(key)
+            self.stats.hits += 1
+            return snapshot
+
+        if self.directory is not None:
+            try:
+                with open(self._path(key), 'rb') as f:
+                    snapshot = f.read()
+            except FileNotFoundError:
+                pass
+            else:
+                self.stats.hits += 1
+                self.stats.disk_hits += 1
+                self._remember(key, snapshot)
+                return snapshot
+
+        self.stats.misses += 1
+        return None
+
+    def _put(self, key: str, snapshot: bytes):
+        self._remember(key, snapshot)
+        if self.directory is not None:
+            # write to a temporary file first so that readers never see a partial snapshot
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(snapshot)
+                os.replace(temp_path, self._path(key))
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+            self.stats.disk_writes += 1
+
+    def _remember(self, key: str, snapshot: bytes):
+        if len(snapshot) > self.max_bytes:
+            return
+        self.entries[key] = snapshot
+        self.size += len(snapshot)
+        while self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+            self.stats.evictions += 1
@@ -0,0 +1,148 @@
+"""
+Event-driven parsing: report the structure and the properties of the input without building a tree.
+
+iter_events() generates (event type, tag, values) tuples and parse_events() calls the methods of an SGFHandler.
+Only the values of the current property are held in memory, so the memory used does not depend on the size of the
+input. The input is checked with the same grammar as SGFParser and raises the same errors.
+"""
+from .lexer import SGFLexer
+from .parser import EMPTY_VALUE, LEFT_PAREN, SEMICOLON, TAG, VALUE, SGFGrammar, bytes_source, map_file, unexpected_token_error
+from .exceptions import SGFError
+import enum
+import typing
+
+
+class SGFEventType(enum.Enum):
+    GAME_START = 0  # the '(' of a game
+    GAME_END = 1  # the ')' of a game
+    VARIATION_START = 2  # the '(' of a variation inside a game
+    VARIATION_END = 3  # the ')' of a variation inside a game
+    NODE_START = 4  # the ';' of a node, its properties follow
+    PROPERTY = 5  # a property of the current node, with its tag and values
+
+
+GAME_START = SGFEventType.GAME_START
+GAME_END = SGFEventType.GAME_END
+VARIATION_START = SGFEventType.VARIATION_START
+VARIATION_END = SGFEventType.VARIATION_END
+NODE_START = SGFEventType.NODE_START
+PROPERTY = SGFEventType.PROPERTY
+
+SGFEvent = typing.Tuple[SGFEventType, typing.Optional[str], typing.Optional[typing.List[str]]]
+
+
+def iter_events(sgf: typing.Union[str, bytes], start: int = 0, progress_callback: typing.Optional[typing.Callable[[int, int], None]] = None, encoding: typing.Optional[str] = None, default_encoding: str = 'iso-8859-1', errors: str = 'strict', progress_interval: int = 0) -> typing.Generator[SGFEvent, None, None]:
+    """
+    Generate the events of a collection of games as (event type, tag, values) tuples. tag and values are None except
+    for PROPERTY events. Values are the raw (still escaped) strings, as stored by SGFParser.
+
+    A bytes-like input is decoded like in SGFParser.parse_collection(): with the encoding of the CA[] property of
+    each game unless encoding is given.
+    """
+    lexer = SGFLexer(sgf, start, progress_callback, progress_interval)
+    text = isinstance(sgf, str)
+    value_encoding = None
+    opens = []  # position of every open '('
+    tag = None
+    values = None
+    allowed = SGFGrammar[None]
+
+    for token_type, token_start, token_end in lexer.tokenize():
+        if token_type not in allowed:
+            raise unexpected_token_error(sgf, token_type, token_start, token_end)
+        allowed = SGFGrammar[token_type]
+
+        if token_type is VALUE or token_type is EMPTY_VALUE:
+            if text:
+                values.append(sgf[token_start + 1:token_end - 1])
+            else:
+                values.append(str(sgf[token_start + 1:token_end - 1], value_encoding, errors))
+
+        elif token_type is TAG:
+            if values is not None:
+                yield PROPERTY, tag, values
+            tag = sgf[token_start:token_end] if text else str(sgf[token_start:token_end], 'ascii')
+            values = []
+
+        elif token_type is SEMICOLON:
+            if values is not None:
+                yield PROPERTY, tag, values
+                values = None
+            yield NODE_START, None, None
+
+        elif token_type is LEFT_PAREN:
+            # the last property belongs to the node before the variation
+            if values is not None:
+                yield PROPERTY, tag, values
+                values = None
+            if len(opens) == 0:
+                if not text:
+                    # a new game, which may have its own charset
+                    value_encoding = bytes_source(sgf, token_start, encoding, default_encoding, errors).encoding
+                opens.append(token_start)
+                yield GAME_START, None, None
+            else:
+                opens.append(token_start)
+                yield VARIATION_START, None, None
+
+        else:  # RIGHT_PAREN
+            if len(opens) == 0:
+                raise SGFError('Unmatched right parentheses', token_start, token_end, detail=True, sgf=sgf)
+            if values is not None:
+                yield PROPERTY, tag, values
+                values = None
+            opens.pop()
+            yield GAME_END if len(opens) == 0 else VARIATION_END, None, None
+
+    if len(opens) > 0:
+        raise SGFError('Unmatched left parentheses', opens[-1], opens[-1] + 1, detail=True, sgf=sgf)
+
+
+class SGFHandler:
+    """
+    The receiver of parse_events(). Override the methods of the events you need, the others do nothing.
+    """
+
+    def game_start(self):
+        pass
+
+    def game_end(self):
+        pass
+
+    def variation_start(self):
+        pass
+
+    def variation_end(self):
+        pass
+
+    def node_start(self):
+        pass
+
+    def property(self, tag: str, values: typing.List[str]):
+        pass
+
+
+def parse_events(sgf: typing.Union[str, bytes], handler: SGFHandler, start: int = 0, progress_callback: typing.Optional[typing.Callable[[int, int], None]] = None, encoding: typing.Optional[str] = None, default_encoding: str = 'iso-8859-1', errors: str = 'strict', progress_interval: int = 0):
+    """
+    Parse a collection of games, calling the methods of the handler for every event. See iter_events().
+    """
+    methods = {
+        GAME_START: handler.game_start,
+        GAME_END: handler.game_end,
+        VARIATION_START: handler.variation_start,
+        VARIATION_END: handler.variation_end,
+        NODE_START: handler.node_start,
+    }
+    on_property = handler.property
+    for event_type, tag, values in iter_events(sgf, start, progress_callback, encoding, default_encoding, errors, progress_interval):
+        if event_type is PROPERTY:
+            on_property(tag, values)
+        else:
+            methods[event_type]()
+
+
+def parse_events_file(path, handler: SGFHandler, progress_callback: typing.Optional[typing.Callable[[int, int], None]] = None, encoding: typing.Optional[str] = None, default_encoding: str = 'iso-8859-1', errors: str = 'strict', progress_interval: int = 0):
+    """
+    Parse a file through a read-only memory map, calling the methods of the handler for every event.
+    """
+    parse_events(map_file(path), handler, 0, progress_callback, encoding, default_encoding, errors, progress_interval)
@@ -1,3 +1,13 @@
+def source_text(sgf, start, end):
+    """
+    Get sgf[start:end] as a str, decoding it if the source is a bytes-like object.
+    """
+    text = sgf[start:end]
+    if not isinstance(text, str):
+        text = bytes(text).decode('utf-8', errors='replace')
+    return text
+
+
 class BaseSGFException(Exception):
     def __init__(self, message, start, end, detail=False, sgf=None, offset=20, highlight_start='\033[1;31m', highlight_end='\033[0m'):
         self.message = message
@@ -19,9 +29,9 @@ class BaseSGFException(Exception):
             e = min(len(self.sgf), self.end + self.offset)
             return (
                 f'{self.message} at {self.start}:{self.end}\n'
-                f'{self.sgf[s:self.start]}{self.highlight_start}'
-                f'{self.sgf[self.start:self.end]}{self.highlight_end}'
-                f'{self.sgf[self.end:e]}'
+                f'{source_text(self.sgf, s, self.start)}{self.highlight_start}'
+                f'{source_text(self.sgf, self.start, self.end)}{self.highlight_end}'
+                f'{source_text(self.sgf, self.end, e)}'
             )
 
 
@@ -0,0 +1,307 @@
+from bisect import bisect_left, bisect_right
+from .lexer import SGFLexer
+from .node import SGFNode
+from .parser import EMPTY_VALUE, LEFT_PAREN, SEMICOLON, TAG, VALUE, NodeAllocator, SGFGrammar, unexpected_token_error
+from .exceptions import LexicalError, SGFError
+import typing
+
+
+class SGFDocument:
+    """
+    An SGF text and its tree, kept in sync through edits of the text without parsing the whole text again.
+
+    The document remembers where every node and variation of the tree is in the text. An edit is applied to the tree
+    by re-lexing and re-parsing the smallest region it can:
+        - an edit inside a run of nodes of one variation (e.g. inside the properties of a node) is parsed again in
+          place, the nodes of the run are updated and keep their identity,
+        - otherwise the innermost variation '(...)' containing the edit is parsed again and replaces the old one under
+          the same parent, falling back to the enclosing variations if the edit does not parse on its own,
+        - otherwise the whole text is parsed again.
+    Nodes outside the region keep their identity, and the tree is the same as a full parse of the new text.
+
+    If the new text cannot be parsed, edit() raises the error of the full parse and the document has no tree (root is
+    None) until an edit makes the text valid again.
+
+    Example:
+        document = SGFDocument('(;GM[1];B[pd];W[dd])')
+        node = document.root.get_child(0)
+        document.edit(13, 0, 'C[hello]')  # node is still the B[pd] node, now with a comment
+    """
+
+    def __init__(self, text: str, node_allocator: NodeAllocator = NodeAllocator()):
+        """
+        Args:
+            text (str): The SGF text.
+            node_allocator (NodeAllocator): Creates the nodes of the tree. Nodes supporting del node[tag] (SGFNode) are
+                updated in place by edits inside their properties.
+        """
+        self.node_allocator = node_allocator
+        self.text = text
+        self.root: typing.Optional[SGFNode] = None
+        # the region of the text parsed by the last edit, (start, end) in the new text
+        self.last_region: typing.Tuple[int, int] = (0, len(text))
+        self._parse_all()
+
+    def edit(self, offset: int, deleted: int = 0, inserted: str = '') -> typing.Optional[SGFNode]:
+        """
+        Replace the deleted characters at offset with the inserted text and update the tree. Returns the root, which
+        is a new node if the root itself had to be parsed again.
+        """
+        if offset < 0 or deleted < 0 or offset + deleted > len(self.text):
+            raise ValueError('The edit is outside of the text')
+        old_end = offset + deleted
+        self.text = self.text[:offset] + inserted + self.text[old_end:]
+        delta = len(inserted) - deleted
+        if self.root is not None:
+            if self._edit_sequence(offset, old_end, delta) or self._edit_variation(offset, old_end, delta):
+                return self.root
+        self._parse_all()
+        return self.root
+
+    def _parse_all(self):
+        self.root = None
+        self._nodes = []
+        self._starts = []  # position of the ';' of each node, the nodes are in the order of the text
+        self._ends = []  # end of the last property value of each node
+        self._opens = []  # position of the '(' of each variation, in the order of the text
+        self._closes = []  # position of the matching ')'
+        self._firsts = []  # first node of each variation
+        holder, records = self._build(0, False)
+        root = holder.get_child(0)
+        if root is not None:
+            root.detach()
+        self._nodes, self._starts, self._ends, self._opens, self._closes, self._firsts = records
+        self.root = root
+        self.last_region = (0, len(self.text))
+
+    def _build(self, start: int, region: bool) -> typing.Tuple[SGFNode, tuple]:
+        """
+        Parse the text from start under a holder node, recording the positions of the nodes and variations. If region
+        is True, the text at start is a variation and the parsing stops at its matching ')'.
+
+        This is the same state machine as SGFParser.parse_iterator() and raises the same errors.
+        """
+        text = self.text
+        allocate = self.node_allocator.allocate
+        nodes, starts, ends = [], [], []
+        opens, closes, firsts = [], [], []
+        holder = SGFNode()
+        current = holder
+        stack = []  # (node before '(', index of the variation)
+        cache_values = None
+        allowed = SGFGrammar[None]
+
+        for token_type, token_start, token_end in SGFLexer(text, start).tokenize():
+            if token_type not in allowed:
+                raise unexpected_token_error(text, token_type, token_start, token_end)
+            allowed = SGFGrammar[token_type]
+
+            if token_type is VALUE or token_type is EMPTY_VALUE:
+                if cache_values is None:
+                    cache_values = []
+                cache_values.append(text[token_start + 1:token_end - 1])
+                ends[-1] = token_end
+
+            elif token_type is TAG:
+                if cache_values is not None:
+                    current[cache_tag] = cache_values
+                    cache_values = None
+                cache_tag = text[token_start:token_end]
+
+            elif token_type is SEMICOLON:
+                if cache_values is not None:
+                    current[cache_tag] = cache_values
+                    cache_values = None
+                if current is holder and holder.child is not None:
+                    raise RuntimeError('Dummy node cannot have more than one child')
+                node = allocate()
+                current.add_child(node)
+                current = node
+                if firsts and firsts[-1] is None:
+                    firsts[-1] = node
+                nodes.append(node)
+                starts.append(token_start)
+                ends.append(token_end)
+
+            elif token_type is LEFT_PAREN:
+                stack.append((current, len(opens)))
+                opens.append(token_start)
+                closes.append(-1)
+                firsts.append(None)
+
+            else:  # RIGHT_PAREN
+                if len(stack) == 0:
+                    raise SGFError('Unmatched right parentheses', token_start, token_end, detail=True, sgf=text)
+                if cache_values is not None:
+                    current[cache_tag] = cache_values
+                    cache_values = None
+                current, variation = stack.pop()
+                closes[variation] = token_start
+                if region and len(stack) == 0:
+                    break
+
+        if len(stack) > 0:
+            last_left_paren = opens[stack[-1][1]]
+            raise SGFError('Unmatched left parentheses', last_left_paren, last_left_paren + 1, detail=True, sgf=text)
+
+        return holder, (nodes, starts, ends, opens, closes, firsts)
+
+    def _shift(self, node_index: int, variation_index: int, old_end: int, delta: int):
+        """
+        Move the recorded positions of the nodes and variations from node_index and variation_index on, and the
+        closing parentheses of the variations before variation_index that end after the edit.
+        """
+        if delta == 0:
+            return
+        self._starts[node_index:] = [position + delta for position in self._starts[node_index:]]
+        self._ends[node_index:] = [position + delta for position in self._ends[node_index:]]
+        self._opens[variation_index:] = [position + delta for position in self._opens[variation_index:]]
+        closes = self._closes
+        closes[:variation_index] = [position + delta if position >= old_end else position for position in closes[:variation_index]]
+        closes[variation_index:] = [position + delta for position in closes[variation_index:]]
+
+    def _edit_sequence(self, offset: int, old_end: int, delta: int) -> bool:
+        """
+        Apply an edit that stays inside a run of nodes of one variation, i.e. between the ';' of a node and the end of
+        the last value of a following node with no '(' or ')' in between. The nodes of the run are updated in place,
+        and nodes are added or removed at the end of the run if the edit changed their number.
+        """
+        starts = self._starts
+        ends = self._ends
+        i = bisect_left(starts, offset) - 1  # the last node starting before the edit
+        if i < 0:
+            return False
+        j = bisect_left(ends, old_end, i)  # the first node ending after it
+        if j == len(ends) or bisect_left(self._opens, starts[i]) != bisect_left(self._opens, ends[j]):
+            return False
+        old_nodes = self._nodes[i:j + 1]
+        if not hasattr(old_nodes[0], '__delitem__'):
+            return False
+        text = self.text
+        start = starts[i]
+        end = ends[j] + delta
+
+        # the new run must be complete nodes ending exactly where the old run did
+        new_starts = []
+        new_ends = []
+        new_properties = []
+        values = None
+        last_type = None
+        last_end = start
+        allowed = SGFGrammar[LEFT_PAREN]  # the run starts with ';'
+        try:
+            for token_type, token_start, token_end in SGFLexer(text, start).tokenize():
+                if token_start >= end:
+                    break
+                if token_end > end or token_type not in allowed:
+                    return False
+                allowed = SGFGrammar[token_type]
+                if token_type is SEMICOLON:
+                    if values is not None:
+                        properties.append((tag, values))
+                        values = None
+                    properties = []
+                    new_properties.append(properties)
+                    new_starts.append(token_start)
+                    new_ends.append(token_end)
+                elif token_type is TAG:
+                    if values is not None:
+                        properties.append((tag, values))
+                    tag = text[token_start:token_end]
+                    values = []
+                elif token_type is VALUE or token_type is EMPTY_VALUE:
+                    values.append(text[token_start + 1:token_end - 1])
+                    new_ends[-1] = token_end
+                else:
+                    return False
+                last_type = token_type
+                last_end = token_end
+        except LexicalError:
+            return False
+        if (last_type is not VALUE and last_type is not EMPTY_VALUE) or last_end != end:
+            return False
+        properties.append((tag, values))
+
+        nodes = old_nodes[:len(new_properties)]
+        for node, properties in zip(nodes, new_properties):
+            for old_tag in list(node.get_tags()):
+                del node[old_tag]
+            for tag, values in properties:
+                node[tag] = values
+        if len(new_properties) != len(old_nodes):
+            # move the children of the run to its new last node
+            children = list(old_nodes[-1].get_children_iter())
+            for child in children:
+                child.detach()
+            if len(nodes) < len(old_nodes):
+                old_nodes[len(nodes)].detach()
+            allocate = self.node_allocator.allocate
+            for properties in new_properties[len(nodes):]:
+                node = allocate()
+                for tag, values in properties:
+                    node[tag] = values
+                nodes[-1].add_child(node)
+                nodes.append(node)
+            for child in children:
+                nodes[-1].add_child(child)
+
+        self._shift(j + 1, bisect_left(self._opens, old_end), old_end, delta)
+        self._nodes[i:j + 1] = nodes
+        starts[i:j + 1] = new_starts
+        ends[i:j + 1] = new_ends
+        self.last_region = (start, end)
+        return True
+
+    def _edit_variation(self, offset: int, old_end: int, delta: int) -> bool:
+        """
+        Apply an edit by parsing again the innermost variation that contains it and parses on its own.
+        """
+        opens = self._opens
+        closes = self._closes
+        v = bisect_left(opens, offset) - 1  # the last variation opening before the edit
+        while v >= 0:
+            if closes[v] >= old_end and self._reparse_variation(v, old_end, delta):
+                return True
+            v -= 1
+        return False
+
+    def _reparse_variation(self, v: int, old_end: int, delta: int) -> bool:
+        start = self._opens[v]
+        old_close = self._closes[v]
+        try:
+            holder, records = self._build(start, True)
+        except (LexicalError, SGFError):
+            return False
+        nodes, starts, ends, opens, closes, firsts = records
+        if closes[0] != old_close + delta:
+            # the matching ')' moved, so the text around the variation does not parse the same way anymore
+            return False
+
+        # replace the first node of the variation, keeping its position among the children of its parent
+        old_first = self._firsts[v]
+        first = holder.get_child(0)
+        first.detach()
+        parent = old_first.get_parent()
+        if parent is None:
+            self.root = first
+        else:
+            siblings = list(parent.get_children_iter())
+            k = next(k for k, sibling in enumerate(siblings) if sibling is old_first)
+            for sibling in siblings[k:]:
+                sibling.detach()
+            parent.add_child(first)
+            for sibling in siblings[k + 1:]:
+                parent.add_child(sibling)
+
+        a = bisect_left(self._starts, start)
+        b = bisect_left(self._starts, old_close)
+        vb = bisect_right(self._opens, old_close)
+        self._shift(b, vb, old_end, delta)
+        self._nodes[a:b] = nodes
+        self._starts[a:b] = starts
+        self._ends[a:b] = ends
+        self._opens[v:vb] = opens
+        self._closes[v:vb] = closes
+        self._firsts[v:vb] = firsts
+        self.last_region = (start, closes[0] + 1)
+        return True
@@ -0,0 +1,211 @@
+"""
+Progress throttling, parse statistics and timing hooks.
+
+None of this costs anything per token unless it is enabled: the lexer checks a byte interval before calling the
+progress callback, ParseStats wraps the token stream only for the parsers it is given to, and the timing hooks are
+looked up once per parse or serialization.
+"""
+from .lexer import SGFTokenType
+import time
+import typing
+
+LEFT_PAREN = SGFTokenType.LEFT_PAREN
+RIGHT_PAREN = SGFTokenType.RIGHT_PAREN
+SEMICOLON = SGFTokenType.SEMICOLON
+# the parsers drop whitespace in the lexer, so it is not counted
+COUNTED_TOKEN_TYPES = tuple(token_type for token_type in SGFTokenType if token_type is not SGFTokenType.IGNORE)
+
+# hook(phase, seconds, size) for every timed phase: 'lex' and 'build' for parsing, 'serialize' for dumps()
+timing_hooks: typing.List[typing.Callable[[str, float, int], None]] = []
+
+
+def add_timing_hook(hook: typing.Callable[[str, float, int], None]):
+    """
+    Call hook(phase, seconds, size) after every timed phase, where size is the number of characters (or bytes) read
+    or written. The phases are 'lex' (time spent in the lexer) and 'build' (the rest of the parsing) for each parse,
+    and 'serialize' for each serializer.dumps() or to_sgf().
+    """
+    timing_hooks.append(hook)
+
+
+def remove_timing_hook(hook: typing.Callable[[str, float, int], None]):
+    timing_hooks.remove(hook)
+
+
+def report_timing(phase: str, seconds: float, size: int):
+    for hook in list(timing_hooks):
+        hook(phase, seconds, size)
+
+
+class ThrottledProgress:
+    """
+    A progress callback that forwards at most one call per min_interval seconds, and always the last one.
+
+    Combine it with the progress_interval of SGFParser or SGFLexer, which throttles by bytes without calling any
+    Python function in between.
+    """
+
+    def __init__(self, callback: typing.Callable[[int, int], None], min_interval: float = 0.1):
+        self.callback = callback
+        self.min_interval = min_interval
+        self.last_call = None
+
+    def __call__(self, index: int, length: int):
+        now = time.monotonic()
+        if index >= length or self.last_call is None or now - self.last_call >= self.min_interval:
+            self.last_call = now
+            self.callback(index, length)
+
+
+class ParseStats:
+    """
+    Counters of the inputs parsed by an SGFParser created with stats=ParseStats(). The counters add up over all
+    the parses, so one object can be used for a whole corpus.
+
+    tokens_by_type counts the tokens of every type but IGNORE (whitespace is skipped by the lexer). max_depth is the
+    depth of the deepest node (the root is at depth 0), max_variation_depth the deepest nesting of parentheses and
+    max_fan_out the largest number of children of a node.
+    """
+
+    def __init__(self):
+        self.tokens_by_type: typing.Dict[SGFTokenType, int] = dict.fromkeys(COUNTED_TOKEN_TYPES, 0)
+        self.parses = 0
+        self.nodes = 0
+        self.properties = 0
+        self.values = 0
+        self.max_depth = 0
+        self.max_variation_depth = 0
+        self.max_fan_out = 0
+        self.bytes = 0
+        self.seconds = 0.0
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.bytes / self.seconds if self.seconds > 0 else 0.0
+
+    def as_dict(self) -> dict:
+        """
+        The counters as a dict of numbers, e.g. to export them to a metrics system.
+        """
+        return {
+            'tokens_by_type': {token_type.name: count for token_type, count in self.tokens_by_type.items()},
+            'parses': self.parses,
+            'nodes': self.nodes,
+            'properties': self.properties,
+            'values': self.values,
+            'max_depth': self.max_depth,
+            'max_variation_depth': self.max_variation_depth,
+            'max_fan_out': self.max_fan_out,
+            'bytes': self.bytes,
+            'seconds': self.seconds,
+            'bytes_per_second': self.bytes_per_second,
+        }
+
+    def __repr__(self):
+        return (
+            f'ParseStats(nodes={self.nodes}, properties={self.properties}, values={self.values}, '
+            f'max_depth={self.max_depth}, max_fan_out={self.max_fan_out}, bytes={self.bytes}, '
+            f'bytes_per_second={self.bytes_per_second:.0f})'
+        )
+
+    def count(self, lexer, tokens: typing.Iterator[typing.Tuple[SGFTokenType, int, int]]) -> typing.Generator[typing.Tuple[SGFTokenType, int, int], None, None]:
+        """
+        Pass the tokens through while counting them. The bytes are taken from the lexer position at the end and the
+        time is the wall time from the first to the last token.
+        """
+        counts = dict.fromkeys(COUNTED_TOKEN_TYPES, 0)
+        start = lexer.index
+        started = time.perf_counter()
+        depth = -1  # depth of the last node
+        depths = []  # depth of the node before each open '('
+        fan_outs = []  # number of variations opened so far at each level of parentheses
+        max_depth = self.max_depth
+        max_fan_out = self.max_fan_out
+        previous = None
+        try:
+            for token in tokens:
+                token_type = token[0]
+                counts[token_type] += 1
+                if token_type is SEMICOLON:
+                    if previous is not LEFT_PAREN and depth >= 0:
+                        max_fan_out = max(max_fan_out, 1)  # a node following another node
+                    depth += 1
+                    if depth > max_depth:
+                        max_depth = depth
+                elif token_type is LEFT_PAREN:
+                    level = len(depths)
+                    if level == len(fan_outs):
+                        fan_outs.append(0)
+                    fan_outs[level] = fan_outs[level] + 1 if previous is RIGHT_PAREN else 1
+                    if level > 0 and fan_outs[level] > max_fan_out:
+                        max_fan_out = fan_outs[level]
+                    depths.append(depth)
+                    if len(depths) > self.max_variation_depth:
+                        self.max_variation_depth = len(depths)
+                elif token_type is RIGHT_PAREN and depths:
+                    depth = depths.pop()
+                previous = token_type
+                yield token
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.bytes += lexer.index - start
+            self.parses += 1
+            self.max_depth = max_depth
+            self.max_fan_out = max_fan_out
+            for token_type, count in counts.items():
+                self.tokens_by_type[token_type] += count
+            self.nodes += counts[SEMICOLON]
+            self.properties += counts[SGFTokenType.TAG]
+            self.values += counts[SGFTokenType.VALUE] + counts[SGFTokenType.EMPTY_VALUE]
+
+
+class PhaseTimer:
+    """
+    Measure the time spent in the lexer and in the rest of a parse, and report it to the timing hooks.
+    """
+
+    def __init__(self):
+        self.lexer = None
+        self.start = 0
+        self.lex_seconds = 0.0
+
+    def tokens(self, lexer, tokens: typing.Iterator[typing.Tuple[SGFTokenType, int, int]]) -> typing.Generator[typing.Tuple[SGFTokenType, int, int], None, None]:
+        """
+        Pass the tokens through, timing the lexer.
+        """
+        self.lexer = lexer
+        self.start = lexer.index
+        perf_counter = time.perf_counter
+        iterator = iter(tokens)
+        while True:
+            started = perf_counter()
+            try:
+                token = next(iterator)
+            except StopIteration:
+                self.lex_seconds += perf_counter() - started
+                return
+            self.lex_seconds += perf_counter() - started
+            yield token
+
+    def run(self, generator: typing.Iterator) -> typing.Generator:
+        """
+        Pass the items of a parser generator through, timing only the time spent inside it (not the time of the
+        caller between two items), and report the phases when it is done.
+        """
+        perf_counter = time.perf_counter
+        seconds = 0.0
+        try:
+            while True:
+                started = perf_counter()
+                try:
+                    item = next(generator)
+                except StopIteration:
+                    seconds += perf_counter() - started
+                    return
+                seconds += perf_counter() - started
+                yield item
+        finally:
+            if self.lexer is not None:
+                size = self.lexer.index - self.start
+                report_timing('lex', self.lex_seconds, size)
+                report_timing('build', max(0.0, seconds - self.lex_seconds), size)
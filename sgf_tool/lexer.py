@@ -1,6 +1,6 @@
 import enum
 import re
-from .exceptions import LexicalError
+from .exceptions import LexicalError, SGFError
 import typing
 
 
@@ -24,6 +24,22 @@ SGFTokenRules = [
     (SGFTokenType.IGNORE,      re.compile(r'\s+')),
 ]
 
+# All the rules combined into one alternation. Alternatives are tried in the same order as SGFTokenRules,
+# so the first alternative that matches at a position is the same rule the per-rule loop would pick.
+SGFTokenPattern = re.compile('|'.join(f'({pattern.pattern})' for _, pattern in SGFTokenRules))
+
+# the same pattern for bytes-like sources (bytes, bytearray, memoryview, mmap)
+SGFTokenBytesPattern = re.compile(SGFTokenPattern.pattern.encode('ascii'))
+
+# token type indexed by the group number (match.lastindex) of SGFTokenPattern
+SGFTokenGroupTypes = [None] + [token_type for token_type, _ in SGFTokenRules]
+
+# Skip the tokens of a variation up to the next parenthesis: tags, semicolons, whitespace and values are matched like
+# SGFTokenPattern does, without stopping at each of them. Group 1 is a '(' and group 2 a ')'; if neither matched, the
+# scan stopped at an invalid character or at the end of the input.
+SGFSkipPattern = re.compile(r'(?:[\w\s;]+|\[\]|\[[\S\s]*?[^\\]\])*(?:(\()|(\)))?')
+SGFSkipBytesPattern = re.compile(SGFSkipPattern.pattern.encode('ascii'))
+
 
 class SGFToken:
     def __init__(self, type: SGFTokenType, value: str, start: int, end: int):
@@ -34,27 +50,170 @@ class SGFToken:
 
 
 class SGFLexer:
-    def __init__(self, sgf: str, start: int = 0, progress_callback: typing.Optional[typing.Callable[[int, int], None]] = None):
+    def __init__(self, sgf: typing.Union[str, bytes], start: int = 0, progress_callback: typing.Optional[typing.Callable[[int, int], None]] = None, progress_interval: int = 0):
+        """
+        Args:
+            sgf (str | bytes): The input.
+            start (int): The position to start lexing from.
+            progress_callback (Callable[[int, int], None], optional): Called with (position, length) as tokens are read.
+            progress_interval (int): The minimum number of characters (or bytes) between two calls of progress_callback.
+                With 0, it is called for every token. The end of the input is always reported.
+        """
         self.sgf = sgf
         self.index = start
         self.length = len(sgf)
         self.progress_callback = progress_callback
+        self.progress_interval = progress_interval
+        self.next_report = start
+        # bytes-like sources are matched in place; token values are then bytes
+        self.pattern = SGFTokenPattern if isinstance(sgf, str) else SGFTokenBytesPattern
 
     def next_token(self):
         if self.index >= self.length:
             return None
 
-        for token_type, pattern in SGFTokenRules:
-            match = pattern.match(self.sgf, self.index)
-            if match:
-                value = match.group(0)
-                token = SGFToken(token_type, value, self.index, self.index + len(value))
-                self.index = token.end
+        match = self.pattern.match(self.sgf, self.index)
+        if match is None:
+            raise LexicalError('Invalid character', self.index, self.index + 1, detail=True, sgf=self.sgf)
+
+        end = match.end()
+        token = SGFToken(SGFTokenGroupTypes[match.lastindex], match.group(), self.index, end)
+        self.index = end
+
+        # track progress
+        if self.progress_callback and (self.index >= self.next_report or self.index >= self.length):
+            self.progress_callback(self.index, self.length)
+            self.next_report = self.index + self.progress_interval
+
+        return token
+
+    def tokenize(self, skip_ignore: bool = True, main_line: bool = False) -> typing.Generator[typing.Tuple[SGFTokenType, int, int], None, None]:
+        """
+        Generate the remaining tokens as compact (type, start, end) tuples.
+
+        This produces the same token stream as calling next_token() repeatedly, but without creating an SGFToken
+        for every token. If skip_ignore is True, IGNORE tokens (whitespace) are dropped without creating anything.
+        The lexer index is advanced as the tokens are consumed.
+
+        If main_line is True, the second and later variations of every node are skipped: a '(' that follows a ')'
+        inside a game is scanned up to its matching ')' and none of their tokens are generated. The skipped text is
+        only checked for invalid characters and unmatched parentheses, not against the grammar.
+
+        The progress callback is called for the tokens ending at least progress_interval characters after the last
+        report, and once more at the end of the input if it was not reported yet.
+        """
+        if main_line:
+            yield from self._tokenize_main_line(skip_ignore)
+            return
+
+        sgf = self.sgf
+        length = self.length
+        progress_callback = self.progress_callback
+        progress_interval = self.progress_interval
+        next_report = self.next_report
+        group_types = SGFTokenGroupTypes
+        ignore = SGFTokenType.IGNORE
+        scanner = self.pattern.scanner(sgf, self.index)
+        match_next = scanner.match
+        reported = self.index
+
+        while True:
+            match = match_next()
+            if match is None:
+                break
+            token_type = group_types[match.lastindex]
+            start, end = match.span()
+            self.index = end
+            if token_type is ignore and skip_ignore:
+                continue
+            if progress_callback and end >= next_report:
+                progress_callback(end, length)
+                reported = end
+                next_report = end + progress_interval
+            yield token_type, start, end
+
+        if self.index < length:
+            raise LexicalError('Invalid character', self.index, self.index + 1, detail=True, sgf=sgf)
+
+        # report the skipped trailing whitespace, if any, so that the progress always ends at the full length
+        if progress_callback and reported != self.index:
+            progress_callback(self.index, length)
+
+    def _tokenize_main_line(self, skip_ignore: bool) -> typing.Generator[typing.Tuple[SGFTokenType, int, int], None, None]:
+        """
+        tokenize() with the variations after the first one skipped.
+        """
+        sgf = self.sgf
+        length = self.length
+        progress_callback = self.progress_callback
+        progress_interval = self.progress_interval
+        next_report = self.next_report
+        group_types = SGFTokenGroupTypes
+        ignore = SGFTokenType.IGNORE
+        left_paren = SGFTokenType.LEFT_PAREN
+        right_paren = SGFTokenType.RIGHT_PAREN
+        skip_pattern = SGFSkipPattern if isinstance(sgf, str) else SGFSkipBytesPattern
+        scanner = self.pattern.scanner(sgf, self.index)
+        match_next = scanner.match
+        reported = self.index
+        depth = 0  # number of open parentheses
+        previous = None  # the last token that is not IGNORE
+
+        while True:
+            match = match_next()
+            if match is None:
+                break
+            token_type = group_types[match.lastindex]
+            start, end = match.span()
+            self.index = end
+            if token_type is ignore:
+                if skip_ignore:
+                    continue
+            elif token_type is left_paren:
+                if previous is right_paren and depth > 0:
+                    # a second or later variation: jump after its matching ')' and go on from there
+                    end = self._skip_variation(skip_pattern, start)
+                    scanner = self.pattern.scanner(sgf, end)
+                    match_next = scanner.match
+                    self.index = end
+                    if progress_callback and end >= next_report:
+                        progress_callback(end, length)
+                        reported = end
+                        next_report = end + progress_interval
+                    continue
+                depth += 1
+            elif token_type is right_paren:
+                depth -= 1
+            previous = token_type
+            if progress_callback and end >= next_report:
+                progress_callback(end, length)
+                reported = end
+                next_report = end + progress_interval
+            yield token_type, start, end
 
-                # track progress
-                if self.progress_callback:
-                    self.progress_callback(self.index, self.length)
+        if self.index < length:
+            raise LexicalError('Invalid character', self.index, self.index + 1, detail=True, sgf=sgf)
 
-                return token
+        if progress_callback and reported != self.index:
+            progress_callback(self.index, length)
 
-        raise LexicalError('Invalid character', self.index, self.index + 1, detail=True, sgf=self.sgf)
+    def _skip_variation(self, skip_pattern, start: int) -> int:
+        """
+        The end of the ')' matching the '(' at start.
+        """
+        sgf = self.sgf
+        opens = [start]  # the unmatched '(' of the variation
+        index = start + 1
+        while True:
+            match = skip_pattern.match(sgf, index)
+            index = match.end()
+            if match.lastindex == 1:
+                opens.append(index - 1)
+            elif match.lastindex == 2:
+                opens.pop()
+                if not opens:
+                    return index
+            elif index < self.length:
+                raise LexicalError('Invalid character', index, index + 1, detail=True, sgf=sgf)
+            else:
+                raise SGFError('Unmatched left parentheses', opens[-1], opens[-1] + 1, detail=True, sgf=sgf)
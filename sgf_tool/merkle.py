@@ -0,0 +1,169 @@
+"""
+Merkle hashes of subtrees: a content hash of every node that covers its properties and, recursively, its children.
+
+Two subtrees have the same hash if and only if (barring hash collisions) they have the same properties in every node
+and the same children in the same order; the order of the tags of a node does not matter. The hashes are stable
+across runs and machines, so they can be stored to find duplicate games in a corpus.
+
+SGFNode caches its hash; __setitem__, __delitem__, add_child and detach reset the cache of the node and of its
+ancestors, so after a change only the path to the root is hashed again. Other node types are hashed without cache.
+"""
+from .node import BaseSGFNode, SGFNode
+import hashlib
+import struct
+import typing
+
+DIGEST_SIZE = 16
+
+
+def node_content(node: BaseSGFNode) -> bytes:
+    """
+    An unambiguous encoding of the properties of a node alone, with the tags sorted.
+    """
+    parts = []
+    for tag in sorted(node.get_tags()):
+        values = node[tag]
+        parts.append(f'{len(tag)}:{tag}{len(values)}')
+        for value in values:
+            parts.append(f'{len(value)}:{value}')
+    return ''.join(parts).encode('utf-8', 'surrogatepass')
+
+
+def _hash_subtrees(root: BaseSGFNode, memo: typing.Dict[BaseSGFNode, bytes]) -> bytes:
+    """
+    Hash the subtree of root bottom-up with an explicit stack. The hashes of SGFNodes are cached on them, the
+    others are kept in memo.
+    """
+    def cached(node):
+        if isinstance(node, SGFNode):
+            return node._subtree_hash
+        return memo.get(node)
+
+    result = cached(root)
+    if result is not None:
+        return result
+
+    stack = [(root, False)]
+    while stack:
+        node, children_done = stack.pop()
+        if not children_done:
+            if cached(node) is None:
+                stack.append((node, True))
+                for child in node.get_children_iter():
+                    if cached(child) is None:
+                        stack.append((child, False))
+            continue
+
+        content = node_content(node)
+        digest = hashlib.blake2b(struct.pack('<II', len(content), node.get_num_children()), digest_size=DIGEST_SIZE)
+        digest.update(content)
+        for child in node.get_children_iter():
+            digest.update(cached(child))
+        value = digest.digest()
+        if isinstance(node, SGFNode):
+            node._subtree_hash = value
+        else:
+            memo[node] = value
+    return cached(root)
+
+
+def subtree_hash(node: BaseSGFNode) -> bytes:
+    """
+    The hash of the node and its subtree. Only the nodes changed since the last call (and their ancestors) are
+    hashed again, so the hash of an unchanged SGFNode tree is returned in O(1).
+    """
+    return _hash_subtrees(node, {})
+
+
+def same_subtree(node: BaseSGFNode, other: BaseSGFNode) -> bool:
+    """
+    Whether two subtrees have the same content, by comparing their hashes.
+    """
+    memo = {}
+    return _hash_subtrees(node, memo) == _hash_subtrees(other, memo)
+
+
+def unique_trees(roots: typing.Iterable[BaseSGFNode]) -> typing.Generator[BaseSGFNode, None, None]:
+    """
+    Generate the trees whose content was not seen before, e.g. to drop duplicate games from a corpus.
+    """
+    seen = set()
+    memo = {}
+    for root in roots:
+        value = _hash_subtrees(root, memo)
+        if value not in seen:
+            seen.add(value)
+            yield root
+
+
+def group_duplicates(roots: typing.Iterable[BaseSGFNode]) -> typing.List[typing.List[BaseSGFNode]]:
+    """
+    The groups of trees with the same content, for the contents found more than once, in the order of their first
+    tree.
+    """
+    groups: typing.Dict[bytes, typing.List[BaseSGFNode]] = {}
+    memo = {}
+    for root in roots:
+        groups.setdefault(_hash_subtrees(root, memo), []).append(root)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+class TreeDifference(typing.NamedTuple):
+    """
+    A difference between two trees found by diff_trees().
+
+    kind is 'changed' (the properties of the node differ), 'removed' (a subtree only in the old tree), 'added' (a
+    subtree only in the new tree) or 'moved' (an identical subtree at another child index). The paths are the child
+    indices from the roots, None for the side where the node does not exist.
+    """
+    kind: str
+    old_path: typing.Optional[typing.Tuple[int, ...]]
+    new_path: typing.Optional[typing.Tuple[int, ...]]
+    old: typing.Optional[BaseSGFNode]
+    new: typing.Optional[BaseSGFNode]
+
+
+def diff_trees(old: BaseSGFNode, new: BaseSGFNode) -> typing.List[TreeDifference]:
+    """
+    The differences between two trees, from the roots down. Identical subtrees are recognized by their hash and
+    skipped without being walked.
+
+    The children of two matching nodes are paired first with an identical child, wherever it is, and then in order;
+    the children left over are removed or added.
+    """
+    memo = {}
+    differences = []
+    stack = [(old, new, (), ())]
+    while stack:
+        old_node, new_node, old_path, new_path = stack.pop()
+        if _hash_subtrees(old_node, memo) == _hash_subtrees(new_node, memo):
+            continue
+        if node_content(old_node) != node_content(new_node):
+            differences.append(TreeDifference('changed', old_path, new_path, old_node, new_node))
+
+        old_children = list(old_node.get_children_iter())
+        new_children = list(new_node.get_children_iter())
+        available: typing.Dict[bytes, typing.List[int]] = {}
+        for index in reversed(range(len(new_children))):
+            available.setdefault(_hash_subtrees(new_children[index], memo), []).append(index)
+        old_left = []
+        new_matched = set()
+        for index, child in enumerate(old_children):
+            indices = available.get(_hash_subtrees(child, memo))
+            if indices:
+                new_index = indices.pop()
+                new_matched.add(new_index)
+                if new_index != index:
+                    differences.append(TreeDifference('moved', old_path + (index,), new_path + (new_index,), child, new_children[new_index]))
+            else:
+                old_left.append(index)
+        new_left = [index for index in range(len(new_children)) if index not in new_matched]
+
+        pairs = list(zip(old_left, new_left))
+        for index in old_left[len(pairs):]:
+            differences.append(TreeDifference('removed', old_path + (index,), None, old_children[index], None))
+        for index in new_left[len(pairs):]:
+            differences.append(TreeDifference('added', None, new_path + (index,), None, new_children[index]))
+        for old_index, new_index in reversed(pairs):
+            stack.append((old_children[old_index], new_children[new_index], old_path + (old_index,), new_path + (new_index,)))
+    return differences
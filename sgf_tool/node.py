@@ -1,9 +1,12 @@
 import abc
 from collections import OrderedDict
+from . import serializer
 import typing
 
 
 class BaseSGFNode(abc.ABC):
+    __slots__ = ()
+
     @abc.abstractmethod
     def __setitem__(self, key, value):
         pass
@@ -82,21 +85,119 @@ class BaseSGFNode(abc.ABC):
             yield self.get_child(i)
 
 
+class SGFSource:
+    """
+    The buffer a tree was parsed from, shared by all the LazyValues of that tree.
+
+    If encoding is None, the buffer is a str and values are plain slices of it. Otherwise the buffer is a bytes-like
+    object (bytes, memoryview, mmap, ...) and values are decoded with the encoding when they are accessed.
+    """
+    __slots__ = ('buffer', 'encoding', 'errors')
+
+    def __init__(self, buffer, encoding: typing.Optional[str] = None, errors: str = 'strict'):
+        self.buffer = buffer
+        self.encoding = encoding
+        self.errors = errors
+
+
+class LazyValues:
+    """
+    Property values that are not extracted from the source yet.
+
+    The values are stored as a flat list of offsets [start0, end0, start1, end1, ...] into the source buffer. The
+    parsers only defer the properties with a value longer than EAGER_VALUE_LENGTH, for str and bytes-like inputs
+    alike; shorter values are extracted (and decoded) while parsing, see source_values().
+    """
+    __slots__ = ('source', 'spans')
+
+    def __init__(self, source: SGFSource, spans: typing.List[int]):
+        self.source = source
+        self.spans = spans
+
+    def __len__(self):
+        return len(self.spans) // 2
+
+    def materialize(self) -> typing.List[str]:
+        """
+        Extract (and decode if needed) the values.
+        """
+        return extract_values(self.source, self.spans)
+
+
+# values up to this length take less memory as strings than as LazyValues (an object, a list and two offsets), so
+# they are not deferred
+EAGER_VALUE_LENGTH = 64
+
+
+def extract_values(source: SGFSource, spans: typing.List[int]) -> typing.List[str]:
+    """
+    Extract (and decode if needed) the values at the offsets [start0, end0, start1, end1, ...] of the source.
+    """
+    buffer = source.buffer
+    encoding = source.encoding
+    if encoding is None:
+        return [buffer[spans[i]:spans[i + 1]] for i in range(0, len(spans), 2)]
+    errors = source.errors
+    return [str(buffer[spans[i]:spans[i + 1]], encoding, errors) for i in range(0, len(spans), 2)]
+
+
+def source_values(source: SGFSource, spans: typing.List[int]) -> typing.Union[typing.List[str], LazyValues]:
+    """
+    The values at spans to store in a node: LazyValues if one of them is longer than EAGER_VALUE_LENGTH, otherwise
+    the values themselves, e.g. for the coordinates of the moves.
+    """
+    for i in range(0, len(spans), 2):
+        if spans[i + 1] - spans[i] > EAGER_VALUE_LENGTH:
+            return LazyValues(source, spans)
+    return extract_values(source, spans)
+
+
 class SGFNode(BaseSGFNode):
+    # list of the children, built by get_child() on demand and kept up to date by add_child and detach
+    _children: typing.Optional[typing.List['SGFNode']] = None
+    # the PropertyIndex the node belongs to, kept up to date by __setitem__, add_child and detach
+    property_index = None
+    # the hash of the subtree computed by merkle.subtree_hash(), reset on the node and its ancestors by the changes
+    _subtree_hash: typing.Optional[bytes] = None
+
     def __init__(self):
         self.parent: typing.Optional[SGFNode] = None
         self.child: typing.Optional[SGFNode] = None
+        self.last_child: typing.Optional[SGFNode] = None
         self.next_sibling: typing.Optional[SGFNode] = None
+        self.prev_sibling: typing.Optional[SGFNode] = None
         self.num_children: int = 0
-        self.properties: OrderedDict[str, list[str]] = OrderedDict()
+        # values may be LazyValues until they are accessed through __getitem__
+        self.properties: OrderedDict[str, typing.Union[list[str], LazyValues]] = OrderedDict()
 
     def __setitem__(self, key, value):
-        if not hasattr(value, '__iter__') or isinstance(value, str):
-            raise ValueError('Value must be an iterable object other than str.')
-        self.properties[key] = list(value)
+        if type(value) is not LazyValues:  # lazy values are extracted from the source when they are first accessed
+            if not hasattr(value, '__iter__') or isinstance(value, str):
+                raise ValueError('Value must be an iterable object other than str.')
+            value = list(value)
+        index = self.property_index
+        if index is not None:
+            index.remove(self, key)
+            self.properties[key] = value
+            index.add(self, key)
+        else:
+            self.properties[key] = value
+        if self._subtree_hash is not None:
+            self._invalidate_hash()
+
+    def __delitem__(self, key):
+        index = self.property_index
+        if index is not None:
+            index.remove(self, key)
+        del self.properties[key]
+        if self._subtree_hash is not None:
+            self._invalidate_hash()
 
     def __getitem__(self, key):
-        return self.properties[key]
+        value = self.properties[key]
+        if type(value) is LazyValues:
+            value = self.properties[key] = value.materialize()
+        return value
 
     def __contains__(self, key):
         return key in self.properties
@@ -104,20 +205,13 @@ class SGFNode(BaseSGFNode):
     def __str__(self):
         result = ';'
         for key, value in self.properties.items():
+            if type(value) is LazyValues:
+                value = value.materialize()  # without keeping the values, a tree may be written only once
             result += f'{key}[{"][".join(value)}]'
         return result
 
     def to_sgf(self):
-        result = str(self)
-        if self.child:
-            result += self.child.to_sgf()
-        if self.next_sibling:
-            if self.next_sibling.next_sibling:
-                result = '(' + result + ')' + self.next_sibling.to_sgf()
-            else:
-                # Since the last sibling cannot be checked if it has siblings, we need to check it here
-                result = '(' + result + ')(' + self.next_sibling.to_sgf() + ')'
-        return result
+        return serializer.dumps(self)
 
     def get_tags(self):
         return self.properties.keys()
@@ -126,42 +220,75 @@ class SGFNode(BaseSGFNode):
         return self.parent
 
     def get_child(self, index):
-        ptr = self.child
-        for _ in range(index):
-            if ptr is None:
-                return None
-            ptr = ptr.next_sibling
-        return ptr
+        if index <= 0:
+            return self.child
+        if index >= self.num_children:
+            return None
+        children = self._children
+        if children is None:
+            children = self._children = list(self.get_children_iter())
+        return children[index]
 
     def get_num_children(self):
         return self.num_children
 
     def add_child(self, child):
         child.detach()
+        if self.property_index is not child.property_index:
+            if child.property_index is not None:
+                child.property_index.remove_subtree(child)
+            if self.property_index is not None:
+                self.property_index.add_subtree(child)
         if self.child is None:
             self.child = child
         else:
-            ptr = self.child
-            while ptr.next_sibling:
-                ptr = ptr.next_sibling
-            ptr.next_sibling = child
+            self.last_child.next_sibling = child
+            child.prev_sibling = self.last_child
+        self.last_child = child
+        if self._children is not None:
+            self._children.append(child)
         child.parent = self
         self.num_children += 1
+        if self._subtree_hash is not None:
+            self._invalidate_hash()
 
     def detach(self):
-        if self.parent:
-            if self.parent.child == self:
-                self.parent.child = self.next_sibling
+        parent = self.parent
+        if parent:
+            if self.prev_sibling is None:
+                parent.child = self.next_sibling
+            else:
+                self.prev_sibling.next_sibling = self.next_sibling
+            if self.next_sibling is None:
+                parent.last_child = self.prev_sibling
             else:
-                ptr = self.parent.child
-                while ptr.next_sibling != self:
-                    ptr = ptr.next_sibling
-                ptr.next_sibling = self.next_sibling
-            self.parent.num_children -= 1
+                self.next_sibling.prev_sibling = self.prev_sibling
+            children = parent._children
+            if children is not None:
+                # keep the list in sync instead of building it again on the next get_child()
+                if self.next_sibling is None:
+                    children.pop()
+                elif self.prev_sibling is None:
+                    del children[0]
+                else:
+                    children.remove(self)
+            parent.num_children -= 1
+            if parent._subtree_hash is not None:
+                parent._invalidate_hash()
             self.parent = None
             self.next_sibling = None
+            self.prev_sibling = None
+            if self.property_index is not None:
+                self.property_index.remove_subtree(self)
         return self
 
+    def _invalidate_hash(self):
+        # the ancestors of a node with a hash have one too, and the nodes without a hash have no hashed ancestors
+        node = self
+        while node is not None and node._subtree_hash is not None:
+            node._subtree_hash = None
+            node = node.parent
+
     def get_children_iter(self):
         ptr = self.child
         while ptr:
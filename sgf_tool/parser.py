@@ -1,8 +1,186 @@
-from .lexer import SGFLexer, SGFToken, SGFTokenType
-from .node import SGFNode
-from .exceptions import SGFError
+from .lexer import SGFLexer, SGFTokenType
+from .node import SGFNode, SGFSource, source_values
+from .property_index import PropertyIndex
+from .exceptions import LexicalError, SGFError, source_text
+from .instrumentation import ParseStats, PhaseTimer, timing_hooks
+import codecs
+import mmap
 import typing
 
+if typing.TYPE_CHECKING:
+    from .recovery import SGFDiagnostic
+
+
+LEFT_PAREN = SGFTokenType.LEFT_PAREN
+RIGHT_PAREN = SGFTokenType.RIGHT_PAREN
+SEMICOLON = SGFTokenType.SEMICOLON
+TAG = SGFTokenType.TAG
+EMPTY_VALUE = SGFTokenType.EMPTY_VALUE
+VALUE = SGFTokenType.VALUE
+
+# the token types allowed after a token of the given type (None is the beginning of the input)
+SGFGrammar = {
+    None:        frozenset([LEFT_PAREN]),
+    LEFT_PAREN:  frozenset([SEMICOLON]),
+    RIGHT_PAREN: frozenset([LEFT_PAREN, RIGHT_PAREN]),
+    SEMICOLON:   frozenset([TAG]),
+    TAG:         frozenset([VALUE, EMPTY_VALUE]),
+    EMPTY_VALUE: frozenset([LEFT_PAREN, RIGHT_PAREN, SEMICOLON, TAG, VALUE, EMPTY_VALUE]),
+    VALUE:       frozenset([LEFT_PAREN, RIGHT_PAREN, SEMICOLON, TAG, VALUE, EMPTY_VALUE]),
+}
+
+
+def unexpected_token_error(sgf: str, token_type: SGFTokenType, start: int, end: int) -> SGFError:
+    """
+    Create the error for a token that is not allowed by SGFGrammar at its position.
+    """
+    if token_type is LEFT_PAREN:
+        message = 'Unexpected left parentheses'
+    elif token_type is RIGHT_PAREN:
+        message = 'Unexpected right parentheses'
+    elif token_type is SEMICOLON:
+        message = 'Unexpected semicolon'
+    elif token_type is TAG:
+        message = f'Unexpected tag {source_text(sgf, start, end)}'
+    elif token_type is VALUE or token_type is EMPTY_VALUE:
+        message = f'Unexpected value {source_text(sgf, start, end)}'
+    else:
+        message = f'Invalid token {source_text(sgf, start, end)}'
+    return SGFError(message, start, end, detail=True, sgf=sgf)
+
+
+def find_charset(sgf: bytes, start: int = 0) -> typing.Optional[str]:
+    """
+    Find the value of the CA[] property of the first root node, without parsing the rest of the input.
+
+    Returns None if the root node has no CA[] property or the input cannot be lexed.
+    """
+    found_root = False
+    tag = None
+    try:
+        for token_type, token_start, token_end in SGFLexer(sgf, start).tokenize():
+            if token_type is SEMICOLON:
+                if found_root:
+                    break
+                found_root = True
+            elif token_type is TAG:
+                tag = sgf[token_start:token_end]
+            elif token_type is VALUE:
+                if found_root and tag == b'CA':
+                    return str(sgf[token_start + 1:token_end - 1], 'ascii', 'replace').strip()
+            elif token_type is not LEFT_PAREN and token_type is not EMPTY_VALUE:
+                break
+    except LexicalError:
+        pass
+    return None
+
+
+def bytes_source(sgf: bytes, start: int = 0, encoding: typing.Optional[str] = None, default_encoding: str = 'iso-8859-1', errors: str = 'strict') -> SGFSource:
+    """
+    Create the source of a bytes-like input, using the CA[] property of the root node if no encoding is given.
+    """
+    if encoding is None:
+        encoding = find_charset(sgf, start)
+    return SGFSource(sgf, resolve_encoding(encoding, default_encoding), errors)
+
+
+def resolve_encoding(encoding: typing.Optional[str], default_encoding: str = 'iso-8859-1') -> str:
+    """
+    The normalized name of the encoding, or default_encoding if it is None or unknown.
+    """
+    if encoding is not None:
+        try:
+            return codecs.lookup(encoding).name
+        except LookupError:
+            pass
+    return default_encoding
+
+
+def scan_headers(sgf: typing.Union[str, bytes], tags: typing.Optional[typing.Iterable[str]] = None, start: int = 0, encoding: typing.Optional[str] = None, default_encoding: str = 'iso-8859-1', errors: str = 'strict') -> typing.Optional[typing.Dict[str, typing.List[str]]]:
+    """
+    Read the properties of the root node of the first game as {tag: values}, without reading the rest of the input.
+
+    The input is only lexed up to the token that follows the root node, so the time does not depend on the size of
+    the game. Values are the raw (still escaped) strings, as stored by SGFParser; a repeated tag keeps its last
+    values like in a parsed tree. Errors after the root node are not detected.
+
+    Args:
+        sgf (str | bytes): The input; a bytes-like input is decoded with the encoding of its CA[] property unless
+            encoding is given, see SGFParser.parse_bytes().
+        tags (Iterable[str], optional): If given, only these tags are returned and the other values are skipped
+            without being sliced or decoded.
+        start (int): The position to start from.
+
+    Returns:
+        The properties of the root node, or None if the input has no game.
+    """
+    text = isinstance(sgf, str)
+    if tags is not None:
+        tags = frozenset(tags)
+    spans = {}  # tag: [start, end, start, end, ...] of its values
+    tag = None
+    values = None
+    charset = None
+    found_root = False
+    allowed = SGFGrammar[None]
+
+    for token_type, token_start, token_end in SGFLexer(sgf, start).tokenize():
+        if token_type not in allowed:
+            raise unexpected_token_error(sgf, token_type, token_start, token_end)
+        allowed = SGFGrammar[token_type]
+
+        if token_type is VALUE or token_type is EMPTY_VALUE:
+            if values is not None:
+                values.append(token_start + 1)
+                values.append(token_end - 1)
+            if charset is None and tag == 'CA':
+                charset = sgf[token_start + 1:token_end - 1]
+        elif token_type is TAG:
+            tag = sgf[token_start:token_end] if text else str(sgf[token_start:token_end], 'ascii')
+            if tags is None or tag in tags:
+                values = spans[tag] = []
+            else:
+                values = None
+        elif token_type is SEMICOLON:
+            if found_root:
+                break
+            found_root = True
+        elif token_type is RIGHT_PAREN or found_root:
+            break
+
+    if not found_root:
+        return None
+    if text:
+        return {tag: [sgf[values[i]:values[i + 1]] for i in range(0, len(values), 2)] for tag, values in spans.items()}
+    if encoding is None and charset is not None:
+        encoding = str(charset, 'ascii', 'replace').strip()
+    encoding = resolve_encoding(encoding, default_encoding)
+    return {tag: [str(sgf[values[i]:values[i + 1]], encoding, errors) for i in range(0, len(values), 2)] for tag, values in spans.items()}
+
+
+def scan_headers_file(path, tags: typing.Optional[typing.Iterable[str]] = None, encoding: typing.Optional[str] = None, default_encoding: str = 'iso-8859-1', errors: str = 'strict') -> typing.Optional[typing.Dict[str, typing.List[str]]]:
+    """
+    Read the properties of the root node of the first game of a file through a read-only memory map. See
+    scan_headers().
+    """
+    return scan_headers(map_file(path), tags, 0, encoding, default_encoding, errors)
+
+
+def map_file(path) -> typing.Union[mmap.mmap, bytes]:
+    """
+    Map a file read-only into memory. The map stays valid after the file is closed and is released with the last
+    reference to it (e.g. the lazy values of a parsed tree).
+    """
+    with open(path, 'rb') as f:
+        try:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # an empty file cannot be mapped
+            return b''
+
+
+_SKIPPED = []
+
 
 class NodeAllocator:
     def allocate(self) -> SGFNode:
@@ -20,10 +198,33 @@ class SGFParser:
         def add_child(self, child):
             if self.child is not None:
                 raise RuntimeError('Dummy node cannot have more than one child')
-            self.child = child
-
-    def __init__(self, node_allocator: NodeAllocator = NodeAllocator()):
+            self.child = self.last_child = child
+
+    def __init__(self, node_allocator: NodeAllocator = NodeAllocator(), lazy_values: bool = False, property_index: typing.Union[bool, typing.Iterable[str]] = False, progress_interval: int = 0, stats: typing.Optional[ParseStats] = None, projection: typing.Optional[typing.Iterable[str]] = None, main_line: bool = False):
+        """
+        Args:
+            node_allocator (NodeAllocator): Creates the nodes of the parsed trees.
+            lazy_values (bool): If True, property values of a str input are kept as offsets into the input and only
+                sliced out when they are accessed through node[tag]. Bytes-like inputs always use lazy values. Short
+                values such as moves are still extracted right away, which takes less memory than their offsets.
+            property_index (bool | Iterable[str]): If True, a PropertyIndex of all the tags is attached to every
+                parsed tree; if a collection of tags is given, only those tags are indexed. Requires SGFNode trees.
+            progress_interval (int): The minimum number of characters (or bytes) between two calls of the
+                progress_callback of a parse. With 0, it is called for every token.
+            stats (ParseStats, optional): Counters updated by every parse (tokens by type, nodes, depth, ...).
+            projection (Iterable[str], optional): If given, only the properties with these tags are kept. The values
+                of the other properties are skipped without being sliced or decoded; the tree keeps all its nodes.
+            main_line (bool): If True, only the main line of every game is parsed: the second and later variations
+                of a node are skipped by the lexer without creating their nodes, so the tree is the chain of first
+                children of the full tree. The skipped text is not checked against the grammar.
+        """
         self.node_allocator = node_allocator
+        self.lazy_values = lazy_values
+        self.property_index = property_index
+        self.progress_interval = progress_interval
+        self.stats = stats
+        self.projection = frozenset(projection) if projection is not None else None
+        self.main_line = main_line
 
     def parse(self, sgf: str, start: int = 0, progress_callback: typing.Optional[typing.Callable[[int, int], None]] = None) -> typing.Optional[SGFNode]:
         iterator = self.parse_iterator(sgf, start, progress_callback)
@@ -32,145 +233,207 @@ class SGFParser:
             pass
         return root
 
-    def parse_iterator(self, sgf: str, start: int = 0, progress_callback: typing.Optional[typing.Callable[[int, int], None]] = None) -> typing.Generator[SGFNode, None, None]:
-        lexer = SGFLexer(sgf, start, progress_callback)
+    def parse_bytes(self, sgf: bytes, start: int = 0, progress_callback: typing.Optional[typing.Callable[[int, int], None]] = None, encoding: typing.Optional[str] = None, default_encoding: str = 'iso-8859-1', errors: str = 'strict') -> typing.Optional[SGFNode]:
+        """
+        Parse a bytes-like object (bytes, bytearray, memoryview, mmap, ...) without copying or decoding it up front.
+
+        Property values are kept as offsets into the buffer and decoded only when they are accessed, so the buffer is
+        referenced by the returned tree. Properties whose values are all at most node.EAGER_VALUE_LENGTH (64) bytes
+        long, such as moves, are decoded right away instead: as strings they take less memory than their offsets.
+        The encoding is taken from the CA[] property of the root node unless given explicitly; default_encoding
+        (ISO-8859-1 as specified by FF[4]) is used when CA[] is missing or unknown.
+        """
+        source = bytes_source(sgf, start, encoding, default_encoding, errors)
+        iterator = self.parse_iterator(sgf, start, progress_callback, source)
+        root = next(iterator, None)
+        for _ in iterator:
+            pass
+        return root
+
+    def parse_file(self, path, progress_callback: typing.Optional[typing.Callable[[int, int], None]] = None, encoding: typing.Optional[str] = None, default_encoding: str = 'iso-8859-1', errors: str = 'strict') -> typing.Optional[SGFNode]:
+        """
+        Parse an SGF file through a read-only memory map. See parse_bytes() for the handling of the encoding.
+        """
+        return self.parse_bytes(map_file(path), 0, progress_callback, encoding, default_encoding, errors)
+
+    def parse_tolerant(self, sgf: typing.Union[str, bytes], start: int = 0, encoding: typing.Optional[str] = None, default_encoding: str = 'iso-8859-1', errors: str = 'strict') -> typing.Tuple[typing.Optional[SGFNode], typing.List['SGFDiagnostic']]:
+        """
+        Parse the first game of a possibly malformed input without raising, and return (root, diagnostics).
+
+        Invalid characters and tokens that do not fit the grammar are skipped, a ']' left unescaped in a value is
+        kept in it, and missing parentheses are assumed, so the tree holds everything that could be read. The
+        diagnostics are (code, start, end) tuples, see recovery.SGFDiagnostic; they are empty for a valid input,
+        which gives the same tree as parse() (or parse_bytes() for a bytes-like input).
+
+        Recovering costs no more than parsing, so a damaged input takes about as long as a valid one. The
+        progress_interval, stats and main_line options do not apply.
+        """
+        from .recovery import parse_tolerant
+
+        source = self._default_source(sgf, start) if isinstance(sgf, str) else bytes_source(sgf, start, encoding, default_encoding, errors)
+        return parse_tolerant(self, sgf, start, source)
+
+    def parse_iterator(self, sgf: str, start: int = 0, progress_callback: typing.Optional[typing.Callable[[int, int], None]] = None, source: typing.Optional[SGFSource] = None) -> typing.Generator[SGFNode, None, None]:
+        if source is None:
+            source = self._default_source(sgf, start)
+        return self._run(sgf, start, progress_callback, source)
+
+    def parse_collection(self, sgf: str, start: int = 0, progress_callback: typing.Optional[typing.Callable[[int, int], None]] = None, encoding: typing.Optional[str] = None, default_encoding: str = 'iso-8859-1', errors: str = 'strict') -> typing.Generator[SGFNode, None, None]:
+        """
+        Parse a collection of game trees, e.g. '(;...)(;...)', and generate the root of each game as soon as its
+        closing parenthesis is read.
+
+        The parser keeps no reference to a game after generating it, so the memory used is bounded by the largest
+        game. A bytes-like input is handled as in parse_bytes(), with the encoding taken from the CA[] property of
+        each game unless given explicitly.
+        """
+        source_factory = None
+        if not isinstance(sgf, str):
+            def source_factory(game_start):
+                return bytes_source(sgf, game_start, encoding, default_encoding, errors)
+        return self._run(sgf, start, progress_callback, self._default_source(sgf, start), True, source_factory)
+
+    def parse_collection_file(self, path, progress_callback: typing.Optional[typing.Callable[[int, int], None]] = None, encoding: typing.Optional[str] = None, default_encoding: str = 'iso-8859-1', errors: str = 'strict') -> typing.Generator[SGFNode, None, None]:
+        """
+        Parse a collection file through a read-only memory map. See parse_collection().
+        """
+        return self.parse_collection(map_file(path), 0, progress_callback, encoding, default_encoding, errors)
+
+    def _default_source(self, sgf: str, start: int) -> typing.Optional[SGFSource]:
+        """
+        The source used when none is given: None (values are sliced eagerly) for a str input unless lazy_values is
+        set, and the CA[] charset of the first game for a bytes-like input.
+        """
+        if not isinstance(sgf, str):
+            return bytes_source(sgf, start)
+        if self.lazy_values:
+            return SGFSource(sgf)
+        return None
+
+    def _attach_index(self, root: SGFNode):
+        if not self.property_index:
+            return
+        PropertyIndex(root, None if self.property_index is True else self.property_index)
+
+    def _run(self, sgf: str, start: int, progress_callback: typing.Optional[typing.Callable[[int, int], None]], source: typing.Optional[SGFSource], collection: bool = False, source_factory: typing.Optional[typing.Callable[[int], SGFSource]] = None) -> typing.Generator[SGFNode, None, None]:
+        """
+        Start _parse(), timed for the timing hooks if there are any.
+        """
+        if not timing_hooks:
+            return self._parse(sgf, start, progress_callback, source, collection, source_factory)
+        timer = PhaseTimer()
+        return timer.run(self._parse(sgf, start, progress_callback, source, collection, source_factory, timer))
+
+    def _parse(self, sgf: str, start: int, progress_callback: typing.Optional[typing.Callable[[int, int], None]], source: typing.Optional[SGFSource], collection: bool = False, source_factory: typing.Optional[typing.Callable[[int], SGFSource]] = None, timer: typing.Optional[PhaseTimer] = None) -> typing.Generator[SGFNode, None, None]:
+        """
+        Parse the input, generating the nodes as their properties are complete (parse_iterator) or, if collection is
+        True, the root of each game when the game is complete (parse_collection). If given, source_factory creates
+        the source of each game from the position of its '('.
+        """
+        lexer = SGFLexer(sgf, start, progress_callback, self.progress_interval)
+        tokens = lexer.tokenize(main_line=self.main_line)
+        if self.stats is not None:
+            tokens = self.stats.count(lexer, tokens)
+        if timer is not None:
+            tokens = timer.tokens(lexer, tokens)
+        lazy = source is not None  # store offsets into the source instead of strings
+        decode_tags = lazy and source.encoding is not None
+        projection = self.projection
+        skipped = _SKIPPED  # the values of a property left out by the projection
         root = self.__DummyNode()  # dummy root
         current = root
-        stack = []
+        stack = []  # (node before '(', start of '(', end of '(')
 
         # cache data
         # cache_tag = None
         cache_values = None  # ['DUMMY_VALUE']
 
         # states
-        next_can_be_left_paren = True
-        next_can_be_right_paren = False
-        next_can_be_semicolon = False
-        next_can_be_tag = False
-        next_can_be_value = False
-
-        while True:
-            token = lexer.next_token()
-            if token is None:
-                break
-
-            if token.type == SGFTokenType.LEFT_PAREN:
-                if not next_can_be_left_paren:
-                    raise SGFError('Unexpected left parentheses', token.start, token.end, detail=True, sgf=sgf)
-
-                stack.append(current)
-                stack.append(token)  # append '(' token to stack
-
-                # update states
-                next_can_be_left_paren = False
-                next_can_be_right_paren = False
-                next_can_be_semicolon = True
-                next_can_be_tag = False
-                next_can_be_value = False
-
-            elif token.type == SGFTokenType.RIGHT_PAREN:
-                if not next_can_be_right_paren:
-                    raise SGFError('Unexpected right parentheses', token.start, token.end, detail=True, sgf=sgf)
+        allowed = SGFGrammar[None]
 
-                if len(stack) == 0:
-                    raise SGFError('Unmatched right parentheses', token.start, token.end, detail=True, sgf=sgf)
+        for token_type, token_start, token_end in tokens:
+            if token_type not in allowed:
+                raise unexpected_token_error(sgf, token_type, token_start, token_end)
+            allowed = SGFGrammar[token_type]
 
+            if token_type is VALUE or token_type is EMPTY_VALUE:
+                if cache_values is None:
+                    cache_values = []
+                elif cache_values is skipped:
+                    continue
+                if lazy:
+                    cache_values.append(token_start + 1)
+                    cache_values.append(token_end - 1)
+                else:
+                    cache_values.append(sgf[token_start + 1:token_end - 1])
+
+            elif token_type is TAG:
                 # store tag and value to current node if needed
                 if cache_values is not None:
-                    current[cache_tag] = cache_values
+                    if cache_values is not skipped:
+                        current[cache_tag] = source_values(source, cache_values) if lazy else cache_values
                     cache_values = None
-                    yield current
-
-                # pop until '('
-                while True:
-                    if len(stack) == 0:
-                        raise SGFError('Unmatched right parentheses', token.start, token.end, detail=True, sgf=sgf)
-                    # check stack[-1] is a token first
-                    if isinstance(stack[-1], SGFToken) and stack[-1].type == SGFTokenType.LEFT_PAREN:
-                        stack.pop()  # pop '(' token
-                        break
-                    stack.pop()  # pop node
-                current = stack.pop()  # pop the node before '('
-
-                # update states
-                next_can_be_left_paren = True
-                next_can_be_right_paren = True
-                next_can_be_semicolon = False
-                next_can_be_tag = False
-                next_can_be_value = False
-
-            elif token.type == SGFTokenType.SEMICOLON:
-                if not next_can_be_semicolon:
-                    raise SGFError('Unexpected semicolon', token.start, token.end, detail=True, sgf=sgf)
 
+                # cache the tag, will be used when the value comes
+                if decode_tags:
+                    cache_tag = str(sgf[token_start:token_end], 'ascii')
+                else:
+                    cache_tag = sgf[token_start:token_end]
+                if projection is not None and cache_tag not in projection:
+                    cache_values = skipped
+
+            elif token_type is SEMICOLON:
                 # store tag and value to current node if needed
                 if cache_values is not None:
-                    current[cache_tag] = cache_values
+                    if cache_values is not skipped:
+                        current[cache_tag] = source_values(source, cache_values) if lazy else cache_values
                     cache_values = None
-                    yield current
+                    if not collection:
+                        yield current
 
                 # create a new node
-                stack.append(current)
-                current = self.node_allocator.allocate()
-                stack[-1].add_child(current)
-
-                # update states
-                next_can_be_left_paren = False
-                next_can_be_right_paren = False
-                next_can_be_semicolon = False
-                next_can_be_tag = True
-                next_can_be_value = False
-
-            elif token.type == SGFTokenType.TAG:
-                if not next_can_be_tag:
-                    raise SGFError(f'Unexpected tag {token.value}', token.start, token.end, detail=True, sgf=sgf)
+                node = self.node_allocator.allocate()
+                current.add_child(node)
+                current = node
+
+            elif token_type is LEFT_PAREN:
+                if source_factory is not None and len(stack) == 0:
+                    # a new game, which may have its own charset
+                    source = source_factory(token_start)
+                    lazy = True
+                    decode_tags = source.encoding is not None
+                stack.append((current, token_start, token_end))
+
+            else:  # RIGHT_PAREN
+                if len(stack) == 0:
+                    raise SGFError('Unmatched right parentheses', token_start, token_end, detail=True, sgf=sgf)
 
                 # store tag and value to current node if needed
                 if cache_values is not None:
-                    current[cache_tag] = cache_values
+                    if cache_values is not skipped:
+                        current[cache_tag] = source_values(source, cache_values) if lazy else cache_values
                     cache_values = None
+                    if not collection:
+                        yield current
 
-                cache_tag = token.value  # cache the tag, will be used when the value comes
-
-                # update states
-                next_can_be_left_paren = False
-                next_can_be_right_paren = False
-                next_can_be_semicolon = False
-                next_can_be_tag = False
-                next_can_be_value = True
+                current = stack.pop()[0]  # the node before '('
 
-            elif token.type == SGFTokenType.VALUE or token.type == SGFTokenType.EMPTY_VALUE:
-                if not next_can_be_value:
-                    raise SGFError(f'Unexpected value {token.value}', token.start, token.end, detail=True, sgf=sgf)
-
-                if cache_values is None:
-                    cache_values = []
-                value = token.value[1:-1]
-                cache_values.append(value)
-
-                # update states
-                next_can_be_left_paren = True
-                next_can_be_right_paren = True
-                next_can_be_semicolon = True
-                next_can_be_tag = True
-                next_can_be_value = True
-
-            elif token.type == SGFTokenType.IGNORE:
-                pass
-            else:
-                raise SGFError(f'Invalid token {token.value}', token.start, token.end, detail=True, sgf=sgf)
+                if collection and len(stack) == 0:
+                    # the game is complete, hand it over and forget it
+                    game = root.child
+                    root.child = root.last_child = None
+                    if game is not None:
+                        self._attach_index(game)
+                        yield game
 
         # make sure all the parentheses are matched
         if len(stack) > 0:
-            # pop until the first '(' token
-            while len(stack) > 0:
-                if isinstance(stack[-1], SGFToken) and stack[-1].type == SGFTokenType.LEFT_PAREN:
-                    last_left_paren = stack.pop()
-                    break
-                stack.pop()
-            raise SGFError('Unmatched left parentheses', last_left_paren.start, last_left_paren.end, detail=True, sgf=sgf)
-
-        # remove the dummy root
-        root = root.get_child(0)
-        if root:
-            root.detach()
+            _, last_left_paren_start, last_left_paren_end = stack[-1]
+            raise SGFError('Unmatched left parentheses', last_left_paren_start, last_left_paren_end, detail=True, sgf=sgf)
+
+        if not collection:
+            # remove the dummy root
+            root = root.get_child(0)
+            if root:
+                root.detach()
+                self._attach_index(root)
@@ -0,0 +1,285 @@
+from .node import BaseSGFNode
+import random
+import typing
+
+EMPTY = 0
+BLACK = 1
+WHITE = 2
+
+COORDINATES = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+
+def parse_size(value: typing.Optional[str]) -> typing.Tuple[int, int]:
+    """
+    Parse the value of SZ[] into (width, height). The default size is 19x19.
+    """
+    if not value:
+        return 19, 19
+    if ':' in value:
+        width, height = value.split(':', 1)
+        return int(width), int(height)
+    return int(value), int(value)
+
+
+class ZobristTable:
+    """
+    Random keys for every (color, point) of a board and for the side to move.
+
+    The keys only depend on the seed and the board size, so hashes are stable across runs.
+    """
+    _tables: typing.Dict[typing.Tuple[int, int, int], 'ZobristTable'] = {}
+
+    def __init__(self, width: int, height: int, seed: int = 0):
+        rng = random.Random(f'{seed}:{width}x{height}')
+        num_points = width * height
+        self.keys = [
+            [0] * num_points,
+            [rng.getrandbits(64) for _ in range(num_points)],
+            [rng.getrandbits(64) for _ in range(num_points)],
+        ]
+        self.white_to_move = rng.getrandbits(64)
+
+    @classmethod
+    def get(cls, width: int, height: int, seed: int = 0) -> 'ZobristTable':
+        key = (width, height, seed)
+        table = cls._tables.get(key)
+        if table is None:
+            table = cls._tables[key] = ZobristTable(width, height, seed)
+        return table
+
+
+class Board:
+    """
+    A Go board with captures and an incrementally updated Zobrist hash of the stones.
+
+    The points are a bytearray of EMPTY/BLACK/WHITE in row-major order. Changes are returned as undo records
+    [(index, previous color), ...] that can be reverted with undo().
+    """
+
+    def __init__(self, width: int = 19, height: typing.Optional[int] = None, seed: int = 0):
+        self.width = width
+        self.height = width if height is None else height
+        self.points = bytearray(self.width * self.height)
+        self.zobrist = ZobristTable.get(self.width, self.height, seed)
+        self.hash = 0
+        neighbors = []
+        for y in range(self.height):
+            for x in range(self.width):
+                point = []
+                if x > 0:
+                    point.append(y * self.width + x - 1)
+                if x + 1 < self.width:
+                    point.append(y * self.width + x + 1)
+                if y > 0:
+                    point.append((y - 1) * self.width + x)
+                if y + 1 < self.height:
+                    point.append((y + 1) * self.width + x)
+                neighbors.append(point)
+        self.neighbors = neighbors
+
+    def point(self, coordinate: str) -> typing.Optional[int]:
+        """
+        Convert an SGF point ('pd') to an index, or None for a pass ('' or 'tt' on boards up to 19x19).
+        """
+        if coordinate == '' or (coordinate == 'tt' and self.width <= 19 and self.height <= 19):
+            return None
+        x = COORDINATES.index(coordinate[0])
+        y = COORDINATES.index(coordinate[1])
+        if x >= self.width or y >= self.height:
+            raise ValueError(f'Point {coordinate} is outside of the board')
+        return y * self.width + x
+
+    def points_of(self, values: typing.Iterable[str]) -> typing.Generator[int, None, None]:
+        """
+        Convert a list of points, possibly compressed ('aa:cc'), to indices.
+        """
+        for value in values:
+            if ':' in value:
+                first, second = value.split(':', 1)
+                x1, y1 = COORDINATES.index(first[0]), COORDINATES.index(first[1])
+                x2, y2 = COORDINATES.index(second[0]), COORDINATES.index(second[1])
+                for y in range(min(y1, y2), max(y1, y2) + 1):
+                    for x in range(min(x1, x2), max(x1, x2) + 1):
+                        yield y * self.width + x
+            else:
+                point = self.point(value)
+                if point is not None:
+                    yield point
+
+    def set(self, index: int, color: int, changes: list):
+        previous = self.points[index]
+        if previous == color:
+            return
+        keys = self.zobrist.keys
+        self.hash ^= keys[previous][index] ^ keys[color][index]
+        self.points[index] = color
+        changes.append((index, previous))
+
+    def _remove_if_captured(self, index: int, changes: list) -> bool:
+        points = self.points
+        neighbors = self.neighbors
+        color = points[index]
+        group = [index]
+        seen = {index}
+        i = 0
+        while i < len(group):
+            for neighbor in neighbors[group[i]]:
+                value = points[neighbor]
+                if value == EMPTY:
+                    return False
+                if value == color and neighbor not in seen:
+                    seen.add(neighbor)
+                    group.append(neighbor)
+            i += 1
+        for stone in group:
+            self.set(stone, EMPTY, changes)
+        return True
+
+    def play(self, color: int, index: typing.Optional[int], changes: typing.Optional[list] = None) -> list:
+        """
+        Play a move (None is a pass), removing captured groups and then the group of the move if it has no liberty.
+        """
+        if changes is None:
+            changes = []
+        if index is None:
+            return changes
+        self.set(index, color, changes)
+        opponent = BLACK if color == WHITE else WHITE
+        for neighbor in self.neighbors[index]:
+            if self.points[neighbor] == opponent:
+                self._remove_if_captured(neighbor, changes)
+        self._remove_if_captured(index, changes)
+        return changes
+
+    def undo(self, changes: list):
+        keys = self.zobrist.keys
+        points = self.points
+        for index, previous in reversed(changes):
+            self.hash ^= keys[points[index]][index] ^ keys[previous][index]
+            points[index] = previous
+
+    def apply_setup(self, node: BaseSGFNode, changes: typing.Optional[list] = None) -> list:
+        """
+        Apply only the setup properties (AE, AB, AW) of a node.
+        """
+        if changes is None:
+            changes = []
+        for tag, color in (('AE', EMPTY), ('AB', BLACK), ('AW', WHITE)):
+            if tag in node:
+                for index in self.points_of(node[tag]):
+                    self.set(index, color, changes)
+        return changes
+
+    def apply(self, node: BaseSGFNode, changes: typing.Optional[list] = None) -> list:
+        """
+        Apply the setup properties (AE, AB, AW) and then the moves (B, W) of a node.
+        """
+        changes = self.apply_setup(node, changes)
+        for tag, color in (('B', BLACK), ('W', WHITE)):
+            if tag in node:
+                values = node[tag]
+                self.play(color, self.point(values[0]) if values else None, changes)
+        return changes
+
+
+def next_to_move(node: BaseSGFNode, to_move: int) -> int:
+    """
+    The color to move after the node, given the color to move before it.
+    """
+    if 'B' in node:
+        to_move = WHITE
+    if 'W' in node:
+        to_move = BLACK
+    if 'PL' in node:
+        values = node['PL']
+        if values and values[0] in ('B', 'b'):
+            to_move = BLACK
+        elif values and values[0] in ('W', 'w'):
+            to_move = WHITE
+    return to_move
+
+
+class PositionIndex:
+    """
+    An index of the board positions reached by the nodes of one or more game trees.
+
+    Each node is hashed with the Zobrist hash of the position after its properties are applied (and of the side to
+    move if include_side_to_move is True). The trees are replayed once with an explicit stack, undoing the changes
+    of a node when its subtree is done, so looking up a position or its transpositions is a dict lookup.
+    """
+
+    def __init__(self, roots: typing.Union[BaseSGFNode, typing.Iterable[BaseSGFNode], None] = None, include_side_to_move: bool = True, seed: int = 0):
+        self.include_side_to_move = include_side_to_move
+        self.seed = seed
+        self.hashes: typing.Dict[BaseSGFNode, int] = {}
+        self.positions: typing.Dict[int, typing.List[BaseSGFNode]] = {}
+        if isinstance(roots, BaseSGFNode):
+            roots = [roots]
+        for root in roots or ():
+            self.add_tree(root)
+
+    def add_tree(self, root: BaseSGFNode):
+        """
+        Replay a game tree and index its nodes. The board size is taken from the SZ[] property of the root.
+        """
+        width, height = parse_size(root['SZ'][0] if 'SZ' in root and root['SZ'] else None)
+        board = Board(width, height, self.seed)
+        white_to_move = board.zobrist.white_to_move
+        hashes = self.hashes
+        positions = self.positions
+
+        stack = [(root, BLACK, None)]
+        while stack:
+            node, to_move, changes = stack.pop()
+            if changes is not None:
+                # leaving the node
+                board.undo(changes)
+                continue
+
+            changes = board.apply(node)
+            to_move = next_to_move(node, to_move)
+            position = board.hash
+            if self.include_side_to_move and to_move == WHITE:
+                position ^= white_to_move
+            hashes[node] = position
+            nodes = positions.get(position)
+            if nodes is None:
+                positions[position] = [node]
+            else:
+                nodes.append(node)
+
+            stack.append((node, to_move, changes))
+            for child in reversed(list(node.get_children_iter())):
+                stack.append((child, to_move, None))
+
+    def hash_of(self, node: BaseSGFNode) -> int:
+        """
+        The position hash of an indexed node.
+        """
+        return self.hashes[node]
+
+    def nodes_for(self, position: int) -> typing.List[BaseSGFNode]:
+        """
+        The nodes reaching the position, in the order they were indexed.
+        """
+        return self.positions.get(position, [])
+
+    def transpositions(self, node: BaseSGFNode) -> typing.List[BaseSGFNode]:
+        """
+        The other nodes reaching the same position as the node.
+        """
+        return [other for other in self.positions[self.hashes[node]] if other != node]
+
+    def canonical(self, node: BaseSGFNode) -> BaseSGFNode:
+        """
+        The first indexed node reaching the same position as the node, e.g. to deduplicate transpositions.
+        """
+        return self.positions[self.hashes[node]][0]
+
+    def duplicates(self) -> typing.Generator[typing.List[BaseSGFNode], None, None]:
+        """
+        Generate the groups of nodes that reach the same position, for the positions reached more than once.
+        """
+        for nodes in self.positions.values():
+            if len(nodes) > 1:
+                yield nodes
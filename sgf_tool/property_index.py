@@ -0,0 +1,129 @@
+from .node import LazyValues, SGFNode
+import typing
+
+
+def _current_values(node: SGFNode, tag: str) -> typing.List[str]:
+    """
+    The values of a property, without storing lazy values in the node as node[tag] does: indexing a tree keeps its
+    long values (e.g. comments) deferred.
+    """
+    value = node.properties[tag]
+    return value.materialize() if type(value) is LazyValues else value
+
+
+class PropertyIndex:
+    """
+    An index of the nodes of a tree by property: tag -> value -> nodes.
+
+    Creating the index attaches it to every node of the tree (node.property_index). From then on SGFNode keeps it
+    up to date: __setitem__ reindexes the property, add_child indexes the added subtree and detach removes the
+    detached subtree. Algorithm.find_nodes_with_property uses the index when it is called on the indexed root.
+
+    Nodes are listed in the order they were indexed, which is pre-order for a freshly built index; nodes added by
+    later edits come after them. Lazy values (see SGFParser lazy_values and parse_bytes) are decoded to be indexed
+    but stay deferred in the nodes.
+    """
+
+    def __init__(self, root: SGFNode, tags: typing.Optional[typing.Iterable[str]] = None):
+        """
+        Args:
+            root (SGFNode): The root of the tree to index.
+            tags (Iterable[str], optional): Index only these tags. All the tags are indexed by default.
+        """
+        if not isinstance(root, SGFNode):
+            raise TypeError('PropertyIndex requires a tree of SGFNode.')
+        self.root = root
+        self.tags = frozenset(tags) if tags is not None else None
+        self.entries: typing.Dict[str, typing.Dict[str, typing.Dict[SGFNode, None]]] = {}
+        self.add_subtree(root)
+
+    def covers(self, tag: str) -> bool:
+        """
+        Check if the tag is indexed.
+        """
+        return self.tags is None or tag in self.tags
+
+    def add(self, node: SGFNode, tag: str):
+        """
+        Index the current values of a property of the node.
+        """
+        if not self.covers(tag) or tag not in node:
+            return
+        values = self.entries.setdefault(tag, {})
+        for value in _current_values(node, tag):
+            values.setdefault(value, {})[node] = None
+
+    def remove(self, node: SGFNode, tag: str):
+        """
+        Remove the current values of a property of the node from the index.
+        """
+        if not self.covers(tag) or tag not in node:
+            return
+        values = self.entries.get(tag)
+        if values is None:
+            return
+        for value in _current_values(node, tag):
+            nodes = values.get(value)
+            if nodes is not None:
+                nodes.pop(node, None)
+                if not nodes:
+                    del values[value]
+
+    def add_subtree(self, root: SGFNode):
+        """
+        Attach the index to the nodes of the subtree and index their properties.
+        """
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            node.property_index = self
+            for tag in node.get_tags():
+                self.add(node, tag)
+            # reversed, so that the first child is indexed first
+            children = list(node.get_children_iter())
+            children.reverse()
+            stack.extend(children)
+
+    def remove_subtree(self, root: SGFNode):
+        """
+        Detach the index from the nodes of the subtree and remove their properties from the index.
+        """
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            for tag in node.get_tags():
+                self.remove(node, tag)
+            del node.property_index
+            stack.extend(node.get_children_iter())
+
+    def close(self):
+        """
+        Detach the index from the whole tree. The tree is no longer indexed afterwards.
+        """
+        self.remove_subtree(self.root)
+        self.entries.clear()
+
+    def find(self, tag: str, value: str, value_index: typing.Optional[int] = None) -> typing.List[SGFNode]:
+        """
+        Find the nodes having the value for the tag, at position value_index of the values if it is given.
+        """
+        nodes = self.entries.get(tag, {}).get(value)
+        if not nodes:
+            return []
+        if value_index is None:
+            return list(nodes)
+        results = []
+        for node in nodes:
+            values = _current_values(node, tag)
+            if len(values) > value_index and values[value_index] == value:
+                results.append(node)
+        return results
+
+    def find_tag(self, tag: str) -> typing.List[SGFNode]:
+        """
+        Find the nodes having the tag.
+        """
+        nodes = {}
+        for value_nodes in self.entries.get(tag, {}).values():
+            nodes.update(value_nodes)
+        return list(nodes)
@@ -0,0 +1,308 @@
+"""
+Tolerant parsing: recover from the errors of malformed inputs instead of raising, and report them as diagnostics.
+
+A diagnostic is a compact (code, start, end) tuple that keeps no reference to the input, so a corpus with many
+damaged files does not keep their sources alive; the message with the highlighted context is only built when
+SGFDiagnostic.format() is called.
+"""
+from .lexer import SGFTokenBytesPattern, SGFTokenGroupTypes, SGFTokenPattern, SGFTokenType
+from .node import SGFNode, SGFSource, extract_values, source_values
+from .exceptions import BaseSGFException, LexicalError, SGFError
+import enum
+import re
+import typing
+
+if typing.TYPE_CHECKING:
+    from .parser import SGFParser
+
+LEFT_PAREN = SGFTokenType.LEFT_PAREN
+RIGHT_PAREN = SGFTokenType.RIGHT_PAREN
+SEMICOLON = SGFTokenType.SEMICOLON
+TAG = SGFTokenType.TAG
+EMPTY_VALUE = SGFTokenType.EMPTY_VALUE
+VALUE = SGFTokenType.VALUE
+IGNORE = SGFTokenType.IGNORE
+
+# an escaped character, kept, or a ']' to escape
+ESCAPE_PATTERN = re.compile(r'\\[\s\S]|\]')
+
+
+class SGFDiagnosticCode(enum.Enum):
+    INVALID_CHARACTER = 0  # characters that start no token, skipped
+    UNESCAPED_BRACKET = 1  # a ']' that ended a value too early, kept in the value
+    UNTERMINATED_VALUE = 2  # a '[' without its ']', the rest of the input is skipped
+    UNEXPECTED_TOKEN = 3  # tokens that do not fit the grammar, skipped
+    MISSING_VALUE = 4  # a tag without value, dropped
+    MISSING_SEMICOLON = 5  # properties right after '(', read as a node
+    MISSING_LEFT_PAREN = 6  # a game that does not start with '(', read as if it did
+    EMPTY_NODE = 7  # a ';' without properties, kept as a node without properties
+    EMPTY_VARIATION = 8  # '()' without nodes, skipped
+    UNMATCHED_RIGHT_PAREN = 9  # a ')' without '(', skipped
+    UNMATCHED_LEFT_PAREN = 10  # a '(' without ')', closed at the end of the input
+    EXTRA_GAME = 11  # a game after the first one, skipped
+
+
+DIAGNOSTIC_MESSAGES = {
+    SGFDiagnosticCode.INVALID_CHARACTER: 'Invalid character',
+    SGFDiagnosticCode.UNESCAPED_BRACKET: 'Unescaped right bracket',
+    SGFDiagnosticCode.UNTERMINATED_VALUE: 'Unterminated value',
+    SGFDiagnosticCode.UNEXPECTED_TOKEN: 'Unexpected token',
+    SGFDiagnosticCode.MISSING_VALUE: 'Missing value',
+    SGFDiagnosticCode.MISSING_SEMICOLON: 'Missing semicolon',
+    SGFDiagnosticCode.MISSING_LEFT_PAREN: 'Missing left parentheses',
+    SGFDiagnosticCode.EMPTY_NODE: 'Empty node',
+    SGFDiagnosticCode.EMPTY_VARIATION: 'Empty variation',
+    SGFDiagnosticCode.UNMATCHED_RIGHT_PAREN: 'Unmatched right parentheses',
+    SGFDiagnosticCode.UNMATCHED_LEFT_PAREN: 'Unmatched left parentheses',
+    SGFDiagnosticCode.EXTRA_GAME: 'More than one game',
+}
+
+LEXICAL_CODES = frozenset([
+    SGFDiagnosticCode.INVALID_CHARACTER,
+    SGFDiagnosticCode.UNESCAPED_BRACKET,
+    SGFDiagnosticCode.UNTERMINATED_VALUE,
+])
+
+
+class SGFDiagnostic(typing.NamedTuple):
+    code: SGFDiagnosticCode
+    start: int
+    end: int
+
+    @property
+    def message(self) -> str:
+        return DIAGNOSTIC_MESSAGES[self.code]
+
+    def to_error(self, sgf=None) -> BaseSGFException:
+        """
+        The LexicalError or SGFError the strict parser would raise for this problem. If the input is given, its
+        text around the problem is shown when the error is formatted.
+        """
+        error_type = LexicalError if self.code in LEXICAL_CODES else SGFError
+        return error_type(self.message, self.start, self.end, detail=sgf is not None, sgf=sgf)
+
+    def format(self, sgf=None) -> str:
+        """
+        The message of the diagnostic, with the highlighted context if the input is given.
+        """
+        return str(self.to_error(sgf))
+
+
+def tolerant_tokens(sgf: typing.Union[str, bytes], start: int, diagnostics: typing.List[SGFDiagnostic], repaired: typing.Optional[typing.Set[int]] = None) -> typing.List[typing.Tuple[SGFTokenType, int, int]]:
+    """
+    Lex the whole input, skipping the invalid characters instead of raising. A stray ']' after a value and a few
+    tags (e.g. 'C[see [1]] for more]') means that the ']' closing the value was not escaped: the value is extended
+    to the stray ']' and its start is added to repaired.
+    """
+    text = isinstance(sgf, str)
+    pattern = SGFTokenPattern if text else SGFTokenBytesPattern
+    group_types = SGFTokenGroupTypes
+    length = len(sgf)
+    tokens = []
+    index = start
+    while index < length:
+        for match in iter(pattern.scanner(sgf, index).match, None):
+            token_type = group_types[match.lastindex]
+            index = match.end()
+            if token_type is not IGNORE:
+                tokens.append((token_type, match.start(), index))
+        if index >= length:
+            break
+
+        char = sgf[index:index + 1]
+        if char == '[' or char == b'[':
+            diagnostics.append(SGFDiagnostic(SGFDiagnosticCode.UNTERMINATED_VALUE, index, length))
+            break
+        if (char == ']' or char == b']') and sgf[index - 1:index] not in ('\\', b'\\') and _extend_value(tokens, index, diagnostics):
+            if repaired is not None:
+                repaired.add(tokens[-1][1])
+            index += 1
+            continue
+        last = diagnostics[-1] if diagnostics else None
+        if last is not None and last.code is SGFDiagnosticCode.INVALID_CHARACTER and last.end == index:
+            diagnostics[-1] = SGFDiagnostic(SGFDiagnosticCode.INVALID_CHARACTER, last.start, index + 1)
+        else:
+            diagnostics.append(SGFDiagnostic(SGFDiagnosticCode.INVALID_CHARACTER, index, index + 1))
+        index += 1
+    return tokens
+
+
+def _escape_bracket(match: typing.Match) -> str:
+    return match.group() if len(match.group()) == 2 else '\\]'
+
+
+def _extend_value(tokens: list, index: int, diagnostics: typing.List[SGFDiagnostic]) -> bool:
+    """
+    Extend the last value up to the ']' at index if only tags and parentheses follow it.
+    """
+    i = len(tokens) - 1
+    while i >= 0 and tokens[i][0] is not VALUE and tokens[i][0] is not EMPTY_VALUE:
+        if tokens[i][0] is SEMICOLON:
+            return False
+        i -= 1
+    if i < 0:
+        return False
+    _, value_start, value_end = tokens[i]
+    del tokens[i:]
+    tokens.append((VALUE, value_start, index + 1))
+    # the characters skipped since were part of the value
+    while diagnostics and diagnostics[-1].start >= value_end:
+        diagnostics.pop()
+    diagnostics.append(SGFDiagnostic(SGFDiagnosticCode.UNESCAPED_BRACKET, value_end - 1, value_end))
+    return True
+
+
+def parse_tolerant(parser: 'SGFParser', sgf: typing.Union[str, bytes], start: int, source: typing.Optional[SGFSource]) -> typing.Tuple[typing.Optional[SGFNode], typing.List[SGFDiagnostic]]:
+    """
+    Parse the first game of the input with the options of the parser, repairing what does not fit the grammar.
+    See SGFParser.parse_tolerant().
+    """
+    diagnostics = []
+    repaired = set()  # start of the values extended to a stray ']'
+    tokens = tolerant_tokens(sgf, start, diagnostics, repaired)
+    lazy = source is not None
+    decode_tags = lazy and source.encoding is not None
+    projection = parser.projection
+    allocate = parser.node_allocator.allocate
+
+    root = None
+    current = None
+    stack = []  # (node before '(', start of '(')
+    tag = None  # the tag of the current property
+    tag_span = None
+    values = None  # the values of the current property, None if it is dropped
+    values_lazy = lazy  # whether values holds offsets, False once a repaired value made the property eager
+    previous = None  # the type of the last token used
+    skip_from = None  # start of the tokens skipped until a token of sync
+    sync = None
+
+    def store():
+        nonlocal values
+        if values is not None and (projection is None or tag in projection):
+            current[tag] = source_values(source, values) if values_lazy else values
+        values = None
+
+    def new_node():
+        """
+        Create a node after the current one, or return None if it would start a second game.
+        """
+        nonlocal root, current
+        node = allocate()
+        if current is not None:
+            current.add_child(node)
+        elif root is None:
+            root = node
+        else:
+            return None
+        current = node
+        return node
+
+    for token_type, token_start, token_end in tokens:
+        if sync is not None:
+            if token_type not in sync:
+                skip_end = token_end
+                continue
+            diagnostics.append(SGFDiagnostic(SGFDiagnosticCode.UNEXPECTED_TOKEN, skip_from, skip_end))
+            sync = None
+
+        if previous is TAG and token_type is not VALUE and token_type is not EMPTY_VALUE:
+            diagnostics.append(SGFDiagnostic(SGFDiagnosticCode.MISSING_VALUE, *tag_span))
+            values = None
+            previous = VALUE
+        elif previous is SEMICOLON and (token_type is LEFT_PAREN or token_type is RIGHT_PAREN):
+            diagnostics.append(SGFDiagnostic(SGFDiagnosticCode.EMPTY_NODE, token_start, token_end))
+
+        if token_type is VALUE or token_type is EMPTY_VALUE:
+            if previous is TAG or previous is VALUE or previous is EMPTY_VALUE:
+                if values is not None:
+                    if token_start in repaired:
+                        # the value is stored escaped, so the property cannot be kept as offsets
+                        if values_lazy:
+                            values = extract_values(source, values)
+                            values_lazy = False
+                        value = extract_values(source, [token_start + 1, token_end - 1])[0] if lazy else sgf[token_start + 1:token_end - 1]
+                        values.append(ESCAPE_PATTERN.sub(_escape_bracket, value))
+                    elif values_lazy:
+                        values.append(token_start + 1)
+                        values.append(token_end - 1)
+                    elif lazy:
+                        values.extend(extract_values(source, [token_start + 1, token_end - 1]))
+                    else:
+                        values.append(sgf[token_start + 1:token_end - 1])
+                previous = token_type
+                continue
+
+        elif token_type is TAG:
+            if previous is LEFT_PAREN:
+                diagnostics.append(SGFDiagnostic(SGFDiagnosticCode.MISSING_SEMICOLON, token_start, token_end))
+                if new_node() is None:
+                    diagnostics.append(SGFDiagnostic(SGFDiagnosticCode.EXTRA_GAME, stack[-1][1], len(sgf)))
+                    break
+                previous = SEMICOLON
+            if previous is SEMICOLON or previous is VALUE or previous is EMPTY_VALUE:
+                if previous is not SEMICOLON:
+                    store()
+                tag = str(sgf[token_start:token_end], 'ascii') if decode_tags else sgf[token_start:token_end]
+                tag_span = (token_start, token_end)
+                values = []
+                values_lazy = lazy
+                previous = TAG
+                continue
+
+        elif token_type is SEMICOLON:
+            if len(stack) == 0 and root is None:
+                diagnostics.append(SGFDiagnostic(SGFDiagnosticCode.MISSING_LEFT_PAREN, token_start, token_end))
+                stack.append((None, token_start))
+                previous = LEFT_PAREN
+            if previous is SEMICOLON:
+                diagnostics.append(SGFDiagnostic(SGFDiagnosticCode.EMPTY_NODE, token_start, token_end))
+            if previous is LEFT_PAREN or previous is SEMICOLON or previous is VALUE or previous is EMPTY_VALUE:
+                if previous is VALUE or previous is EMPTY_VALUE:
+                    store()
+                if new_node() is None:
+                    diagnostics.append(SGFDiagnostic(SGFDiagnosticCode.EXTRA_GAME, stack[-1][1], len(sgf)))
+                    break
+                previous = SEMICOLON
+                continue
+
+        elif token_type is LEFT_PAREN:
+            if len(stack) == 0 and root is not None:
+                diagnostics.append(SGFDiagnostic(SGFDiagnosticCode.EXTRA_GAME, token_start, len(sgf)))
+                break
+            if previous is not LEFT_PAREN:
+                if previous is VALUE or previous is EMPTY_VALUE:
+                    store()
+                stack.append((current, token_start))
+                previous = LEFT_PAREN
+                continue
+
+        else:  # RIGHT_PAREN
+            if len(stack) == 0:
+                diagnostics.append(SGFDiagnostic(SGFDiagnosticCode.UNMATCHED_RIGHT_PAREN, token_start, token_end))
+                continue
+            if previous is LEFT_PAREN:
+                diagnostics.append(SGFDiagnostic(SGFDiagnosticCode.EMPTY_VARIATION, stack[-1][1], token_end))
+            elif previous is VALUE or previous is EMPTY_VALUE:
+                store()
+            current = stack.pop()[0]
+            previous = RIGHT_PAREN
+            continue
+
+        # the token does not fit: skip it and the tokens after it up to a parenthesis, or a node outside variations
+        skip_from, skip_end = token_start, token_end
+        sync = (LEFT_PAREN, RIGHT_PAREN) if previous is RIGHT_PAREN else (LEFT_PAREN, RIGHT_PAREN, SEMICOLON)
+
+    else:
+        if sync is not None:
+            diagnostics.append(SGFDiagnostic(SGFDiagnosticCode.UNEXPECTED_TOKEN, skip_from, skip_end))
+        if previous is TAG:
+            diagnostics.append(SGFDiagnostic(SGFDiagnosticCode.MISSING_VALUE, *tag_span))
+        elif previous is VALUE or previous is EMPTY_VALUE:
+            store()
+        for _, paren_start in reversed(stack):
+            diagnostics.append(SGFDiagnostic(SGFDiagnosticCode.UNMATCHED_LEFT_PAREN, paren_start, paren_start + 1))
+
+    if root is not None:
+        parser._attach_index(root)
+    diagnostics.sort(key=lambda diagnostic: diagnostic.start)
+    return root, diagnostics
@@ -0,0 +1,112 @@
+from .instrumentation import report_timing, timing_hooks
+import io
+import time
+import typing
+
+if typing.TYPE_CHECKING:
+    from .node import BaseSGFNode
+
+
+def escape_value(value: str) -> str:
+    """
+    Escape the characters that cannot appear unescaped in a property value (']' and '\\').
+    """
+    return value.replace('\\', '\\\\').replace(']', '\\]')
+
+
+def node_to_sgf(node: 'BaseSGFNode', escape: bool = False) -> str:
+    """
+    Convert a single node (without its children) to an SGF string.
+    """
+    if not escape:
+        return str(node)
+    result = [';']
+    for tag in node.get_tags():
+        result.append(f'{tag}[{"][".join(escape_value(value) for value in node[tag])}]')
+    return ''.join(result)
+
+
+def iter_sgf(node: 'BaseSGFNode', escape: bool = False, line_width: typing.Optional[int] = None) -> typing.Generator[str, None, None]:
+    """
+    Generate the SGF string of the node and its subtree in chunks.
+
+    The output is the same as the recursive SGFNode.to_sgf(): if the node has siblings after it, each of them is
+    written as a variation too. The tree is walked with an explicit stack, so the depth of the tree is not limited.
+
+    Args:
+        node (BaseSGFNode): The node to start from.
+        escape (bool): If True, the values are treated as plain text and ']' and '\\' in them are escaped.
+        line_width (int, optional): If given, a line break is inserted before a node or a parenthesis that would
+            make the current line longer than line_width. Values are never broken.
+    """
+    stack = []
+    parent = node.get_parent()
+    if parent is not None and parent.get_num_children() > 1:
+        siblings = list(parent.get_children_iter())
+        index = next(i for i, sibling in enumerate(siblings) if sibling == node)
+        if index + 1 < len(siblings):
+            for sibling in reversed(siblings[index:]):
+                stack.append(')')
+                stack.append(sibling)
+                stack.append('(')
+    if not stack:
+        stack.append(node)
+
+    column = 0
+    while stack:
+        item = stack.pop()
+        if item.__class__ is str:
+            chunk = item
+        else:
+            chunk = node_to_sgf(item, escape)
+            num_children = item.get_num_children()
+            if num_children == 1:
+                stack.append(item.get_child(0))
+            elif num_children > 1:
+                for child in reversed(list(item.get_children_iter())):
+                    stack.append(')')
+                    stack.append(child)
+                    stack.append('(')
+
+        if line_width is not None:
+            if column > 0 and column + len(chunk) > line_width:
+                yield '\n'
+                column = 0
+            newline = chunk.rfind('\n')
+            column = len(chunk) - newline - 1 if newline != -1 else column + len(chunk)
+        yield chunk
+
+
+def dumps(node: 'BaseSGFNode', escape: bool = False, line_width: typing.Optional[int] = None) -> str:
+    """
+    Convert the node and its subtree to an SGF string. See iter_sgf() for the arguments.
+    """
+    if not timing_hooks:
+        return ''.join(iter_sgf(node, escape, line_width))
+    started = time.perf_counter()
+    result = ''.join(iter_sgf(node, escape, line_width))
+    report_timing('serialize', time.perf_counter() - started, len(result))
+    return result
+
+
+def dump(node: 'BaseSGFNode', fp, escape: bool = False, line_width: typing.Optional[int] = None, encoding: str = 'utf-8', buffer_size: int = 1 << 16):
+    """
+    Write the SGF string of the node and its subtree to a text or binary file-like object.
+
+    The output is written in blocks of about buffer_size characters. Binary files receive the text encoded with
+    encoding. See iter_sgf() for the other arguments.
+    """
+    binary = isinstance(fp, (io.RawIOBase, io.BufferedIOBase))
+    buffer = []
+    size = 0
+    for chunk in iter_sgf(node, escape, line_width):
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= buffer_size:
+            block = ''.join(buffer)
+            fp.write(block.encode(encoding) if binary else block)
+            buffer.clear()
+            size = 0
+    if buffer:
+        block = ''.join(buffer)
+        fp.write(block.encode(encoding) if binary else block)
@@ -0,0 +1,262 @@
+"""
+Push parsing of a stream of chunks: the input is parsed as it arrives instead of waiting for the whole document.
+
+SGFPushParser.feed() takes the chunks one by one and returns the games (or the nodes) completed by each of them;
+close() ends the input. parse_stream() does the same for an asyncio.StreamReader or an async iterator of chunks.
+Only the unfinished token at the end of the last chunk and the current game are held in memory.
+"""
+from .lexer import SGFTokenBytesPattern, SGFTokenGroupTypes, SGFTokenPattern, SGFTokenType
+from .node import SGFNode
+from .parser import EMPTY_VALUE, LEFT_PAREN, SEMICOLON, TAG, VALUE, SGFGrammar, SGFParser, resolve_encoding, unexpected_token_error
+from .exceptions import BaseSGFException, LexicalError, SGFError
+import typing
+
+IGNORE = SGFTokenType.IGNORE
+
+
+def _shift_error(error: BaseSGFException, offset: int) -> BaseSGFException:
+    """
+    Move an error raised in the buffer to its position in the stream. The buffer is not kept as its source.
+    """
+    error.start += offset
+    error.end += offset
+    error.sgf = None
+    return error
+
+
+class SGFPushParser:
+    """
+    A parser that is fed the input in chunks of any size, e.g. as an upload or a pipe delivers it.
+
+    The chunks are all str or all bytes-like. Bytes are decoded per game with the encoding of the CA[] property of
+    its root node unless encoding is given, like in SGFParser.parse_collection(). A token cut by the end of a chunk,
+    e.g. in the middle of a [...] value, is kept until the chunk that completes it arrives.
+
+    The errors are raised by the feed() or close() call that reads the faulty token, with their position in the
+    whole stream.
+    """
+
+    def __init__(self, parser: typing.Optional[SGFParser] = None, encoding: typing.Optional[str] = None, default_encoding: str = 'iso-8859-1', errors: str = 'strict', nodes: bool = False):
+        """
+        Args:
+            parser (SGFParser, optional): The options of the parse: its node_allocator, property_index and
+                projection are used. Defaults to SGFParser().
+            encoding (str, optional): The encoding of a bytes input; by default the CA[] property of each game.
+            default_encoding (str): The encoding used when CA[] is missing or unknown.
+            errors (str): The error handling of the decoding.
+            nodes (bool): If True, feed() returns every node as soon as its properties are complete instead of the
+                root of every complete game.
+        """
+        self.parser = parser if parser is not None else SGFParser()
+        self.encoding = encoding
+        self.default_encoding = default_encoding
+        self.errors = errors
+        self.nodes = nodes
+        self.offset = 0  # position of the buffer in the stream
+        self.closed = False
+        self._text = None  # whether the chunks are str, known from the first one
+        self._pieces = []  # the unread input
+        self._pending_value = False  # whether the unread input starts with an unterminated value
+        self._allowed = SGFGrammar[None]
+        self._stack = []  # (node before '(', position of '(')
+        self._current = None
+        self._game = None  # the root of the current game
+        self._pending_node = False  # whether the properties of the current node are not complete yet
+        self._properties = []  # (tag, values) of the current node
+        self._values = None
+        self._game_encoding = None  # the encoding of the current game, for a bytes input
+
+    @property
+    def position(self) -> int:
+        """
+        The number of characters (or bytes) read so far, not counting the unfinished token at the end.
+        """
+        return self.offset
+
+    def feed(self, chunk: typing.Union[str, bytes]) -> typing.List[SGFNode]:
+        """
+        Parse the next chunk of the input and return the games (or the nodes) it completes.
+        """
+        if self.closed:
+            raise ValueError('feed() after close()')
+        text = isinstance(chunk, str)
+        if self._text is None:
+            self._text = text
+        elif text != self._text:
+            raise TypeError('The chunks must be all str or all bytes')
+        if not text:
+            chunk = bytes(chunk)
+        if not chunk:
+            return []
+        self._pieces.append(chunk)
+        if self._pending_value and (']' if text else b']') not in chunk:
+            # the value is still not terminated, do not scan it again
+            return []
+        return self._consume(False)
+
+    def close(self) -> typing.List[SGFNode]:
+        """
+        End the input: parse the last token and check that all the parentheses are matched. Returns the games (or
+        the nodes) completed by the end of the input.
+        """
+        if self.closed:
+            return []
+        self.closed = True
+        result = self._consume(True) if self._pieces else []
+        if self._stack:
+            position = self._stack[-1][1]
+            raise SGFError('Unmatched left parentheses', position, position + 1)
+        return result
+
+    def _consume(self, final: bool) -> typing.List[SGFNode]:
+        """
+        Parse the complete tokens of the unread input. If final is False, a TAG or a whitespace that reaches the end
+        of the input may go on in the next chunk and is kept unread.
+        """
+        text = self._text
+        buffer = ''.join(self._pieces) if text else b''.join(self._pieces)
+        length = len(buffer)
+        offset = self.offset
+        projection = self.parser.projection
+        allocate = self.parser.node_allocator.allocate
+        group_types = SGFTokenGroupTypes
+        match_next = (SGFTokenPattern if text else SGFTokenBytesPattern).scanner(buffer).match
+        result = []
+
+        allowed = self._allowed
+        stack = self._stack
+        current = self._current
+        game = self._game
+        pending_node = self._pending_node
+        properties = self._properties
+        values = self._values
+        index = 0
+        held = False  # whether a token was kept for the next chunk
+        try:
+            while True:
+                match = match_next()
+                if match is None:
+                    break
+                token_type = group_types[match.lastindex]
+                start, end = match.span()
+                if end == length and not final and (token_type is TAG or token_type is IGNORE):
+                    held = True
+                    break
+                index = end
+                if token_type is IGNORE:
+                    continue
+                if token_type not in allowed:
+                    raise _shift_error(unexpected_token_error(buffer, token_type, start, end), offset)
+                allowed = SGFGrammar[token_type]
+
+                if token_type is VALUE or token_type is EMPTY_VALUE:
+                    if values is not None:
+                        values.append(buffer[start + 1:end - 1])
+
+                elif token_type is TAG:
+                    tag = buffer[start:end] if text else str(buffer[start:end], 'ascii')
+                    if projection is None or tag in projection or tag == 'CA':
+                        # CA[] is kept until the root node is complete to decode a bytes input
+                        values = []
+                        properties.append((tag, values))
+                    else:
+                        values = None
+
+                elif token_type is SEMICOLON:
+                    if pending_node:
+                        self._complete(current, properties, current is game, result)
+                        properties = []
+                    node = allocate()
+                    if current is not None:
+                        current.add_child(node)
+                    else:
+                        game = node
+                    current = node
+                    pending_node = True
+
+                elif token_type is LEFT_PAREN:
+                    stack.append((current, offset + start))
+
+                else:  # RIGHT_PAREN
+                    if len(stack) == 0:
+                        raise SGFError('Unmatched right parentheses', offset + start, offset + end)
+                    if pending_node:
+                        self._complete(current, properties, current is game, result)
+                        properties = []
+                        pending_node = False
+                    current = stack.pop()[0]
+                    if len(stack) == 0:
+                        # the game is complete, hand it over and forget it
+                        self.parser._attach_index(game)
+                        if not self.nodes:
+                            result.append(game)
+                        game = None
+        finally:
+            self._allowed = allowed
+            self._current = current
+            self._game = game
+            self._pending_node = pending_node
+            self._properties = properties
+            self._values = values
+
+        if index < length and not held:
+            if final or buffer[index:index + 1] not in ('[', b'['):
+                raise LexicalError('Invalid character', offset + index, offset + index + 1)
+            self._pending_value = True
+        else:
+            self._pending_value = False
+        self._pieces = [buffer[index:]] if index < length else []
+        self.offset = offset + index
+        return result
+
+    def _complete(self, node: SGFNode, properties: typing.List[typing.Tuple[str, list]], root: bool, result: typing.List[SGFNode]):
+        """
+        Store the properties of a node that is complete, decoding them for a bytes input. The encoding of a game is
+        found when its root node is complete.
+        """
+        projection = self.parser.projection
+        if projection is not None:
+            if root and not self._text:
+                self._game_encoding = self._find_encoding(properties)
+            properties = [(tag, values) for tag, values in properties if tag in projection]
+        if self._text:
+            for tag, values in properties:
+                node[tag] = values
+        else:
+            if root and projection is None:
+                self._game_encoding = self._find_encoding(properties)
+            encoding = self._game_encoding
+            errors = self.errors
+            for tag, values in properties:
+                node[tag] = [str(value, encoding, errors) for value in values]
+        if self.nodes:
+            result.append(node)
+
+    def _find_encoding(self, properties: typing.List[typing.Tuple[str, list]]) -> str:
+        encoding = self.encoding
+        if encoding is None:
+            for tag, values in properties:
+                if tag == 'CA' and values and values[0]:
+                    encoding = str(values[0], 'ascii', 'replace').strip()
+        return resolve_encoding(encoding, self.default_encoding)
+
+
+async def parse_stream(source, parser: typing.Optional[SGFParser] = None, encoding: typing.Optional[str] = None, default_encoding: str = 'iso-8859-1', errors: str = 'strict', nodes: bool = False, chunk_size: int = 1 << 16) -> typing.AsyncGenerator[SGFNode, None]:
+    """
+    Parse an asyncio.StreamReader (anything with an async read(size)) or an async iterator of chunks, and generate
+    the root of every game (or every node, if nodes is True) as soon as it is complete. See SGFPushParser.
+    """
+    push_parser = SGFPushParser(parser, encoding, default_encoding, errors, nodes)
+    if hasattr(source, 'read'):
+        while True:
+            chunk = await source.read(chunk_size)
+            if not chunk:
+                break
+            for item in push_parser.feed(chunk):
+                yield item
+    else:
+        async for chunk in source:
+            for item in push_parser.feed(chunk):
+                yield item
+    for item in push_parser.close():
+        yield item
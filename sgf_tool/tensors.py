@@ -0,0 +1,170 @@
+"""
+Export of the main lines of games as NumPy arrays for training pipelines.
+
+Each move of a main line is a row (color, x, y, pass) of an int16 array, and the board before the move is a
+height x width plane of uint8 (EMPTY, BLACK, WHITE as in the position module). The games are replayed with
+position.Board, so captures and setup stones are handled, and the planes are copied from its bytearray into one
+buffer without creating an object per point. A batch of games is stacked into flat arrays with the offsets of each
+game, which write_shards() saves as .npy files (that np.load(mmap_mode='r') maps) or .npz archives.
+
+NumPy is optional: it is only imported when arrays are created. Parse with SGFParser(main_line=True) to skip the
+variations that are not exported anyway.
+"""
+from array import array
+from .node import BaseSGFNode
+from .position import BLACK, WHITE, Board, parse_size
+import os
+import typing
+
+if typing.TYPE_CHECKING:
+    import numpy
+
+MOVE_COLUMNS = ('color', 'x', 'y', 'pass')
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError as error:
+        raise ImportError('The NumPy export requires numpy (pip install numpy)') from error
+    return numpy
+
+
+def main_line(root: BaseSGFNode) -> typing.Generator[BaseSGFNode, None, None]:
+    """
+    Generate the root and its chain of first children.
+    """
+    node = root
+    while node is not None:
+        yield node
+        node = node.get_child(0) if node.get_num_children() > 0 else None
+
+
+def board_size(root: BaseSGFNode) -> typing.Tuple[int, int]:
+    """
+    The (width, height) of a game from the SZ[] property of its root.
+    """
+    return parse_size(root['SZ'][0] if 'SZ' in root and root['SZ'] else None)
+
+
+def _replay(root: BaseSGFNode, moves: array, planes: typing.Optional[bytearray]) -> int:
+    """
+    Replay the main line of a game, appending (color, x, y, pass) of every move to moves and, if planes is given,
+    the points of the board before every move. Returns the number of moves.
+    """
+    width, height = board_size(root)
+    board = Board(width, height)
+    points = board.points
+    count = 0
+    for node in main_line(root):
+        board.apply_setup(node)
+        for tag, color in (('B', BLACK), ('W', WHITE)):
+            if tag not in node:
+                continue
+            values = node[tag]
+            index = board.point(values[0]) if values else None
+            if planes is not None:
+                planes += points
+            if index is None:
+                moves.extend((color, -1, -1, 1))
+            else:
+                moves.extend((color, index % width, index // width, 0))
+            board.play(color, index)
+            count += 1
+    return count
+
+
+def move_array(root: BaseSGFNode) -> 'numpy.ndarray':
+    """
+    The moves of the main line of a game as an (M, 4) int16 array of (color, x, y, pass). x and y are -1 for a pass.
+    """
+    np = _numpy()
+    moves = array('h')
+    count = _replay(root, moves, None)
+    return np.frombuffer(moves, dtype=np.int16).reshape(count, 4).copy()
+
+
+def export_games(roots: typing.Iterable[BaseSGFNode], boards: bool = True) -> typing.Dict[str, 'numpy.ndarray']:
+    """
+    Export the main lines of a batch of games, which must all have the same board size.
+
+    Returns a dict of arrays:
+        moves: (M, 4) int16, the (color, x, y, pass) of the moves of all the games one after the other.
+        boards: (M, height, width) uint8, the board before each move (only if boards is True).
+        offsets: (G + 1,) int64, the moves of game i are moves[offsets[i]:offsets[i + 1]].
+    """
+    np = _numpy()
+    moves = array('h')
+    planes = bytearray() if boards else None
+    offsets = array('q', [0])
+    size = None
+    for root in roots:
+        game_size = board_size(root)
+        if size is None:
+            size = game_size
+        elif game_size != size:
+            raise ValueError(f'Cannot stack a {game_size[0]}x{game_size[1]} game with {size[0]}x{size[1]} games')
+        offsets.append(offsets[-1] + _replay(root, moves, planes))
+
+    width, height = size if size is not None else (19, 19)
+    count = offsets[-1]
+    result = {
+        'moves': np.frombuffer(moves, dtype=np.int16).reshape(count, 4),
+        'offsets': np.frombuffer(offsets, dtype=np.int64),
+    }
+    if boards:
+        result['boards'] = np.frombuffer(planes, dtype=np.uint8).reshape(count, height, width)
+    return result
+
+
+def write_shards(roots: typing.Iterable[BaseSGFNode], directory, games_per_shard: int = 1024, format: str = 'npy', compress: bool = False, prefix: str = 'games', boards: bool = True) -> typing.List[str]:
+    """
+    Export the games in shards of games_per_shard games, see export_games(). Returns the paths of the shards.
+
+    With format 'npy', every array of a shard is saved as '<prefix>-<n>.<array>.npy', which can be memory-mapped;
+    with 'npz', a shard is one '<prefix>-<n>.npz' archive, compressed if compress is True. A shard path without
+    the array suffix is returned for 'npy' shards; load_shard() accepts both.
+    """
+    if format not in ('npy', 'npz'):
+        raise ValueError(f'Unknown shard format {format!r}')
+    np = _numpy()
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    batch = []
+
+    def flush():
+        arrays = export_games(batch, boards)
+        path = os.path.join(directory, f'{prefix}-{len(paths):05d}')
+        if format == 'npy':
+            for name, values in arrays.items():
+                np.save(f'{path}.{name}.npy', values)
+        else:
+            path += '.npz'
+            (np.savez_compressed if compress else np.savez)(path, **arrays)
+        paths.append(path)
+        batch.clear()
+
+    for root in roots:
+        batch.append(root)
+        if len(batch) >= games_per_shard:
+            flush()
+    if batch:
+        flush()
+    return paths
+
+
+def load_shard(path, mmap_mode: typing.Optional[str] = 'r') -> typing.Dict[str, 'numpy.ndarray']:
+    """
+    Load the arrays of a shard written by write_shards(). The arrays of 'npy' shards are memory-mapped with
+    mmap_mode; 'npz' archives are read into memory.
+    """
+    np = _numpy()
+    path = os.fspath(path)
+    if path.endswith('.npz'):
+        with np.load(path) as archive:
+            return {name: archive[name] for name in archive.files}
+    result = {}
+    for name in ('moves', 'boards', 'offsets'):
+        if os.path.exists(f'{path}.{name}.npy'):
+            result[name] = np.load(f'{path}.{name}.npy', mmap_mode=mmap_mode)
+    return result
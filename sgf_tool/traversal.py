@@ -0,0 +1,148 @@
+from .node import BaseSGFNode
+from collections import deque
+import enum
+
+
+class TraversalOrder(enum.Enum):
+    PRE_ORDER = 0
+    POST_ORDER = 1
+    BFS = 2
+
+
+class TraversalEvent(enum.Enum):
+    ENTER = 0
+    LEAVE = 1
+
+
+class Traversal:
+    """
+    Walk a tree with an explicit stack (or queue), in constant amortized time per node and without depth limit.
+
+    Iterating yields (node, depth), or (event, node, depth) if events is True, in which case the tree is walked
+    depth-first and every node is reported when it is entered and when its subtree is done. The children of a node
+    are read when the node is expanded, i.e. after it is yielded in pre-order and BFS, and when it is entered in
+    post-order.
+
+    skip_subtree() prunes the children of the node that was just yielded (pre-order, BFS or an ENTER event; it has no
+    effect in post-order), and stop() ends the traversal. Both can be called from inside the loop or from a visit
+    function.
+
+    Example:
+        traversal = Traversal(root)
+        for node, depth in traversal:
+            if 'C' in node:
+                traversal.skip_subtree()
+    """
+
+    def __init__(self, root: BaseSGFNode, order: TraversalOrder = TraversalOrder.PRE_ORDER, events: bool = False):
+        if events and order is TraversalOrder.BFS:
+            raise ValueError('Events are only available for depth-first traversals.')
+        self.root = root
+        self.order = order
+        self.events = events
+        self._skip = False
+        self._stop = False
+
+    def skip_subtree(self):
+        """
+        Do not visit the descendants of the node that was just yielded. Ignored after a node in post-order or a LEAVE
+        event.
+        """
+        self._skip = True
+
+    def stop(self):
+        """
+        End the traversal after the node that was just yielded.
+        """
+        self._stop = True
+
+    def __iter__(self):
+        if self.events:
+            return self._events()
+        elif self.order is TraversalOrder.PRE_ORDER:
+            return self._pre_order()
+        elif self.order is TraversalOrder.POST_ORDER:
+            return self._post_order()
+        else:
+            return self._bfs()
+
+    def _pre_order(self):
+        nodes = [self.root]
+        depths = [0]
+        while nodes:
+            node = nodes.pop()
+            depth = depths.pop()
+            yield node, depth
+            if self._stop:
+                return
+            if self._skip:
+                self._skip = False
+                continue
+            num_children = node.get_num_children()
+            if num_children == 1:
+                nodes.append(node.get_child(0))
+                depths.append(depth + 1)
+            elif num_children > 1:
+                children = list(node.get_children_iter())
+                children.reverse()
+                nodes.extend(children)
+                depths.extend([depth + 1] * len(children))
+
+    def _post_order(self):
+        # (node, depth, entered): a node is pushed again as entered before its children, and yielded when popped again
+        stack = [(self.root, 0, False)]
+        while stack:
+            node, depth, entered = stack.pop()
+            if entered:
+                yield node, depth
+                if self._stop:
+                    return
+                self._skip = False  # the children were already visited
+                continue
+            stack.append((node, depth, True))
+            num_children = node.get_num_children()
+            if num_children == 1:
+                stack.append((node.get_child(0), depth + 1, False))
+            elif num_children > 1:
+                for child in reversed(list(node.get_children_iter())):
+                    stack.append((child, depth + 1, False))
+
+    def _events(self):
+        enter = TraversalEvent.ENTER
+        leave = TraversalEvent.LEAVE
+        stack = [(self.root, 0, False)]
+        while stack:
+            node, depth, entered = stack.pop()
+            if entered:
+                yield leave, node, depth
+                if self._stop:
+                    return
+                self._skip = False  # the children were already visited
+                continue
+            yield enter, node, depth
+            if self._stop:
+                return
+            stack.append((node, depth, True))
+            if self._skip:
+                self._skip = False
+                continue
+            num_children = node.get_num_children()
+            if num_children == 1:
+                stack.append((node.get_child(0), depth + 1, False))
+            elif num_children > 1:
+                for child in reversed(list(node.get_children_iter())):
+                    stack.append((child, depth + 1, False))
+
+    def _bfs(self):
+        queue = deque([(self.root, 0)])
+        while queue:
+            node, depth = queue.popleft()
+            yield node, depth
+            if self._stop:
+                return
+            if self._skip:
+                self._skip = False
+                continue
+            for child in node.get_children_iter():
+                queue.append((child, depth + 1))
+
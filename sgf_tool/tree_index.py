@@ -0,0 +1,219 @@
+"""
+An index of the positions of the nodes of a tree, for ancestor, depth and path queries without walking the tree.
+
+TreeIndex numbers the nodes in pre-order in one iterative pass. The descendants of a node are then the nodes
+numbered from its entry number to its exit number (the last number of its subtree), so whether a node is an
+ancestor of another is two comparisons. The depth and the move number of every node are stored, and a binary
+lifting table of the 2^k-th ancestors finds the ancestor at any depth and the lowest common ancestor of two nodes
+in O(log n).
+
+A path is the list of the child indices from the root to a node, e.g. [0, 0, 2, 0]; it stays valid as long as the
+children before it are not changed. The index is a snapshot: call rebuild() after the tree is edited.
+"""
+from array import array
+from .node import BaseSGFNode
+import typing
+
+
+class TreeIndex:
+    """
+    Example:
+        index = TreeIndex(root)
+        if index.is_ancestor(variation, node):
+            print(index.depth(node), index.path(node))
+    """
+
+    def __init__(self, root: BaseSGFNode):
+        self.root = root
+        self.rebuild()
+
+    def rebuild(self):
+        """
+        Index the tree again, e.g. after nodes were added or removed. O(n log n) for the binary lifting table,
+        O(n) for the rest.
+        """
+        nodes = []
+        numbers = {}
+        parents = array('l')
+        depths = array('l')
+        moves = array('l')
+        child_indices = array('l')
+        stack = [(self.root, 0, 0)]  # (node, number of the parent, child index)
+        while stack:
+            node, parent, child_index = stack.pop()
+            number = len(nodes)
+            nodes.append(node)
+            numbers[node] = number
+            is_move = 'B' in node or 'W' in node
+            if number == 0:
+                parents.append(0)
+                depths.append(0)
+                moves.append(1 if is_move else 0)
+            else:
+                parents.append(parent)
+                depths.append(depths[parent] + 1)
+                moves.append(moves[parent] + 1 if is_move else moves[parent])
+            child_indices.append(child_index)
+            num_children = node.get_num_children()
+            if num_children == 1:
+                stack.append((node.get_child(0), number, 0))
+            elif num_children > 1:
+                children = list(node.get_children_iter())
+                for index in range(num_children - 1, -1, -1):
+                    stack.append((children[index], number, index))
+
+        count = len(nodes)
+        # subtree sizes bottom-up: the children of a node are numbered after it
+        sizes = array('l', [1]) * count
+        for number in range(count - 1, 0, -1):
+            sizes[parents[number]] += sizes[number]
+        exits = array('l', [number + sizes[number] - 1 for number in range(count)])
+
+        # the children of node i are children[child_offsets[i]:child_offsets[i + 1]], in order
+        child_offsets = array('l', [0]) * (count + 1)
+        for number in range(1, count):
+            child_offsets[parents[number] + 1] += 1
+        for number in range(count):
+            child_offsets[number + 1] += child_offsets[number]
+        children = array('l', [0]) * max(count - 1, 0)
+        for number in range(1, count):
+            children[child_offsets[parents[number]] + child_indices[number]] = number
+
+        # ancestors[k][i] is the 2^k-th ancestor of node i, the root if there is none
+        ancestors = [parents]
+        for _ in range(max(max(depths, default=0).bit_length() - 1, 0)):
+            previous = ancestors[-1]
+            ancestors.append(array('l', [previous[ancestor] for ancestor in previous]))
+
+        self.nodes = nodes
+        self._numbers = numbers
+        self._parents = parents
+        self._depths = depths
+        self._moves = moves
+        self._child_indices = child_indices
+        self._exits = exits
+        self._child_offsets = child_offsets
+        self._children = children
+        self._ancestors = ancestors
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __contains__(self, node: BaseSGFNode) -> bool:
+        return node in self._numbers
+
+    def number(self, node: BaseSGFNode) -> int:
+        """
+        The pre-order number of a node, its entry number in the Euler tour. Raises KeyError if the node was not
+        indexed.
+        """
+        return self._numbers[node]
+
+    def subtree_range(self, node: BaseSGFNode) -> typing.Tuple[int, int]:
+        """
+        The (entry, exit) numbers of a node: index.nodes[entry:exit + 1] is its subtree in pre-order.
+        """
+        number = self._numbers[node]
+        return number, self._exits[number]
+
+    def depth(self, node: BaseSGFNode) -> int:
+        """
+        The number of edges from the root to the node.
+        """
+        return self._depths[self._numbers[node]]
+
+    def move_number(self, node: BaseSGFNode) -> int:
+        """
+        The number of B[] and W[] nodes from the root to the node, both included.
+        """
+        return self._moves[self._numbers[node]]
+
+    def parent(self, node: BaseSGFNode) -> typing.Optional[BaseSGFNode]:
+        """
+        The parent of a node in the indexed tree, None for the root.
+        """
+        number = self._numbers[node]
+        return self.nodes[self._parents[number]] if number > 0 else None
+
+    def is_ancestor(self, ancestor: BaseSGFNode, node: BaseSGFNode) -> bool:
+        """
+        Whether ancestor is node or one of its ancestors, in O(1).
+        """
+        number = self._numbers[ancestor]
+        return number <= self._numbers[node] <= self._exits[number]
+
+    def _lift(self, number: int, distance: int) -> int:
+        ancestors = self._ancestors
+        level = 0
+        while distance:
+            if distance & 1:
+                number = ancestors[level][number]
+            distance >>= 1
+            level += 1
+        return number
+
+    def ancestor_at_depth(self, node: BaseSGFNode, depth: int) -> BaseSGFNode:
+        """
+        The ancestor of a node at the given depth (the node itself at its own depth), in O(log n).
+        """
+        number = self._numbers[node]
+        node_depth = self._depths[number]
+        if not 0 <= depth <= node_depth:
+            raise ValueError(f'No ancestor at depth {depth} for a node at depth {node_depth}')
+        return self.nodes[self._lift(number, node_depth - depth)]
+
+    def lowest_common_ancestor(self, node: BaseSGFNode, other: BaseSGFNode) -> BaseSGFNode:
+        """
+        The deepest node that is an ancestor of both nodes (or one of them), in O(log n).
+        """
+        numbers = self._numbers
+        exits = self._exits
+        first = numbers[node]
+        second = numbers[other]
+        if first <= second <= exits[first]:
+            return node
+        if second <= first <= exits[second]:
+            return other
+        # lift first to the highest ancestor that is not an ancestor of second, its parent is the answer
+        for level in reversed(self._ancestors):
+            ancestor = level[first]
+            if not ancestor <= second <= exits[ancestor]:
+                first = ancestor
+        return self.nodes[self._parents[first]]
+
+    def distance(self, node: BaseSGFNode, other: BaseSGFNode) -> int:
+        """
+        The number of edges between two nodes.
+        """
+        common = self._numbers[self.lowest_common_ancestor(node, other)]
+        depths = self._depths
+        return depths[self._numbers[node]] + depths[self._numbers[other]] - 2 * depths[common]
+
+    def path(self, node: BaseSGFNode) -> typing.List[int]:
+        """
+        The child indices from the root to the node, [] for the root.
+        """
+        number = self._numbers[node]
+        parents = self._parents
+        child_indices = self._child_indices
+        result = []
+        while number > 0:
+            result.append(child_indices[number])
+            number = parents[number]
+        result.reverse()
+        return result
+
+    def resolve(self, path: typing.Iterable[int]) -> BaseSGFNode:
+        """
+        The node at a path returned by path(), in O(len(path)) without walking the children of the nodes. Raises
+        IndexError if the path does not exist.
+        """
+        child_offsets = self._child_offsets
+        children = self._children
+        number = 0
+        for index in path:
+            offset = child_offsets[number]
+            if not 0 <= index < child_offsets[number + 1] - offset:
+                raise IndexError(f'No child {index} at node {number}')
+            number = children[offset + index]
+        return self.nodes[number]
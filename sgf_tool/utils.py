@@ -1,4 +1,5 @@
 from .node import BaseSGFNode
+from .traversal import Traversal, TraversalOrder
 import typing
 from collections import deque
 import functools
@@ -11,62 +12,38 @@ class Algorithm:
         """
         Depth-first search on the tree.
         """
-        Algorithm._dfs(root, visit_func, 0)
-
-    @staticmethod
-    def _dfs(root: BaseSGFNode, visit_func: typing.Callable[[BaseSGFNode, int], None], depth: int):
-        visit_func(root, depth)
-        for child in root.get_children_iter():
-            Algorithm._dfs(child, visit_func, depth + 1)
+        for node, depth in Traversal(root):
+            visit_func(node, depth)
 
     @staticmethod
     def bfs(root: BaseSGFNode, visit_func: typing.Callable[[BaseSGFNode, int], None]):
         """
         Breadth-first search on the tree.
         """
-        queue = deque([(root, 0)])
-        while len(queue) > 0:
-            current, depth = queue.popleft()
-            visit_func(current, depth)
-            for child in current.get_children_iter():
-                queue.append((child, depth + 1))
+        for node, depth in Traversal(root, TraversalOrder.BFS):
+            visit_func(node, depth)
 
     @staticmethod
     def dfs_iterator(root: BaseSGFNode):
         """
         Depth-first search iterator on the tree.
         """
-        stack = [(root, 0)]
-        while len(stack) > 0:
-            current, depth = stack.pop()
-            yield current, depth
-            for child in reversed(list(current.get_children_iter())):
-                stack.append((child, depth + 1))
+        return iter(Traversal(root))
 
     @staticmethod
     def bfs_iterator(root: BaseSGFNode):
         """
         Breadth-first search iterator on the tree.
         """
-        queue = deque([(root, 0)])
-        while len(queue) > 0:
-            current, depth = queue.popleft()
-            yield current, depth
-            for child in current.get_children_iter():
-                queue.append((child, depth + 1))
+        return iter(Traversal(root, TraversalOrder.BFS))
 
     @staticmethod
     def bottom_up_dfs(root: BaseSGFNode, visit_func: typing.Callable[[BaseSGFNode, int], None]):
         """
         Bottom-up depth-first search on the tree.
         """
-        Algorithm._bottom_up_dfs(root, visit_func, 0)
-
-    @staticmethod
-    def _bottom_up_dfs(root: BaseSGFNode, visit_func: typing.Callable[[BaseSGFNode, int], None], depth: int):
-        for child in list(root.get_children_iter()):
-            Algorithm._bottom_up_dfs(child, visit_func, depth + 1)
-        visit_func(root, depth)
+        for node, depth in Traversal(root, TraversalOrder.POST_ORDER):
+            visit_func(node, depth)
 
     @staticmethod
     def bottom_up_bfs(root: BaseSGFNode, visit_func: typing.Callable[[BaseSGFNode, int], None]):
@@ -88,13 +65,7 @@ class Algorithm:
         """
         Bottom-up depth-first search iterator on the tree.
         """
-        yield from Algorithm._bottom_up_dfs_iterator(root, 0)
-
-    @staticmethod
-    def _bottom_up_dfs_iterator(root: BaseSGFNode, depth: int):
-        for child in list(root.get_children_iter()):
-            yield from Algorithm._bottom_up_dfs_iterator(child, depth + 1)
-        yield root, depth
+        return iter(Traversal(root, TraversalOrder.POST_ORDER))
 
     @staticmethod
     def bottom_up_bfs_iterator(root: BaseSGFNode):
@@ -115,7 +86,13 @@ class Algorithm:
     def find_nodes_with_property(root: BaseSGFNode, tag: str, value: str, value_index: int = 0) -> typing.List[BaseSGFNode]:
         """
         Find nodes with a specific property.
+
+        If a PropertyIndex covering the tag is attached to the root, the nodes are looked up in the index.
         """
+        index = getattr(root, 'property_index', None)
+        if index is not None and index.root is root and index.covers(tag):
+            return index.find(tag, value, value_index)
+
         results = []
 
         def visit_func(n, _):
@@ -190,17 +167,100 @@ class Algorithm:
 
     @staticmethod
     def _merge_tree(root: BaseSGFNode, other_root: BaseSGFNode, comparator: typing.Callable[[BaseSGFNode, BaseSGFNode], int], merge_func: typing.Optional[typing.Callable[[BaseSGFNode, BaseSGFNode], None]] = None):
-        # store the children in a list to avoid modifying the tree while merging
-        sorted_nodes = sorted(root.get_children_iter(), key=functools.cmp_to_key(comparator))
-        other_nodes = list(other_root.get_children_iter())
-
-        if merge_func is not None:
-            merge_func(root, other_root)
-
-        # TODO: raise error if children have duplicates
-        for child in other_nodes:
-            index = Algorithm.binary_search(sorted_nodes, child, comparator)
-            if index != -1:
-                Algorithm.merge_tree(sorted_nodes[index], child, comparator, merge_func)
-            elif index == -1:
-                root.add_child(child.detach())
+        # pairs of equal nodes to merge, processed with an explicit stack so that the depth of the trees is not limited
+        stack = [(root, other_root)]
+        while len(stack) > 0:
+            root, other_root = stack.pop()
+
+            # store the children in a list to avoid modifying the tree while merging
+            sorted_nodes = sorted(root.get_children_iter(), key=functools.cmp_to_key(comparator))
+            other_nodes = list(other_root.get_children_iter())
+
+            if merge_func is not None:
+                merge_func(root, other_root)
+
+            # TODO: raise error if children have duplicates
+            matched = []
+            for child in other_nodes:
+                index = Algorithm.binary_search(sorted_nodes, child, comparator)
+                if index != -1:
+                    matched.append((sorted_nodes[index], child))
+                elif index == -1:
+                    root.add_child(child.detach())
+            # merge the matched children in order
+            stack.extend(reversed(matched))
+
+    @staticmethod
+    def move_key(node: BaseSGFNode) -> typing.Hashable:
+        """
+        A key function for merge_trees() matching nodes by their move: ('B', values), ('W', values), or None for a
+        node without a move, which merge_trees() matches by its content instead.
+        """
+        if 'B' in node:
+            return ('B', tuple(node['B']))
+        if 'W' in node:
+            return ('W', tuple(node['W']))
+        return None
+
+    @staticmethod
+    def merge_trees(root: BaseSGFNode, other_roots: typing.Iterable[BaseSGFNode], key: typing.Optional[typing.Callable[[BaseSGFNode], typing.Hashable]] = None, merge_func: typing.Optional[typing.Callable[[BaseSGFNode, BaseSGFNode], None]] = None):
+        """
+        Merge many trees into one tree.
+
+        Like merge_tree(), but nodes are matched by a hashable key instead of a comparator, and any number of trees
+        are merged in one pass, so a whole corpus can be streamed into a single tree. The children of each node of the
+        first tree are looked up in a dict built once per node and kept up to date as children are added, so nodes
+        added from one tree are matched by the following trees. The trees are walked with an explicit stack.
+
+        Args:
+            root (BaseSGFNode): The root node of the tree to merge into.
+            other_roots (Iterable[BaseSGFNode]): The root nodes of the trees to merge. Their nodes that are not
+                matched are moved to the first tree.
+            key (Callable[[BaseSGFNode], Hashable], optional): The key of a node. Nodes with equal keys are merged;
+                children with the key None are only merged if they have the same properties. By default, nodes are
+                matched by their move (see move_key()).
+            merge_func (Callable[[BaseSGFNode, BaseSGFNode], None], optional): A function called with each pair of
+                merged nodes (node of the first tree, node of the other tree), e.g. to count how often a node occurs.
+
+        Raises:
+            ValueError: If the key of a root node differs from the key of the first root.
+        """
+        if key is None:
+            key = Algorithm.move_key
+
+        def child_key(child):
+            value = key(child)
+            if value is None:
+                # e.g. setup or comment nodes for move_key(): only identical nodes are merged
+                return None, tuple(sorted((tag, tuple(child[tag])) for tag in child.get_tags()))
+            return value
+
+        root_key = key(root)
+        children_by_key = {}  # node of the first tree -> {key: child}
+        for other_root in other_roots:
+            if key(other_root) != root_key:
+                raise ValueError("The two roots are not equal.")
+            stack = [(root, other_root)]
+            while len(stack) > 0:
+                node, other_node = stack.pop()
+                if merge_func is not None:
+                    merge_func(node, other_node)
+
+                children = children_by_key.get(node)
+                if children is None:
+                    children = {}
+                    for child in node.get_children_iter():
+                        children.setdefault(child_key(child), child)
+                    children_by_key[node] = children
+
+                matched = []
+                for other_child in list(other_node.get_children_iter()):
+                    other_key = child_key(other_child)
+                    child = children.get(other_key)
+                    if child is None:
+                        node.add_child(other_child.detach())
+                        children[other_key] = other_child
+                    else:
+                        matched.append((child, other_child))
+                # merge the matched children in order
+                stack.extend(reversed(matched))
@@ -0,0 +1,71 @@
+import os
+import threading
+import time
+from sgf_tool import SGFParser
+from sgf_tool.batch import parse_many, summarize
+
+
+def write_games(directory):
+    games = {
+        'short.sgf': '(;GM[1]FF[4]CA[UTF-8]PB[Noir é];B[aa](;W[bb])(;W[cc]C[x\\]y]))',
+        'long.sgf': '(;GM[1]FF[4]' + ';B[aa];W[bb]' * 1500 + ')',
+        'broken.sgf': '(;GM[1];B[aa]',
+        'empty.sgf': '',
+    }
+    paths = {}
+    for name, text in games.items():
+        path = directory / name
+        path.write_text(text, encoding='utf-8')
+        paths[name] = str(path)
+    return paths
+
+
+def lock(root):
+    return threading.Lock()
+
+
+def worker_pid(root):
+    time.sleep(0.05)
+    return os.getpid()
+
+
+def test_work_is_spread_over_the_workers(tmp_path):
+    paths = []
+    for i in range(8):
+        path = tmp_path / f'{i}.sgf'
+        path.write_text('(;GM[1];B[aa])', encoding='utf-8')
+        paths.append(str(path))
+    # fewer files than the default chunksize still use every worker
+    pids = {result.value for result in parse_many(paths, workers=2, func=worker_pid)}
+    assert len(pids) == 2
+    assert os.getpid() not in pids
+
+
+def test_trees_from_workers(tmp_path):
+    paths = write_games(tmp_path)
+    results = {result.path: result for result in parse_many(paths.values(), workers=2, func=None, chunksize=1)}
+    assert len(results) == len(paths)
+    for name in ('short.sgf', 'long.sgf'):
+        result = results[paths[name]]
+        assert result.error is None
+        assert result.value.to_sgf() == SGFParser().parse_file(paths[name]).to_sgf()
+    assert results[paths['broken.sgf']].value is None
+    assert results[paths['broken.sgf']].error.startswith('SGFError')
+    assert results[paths['empty.sgf']] == (paths['empty.sgf'], None, None)
+
+
+def test_same_results_in_process(tmp_path):
+    paths = list(write_games(tmp_path).values())
+    parallel = sorted(parse_many(paths, workers=2, chunksize=1))
+    serial = sorted(parse_many(paths, workers=1))
+    assert parallel == serial
+    assert serial[-1].value == summarize(SGFParser().parse_file(serial[-1].path))
+
+
+def test_unpicklable_result_is_a_file_error(tmp_path):
+    paths = write_games(tmp_path)
+    results = list(parse_many([paths['short.sgf'], paths['long.sgf']], workers=2, func=lock, chunksize=1))
+    assert len(results) == 2
+    for result in results:
+        assert result.value is None
+        assert 'pickle' in result.error
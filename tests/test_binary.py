@@ -0,0 +1,58 @@
+import io
+import pytest
+from sgf_tool import ArenaNodeAllocator, BinaryTree, SGFParser, dump_binary, dumps_binary, load_binary
+from sgf_tool import binary
+from sgf_tool.utils import Algorithm
+from benchmarks.generators import make_comment_heavy, make_main_line, make_nested_variations, make_variation_fan
+
+GAMES = [
+    '(;GM[1]FF[4]CA[UTF-8]PB[Noir é]PW[白];B[aa]C[a \\] b](;W[bb]LB[aa:x][bb:y])(;W[cc]N[])(;W[dd];B[ee]))',
+    '(;GM[1])',
+    make_main_line(3000),
+    make_variation_fan(50, 3),
+    make_nested_variations(5, 2, 2),
+    make_comment_heavy(20, 100),
+]
+
+
+@pytest.mark.parametrize('sgf', GAMES)
+def test_round_trip(sgf):
+    root = SGFParser().parse(sgf)
+    data = dumps_binary(root)
+    assert load_binary(data).to_sgf() == root.to_sgf()
+    assert load_binary(io.BytesIO(data)).to_sgf() == root.to_sgf()
+    tree = BinaryTree(data)
+    assert len(tree) == sum(1 for _ in Algorithm.dfs_iterator(root))
+    assert tree.root.to_sgf() == root.to_sgf()
+    assert load_binary(data, ArenaNodeAllocator()).to_sgf() == root.to_sgf()
+
+
+def test_wide_offsets(monkeypatch):
+    root = SGFParser().parse(GAMES[0])
+    monkeypatch.setattr(binary, 'MAX_NARROW_OFFSET', 0)
+    data = dumps_binary(root)
+    assert binary.HEADER.unpack_from(data)[2] & binary.FLAG_WIDE_OFFSETS
+    assert BinaryTree(data).root.to_sgf() == root.to_sgf()
+    assert load_binary(data).to_sgf() == root.to_sgf()
+    monkeypatch.undo()
+    assert not binary.HEADER.unpack_from(dumps_binary(root))[2] & binary.FLAG_WIDE_OFFSETS
+
+
+def test_open_file(tmp_path):
+    root = SGFParser().parse(GAMES[0])
+    path = tmp_path / 'game.sgfb'
+    with open(path, 'wb') as f:
+        dump_binary(root, f)
+    tree = BinaryTree.open(path)
+    node = tree.root.get_child(0)
+    assert node['C'] == ['a \\] b']
+    assert 'B' in node and 'W' not in node
+    assert [child['W'] for child in node.get_children_iter()] == [['bb'], ['cc'], ['dd']]
+    assert tree.root.to_sgf() == root.to_sgf()
+
+
+def test_bad_data():
+    with pytest.raises(ValueError):
+        BinaryTree(b'')
+    with pytest.raises(ValueError):
+        BinaryTree(b'XXXX' + dumps_binary(SGFParser().parse(GAMES[1]))[4:])
@@ -0,0 +1,99 @@
+import os
+from sgf_tool import ParseCache, SGFParser
+
+COMMENT = 'a long comment ' * 10
+SGF = f'(;GM[1]FF[4]CA[UTF-8]PB[Noir é];B[aa]C[{COMMENT}](;W[bb])(;W[cc]))'
+
+
+def game(i):
+    return f'(;GM[1]GN[{i}];B[aa];W[bb])'
+
+
+def test_miss_and_hit():
+    cache = ParseCache()
+    first = cache.parse(SGF)
+    assert (cache.stats.hits, cache.stats.misses) == (0, 1)
+    second = cache.parse(SGF)
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+    assert first is not second
+    assert first.to_sgf() == second.to_sgf() == SGFParser().parse(SGF).to_sgf()
+    assert cache.parse('') is None
+    assert cache.parse('') is None
+    assert cache.stats.hits == 2
+
+
+def test_miss_returns_a_snapshot():
+    cache = ParseCache()
+    data = SGF.encode('utf-8')
+    miss = cache.parse(data)
+    hit = cache.parse(data)
+    assert type(miss.get_child(0).properties['C']) is list
+    assert type(hit.get_child(0).properties['C']) is list
+    miss['PB'] = ['changed']
+    assert cache.parse(data)['PB'] == ['Noir é']
+
+
+def test_options_are_part_of_the_key():
+    data = SGF.encode('utf-8')
+    full = ParseCache()
+    keys = {
+        full.key(SGF),
+        full.key(data),
+        full.key(data, encoding='latin-1'),
+        ParseCache(SGFParser(main_line=True)).key(data),
+        ParseCache(SGFParser(projection=['B', 'W'])).key(data),
+        ParseCache(SGFParser(lazy_values=True)).key(SGF),
+    }
+    assert len(keys) == 6
+    assert full.parse(data, encoding='latin-1')['PB'] == ['Noir Ã©']
+    assert full.parse(data)['PB'] == ['Noir é']
+
+
+def test_projection_and_main_line_are_not_mixed(tmp_path):
+    directory = str(tmp_path)
+    main_line = ParseCache(SGFParser(main_line=True), directory=directory).parse(SGF)
+    assert main_line.get_child(0).get_num_children() == 1
+    full = ParseCache(directory=directory).parse(SGF)
+    assert full.get_child(0).get_num_children() == 2
+
+
+def test_lru_eviction():
+    cache = ParseCache()
+    cache.parse(game(0))
+    entry_size = cache.size
+    cache = ParseCache(max_bytes=entry_size * 2)
+    cache.parse(game(0))
+    cache.parse(game(1))
+    cache.parse(game(0))  # most recently used
+    cache.parse(game(2))  # evicts game 1
+    assert cache.stats.evictions == 1
+    assert cache.size <= cache.max_bytes
+    cache.parse(game(0))
+    assert cache.stats.hits == 2
+    cache.parse(game(1))
+    assert cache.stats.misses == 4
+
+
+def test_disk_tier(tmp_path):
+    directory = str(tmp_path)
+    cache = ParseCache(directory=directory)
+    cache.parse(SGF)
+    assert cache.stats.disk_writes == 1
+    assert [name for name in os.listdir(directory) if name.endswith('.sgfb')] == [f'{cache.key(SGF)}.sgfb']
+
+    other = ParseCache(directory=directory)
+    root = other.parse(SGF)
+    assert (other.stats.hits, other.stats.disk_hits, other.stats.misses) == (1, 1, 0)
+    assert root.to_sgf() == SGFParser().parse(SGF).to_sgf()
+    other.clear()
+    other.parse(SGF)
+    assert other.stats.disk_hits == 2
+
+
+def test_parse_file(tmp_path):
+    path = tmp_path / 'game.sgf'
+    path.write_bytes(SGF.encode('utf-8'))
+    cache = ParseCache()
+    assert cache.parse_file(path).to_sgf() == SGFParser().parse(SGF).to_sgf()
+    assert cache.parse_file(path) is not None
+    assert cache.stats.hits == 1
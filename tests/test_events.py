@@ -0,0 +1,66 @@
+import pytest
+from sgf_tool import SGFError, SGFEventType, SGFHandler, SGFParser, iter_events, parse_events
+from benchmarks.generators import make_collection, make_nested_variations
+
+E = SGFEventType
+
+
+def test_nested_variations():
+    assert list(iter_events('(;A[1](;B[1])(;C[1][2]D[]))')) == [
+        (E.GAME_START, None, None),
+        (E.NODE_START, None, None),
+        (E.PROPERTY, 'A', ['1']),
+        (E.VARIATION_START, None, None),
+        (E.NODE_START, None, None),
+        (E.PROPERTY, 'B', ['1']),
+        (E.VARIATION_END, None, None),
+        (E.VARIATION_START, None, None),
+        (E.NODE_START, None, None),
+        (E.PROPERTY, 'C', ['1', '2']),
+        (E.PROPERTY, 'D', ['']),
+        (E.VARIATION_END, None, None),
+        (E.GAME_END, None, None),
+    ]
+
+
+class TreeBuilder(SGFHandler):
+    """
+    Rebuild the SGF text of the games from the events, like the serializer writes it.
+    """
+
+    def __init__(self):
+        self.games = []
+        self.parts = []
+
+    def game_end(self):
+        self.games.append(''.join(self.parts))
+        self.parts = []
+
+    def variation_start(self):
+        self.parts.append('(')
+
+    def variation_end(self):
+        self.parts.append(')')
+
+    def node_start(self):
+        self.parts.append(';')
+
+    def property(self, tag, values):
+        self.parts.append(f'{tag}[{"][".join(values)}]')
+
+
+@pytest.mark.parametrize('sgf', [make_nested_variations(3, 3, 2), make_collection(3, 20)])
+def test_same_games_as_the_parser(sgf):
+    builder = TreeBuilder()
+    parse_events(sgf, builder)
+    assert builder.games == [root.to_sgf() for root in SGFParser().parse_collection(sgf)]
+    bytes_builder = TreeBuilder()
+    parse_events(sgf.encode('utf-8'), bytes_builder)
+    assert bytes_builder.games == builder.games
+
+
+def test_errors():
+    with pytest.raises(SGFError):
+        list(iter_events('(;A[1]))'))
+    with pytest.raises(SGFError):
+        list(iter_events('(;A[1]'))
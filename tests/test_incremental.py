@@ -0,0 +1,82 @@
+import random
+import pytest
+from sgf_tool import LexicalError, SGFError, SGFParser
+from sgf_tool.incremental import SGFDocument
+from sgf_tool.utils import Algorithm
+from benchmarks.generators import make_main_line, make_nested_variations
+
+PIECES = [';', '(', ')', '[', ']', 'C[x]', ';B[aa]', '(;W[bb])', ' ', '\\', 'AB', 'x', ')(', '\n', 'z', 'z', 'z', '']
+
+
+def full_parse(text):
+    try:
+        root = SGFParser().parse(text)
+    except (LexicalError, SGFError) as e:
+        return type(e), e.message, e.start, e.end
+    except RuntimeError as e:
+        # a second game
+        return type(e), str(e)
+    return root.to_sgf() if root is not None else None
+
+
+def nodes(root):
+    return [node for node, _ in Algorithm.dfs_iterator(root)] if root is not None else []
+
+
+def test_edit_in_value_keeps_nodes():
+    document = SGFDocument('(;GM[1];B[pd];W[dd])')
+    node = document.root.get_child(0)
+    assert document.edit(13, 0, 'C[hello]') is document.root
+    assert document.root.get_child(0) is node
+    assert node['C'] == ['hello']
+    document.edit(10, 2, 'qq')
+    assert node['B'] == ['qq']
+    assert document.root.to_sgf() == ';GM[1];B[qq]C[hello];W[dd]'
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_random_edits_match_full_parse(seed):
+    rng = random.Random(seed)
+    for trial in range(40):
+        text = make_nested_variations(rng.randint(1, 3), rng.randint(1, 3), rng.randint(1, 3), seed=seed * 100 + trial)
+        document = SGFDocument(text)
+        for _ in range(8):
+            old = document.text
+            offset = rng.randint(0, len(old))
+            deleted = min(rng.choice([0, 0, 1, 2, 5]), len(old) - offset)
+            inserted = rng.choice(PIECES)
+            new = old[:offset] + inserted + old[offset + deleted:]
+            old_nodes = set(map(id, nodes(document.root)))
+            expected = full_parse(new)
+            try:
+                root = document.edit(offset, deleted, inserted)
+                result = root.to_sgf() if root is not None else None
+            except (LexicalError, SGFError) as e:
+                result = type(e), e.message, e.start, e.end
+            except RuntimeError as e:
+                result = type(e), str(e)
+            assert document.text == new
+            assert result == expected, (old, offset, deleted, inserted)
+            if document.root is None:
+                continue
+
+            fresh = SGFDocument(new)
+            assert (document._starts, document._ends) == (fresh._starts, fresh._ends)
+            assert (document._opens, document._closes) == (fresh._opens, fresh._closes)
+            assert list(map(id, document._nodes)) == list(map(id, nodes(document.root)))
+            # the nodes outside the parsed region are the nodes of the old tree
+            start, end = document.last_region
+            for node, position in zip(document._nodes, document._starts):
+                if not start <= position < end:
+                    assert id(node) in old_nodes
+
+
+def test_main_line_edits_are_local():
+    text = make_main_line(2000)
+    document = SGFDocument(text)
+    last = nodes(document.root)[-1]
+    offset = text.index(';B[', len(text) // 2)
+    document.edit(offset, 0, ';W[aa]')
+    assert document.last_region[1] - document.last_region[0] < 100
+    assert nodes(document.root)[-1] is last
+    assert document.root.to_sgf() == SGFParser().parse(document.text).to_sgf()
@@ -0,0 +1,18 @@
+from sgf_tool import SGFParser
+from sgf_tool.instrumentation import ParseStats
+
+SGF = '(;GM[1]FF[4]\n;B[aa] C[]\n(;W[bb];B[cc])(;W[dd])(;W[ee]))'
+
+
+def test_parse_stats():
+    stats = ParseStats()
+    parser = SGFParser(stats=stats)
+    parser.parse(SGF)
+    parser.parse(SGF)
+    counts = stats.as_dict()
+    assert counts['tokens_by_type'] == {
+        'LEFT_PAREN': 8, 'RIGHT_PAREN': 8, 'SEMICOLON': 12, 'TAG': 16, 'EMPTY_VALUE': 2, 'VALUE': 14,
+    }
+    assert (counts['parses'], counts['nodes'], counts['properties'], counts['values']) == (2, 12, 16, 16)
+    assert (counts['max_depth'], counts['max_variation_depth'], counts['max_fan_out']) == (3, 2, 3)
+    assert counts['bytes'] == 2 * len(SGF)
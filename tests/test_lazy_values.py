@@ -0,0 +1,19 @@
+from sgf_tool import SGFParser
+from sgf_tool.node import EAGER_VALUE_LENGTH, LazyValues
+
+LONG = 'x' * (EAGER_VALUE_LENGTH + 1)
+SGF = f'(;GM[1]FF[4]CA[UTF-8];B[aa]C[{LONG}];W[bb]LB[aa:x][bb:y]C[short é])'
+
+
+def test_only_long_values_are_deferred():
+    for root in (SGFParser(lazy_values=True).parse(SGF), SGFParser().parse_bytes(SGF.encode('utf-8'))):
+        first = root.get_child(0)
+        assert type(first.properties['B']) is list
+        assert type(first.properties['C']) is LazyValues
+        assert type(first.get_child(0).properties['C']) is list
+
+
+def test_same_tree_as_eager_parse():
+    expected = SGFParser().parse(SGF).to_sgf()
+    assert SGFParser(lazy_values=True).parse(SGF).to_sgf() == expected
+    assert SGFParser().parse_bytes(SGF.encode('utf-8')).to_sgf() == expected
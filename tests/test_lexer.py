@@ -0,0 +1,60 @@
+import re
+import pytest
+from sgf_tool import LexicalError, SGFLexer, SGFTokenType
+from sgf_tool.lexer import SGFTokenRules
+from benchmarks.generators import make_collection, make_comment_heavy, make_nested_variations
+
+INPUTS = [
+    '(;GM[1]FF[4]\n PB[Black]\tC[a \\] b\nc];B[aa]\n(;W[bb]N[])(;W[cc]LB[aa:x][bb:y]))  ',
+    '(;C[(;)];B[])',
+    make_nested_variations(4, 3, 2),
+    make_comment_heavy(10, 200),
+    make_collection(3, 10),
+]
+
+
+def reference_tokens(sgf):
+    """
+    The token stream of the original lexer, which tried the rules one by one.
+    """
+    rules = SGFTokenRules
+    if isinstance(sgf, bytes):
+        rules = [(token_type, re.compile(pattern.pattern.encode('ascii'))) for token_type, pattern in rules]
+    index = 0
+    tokens = []
+    while index < len(sgf):
+        for token_type, pattern in rules:
+            match = pattern.match(sgf, index)
+            if match:
+                tokens.append((token_type, index, match.end()))
+                index = match.end()
+                break
+        else:
+            raise LexicalError('Invalid character', index, index + 1)
+    return tokens
+
+
+def next_tokens(lexer):
+    tokens = []
+    while (token := lexer.next_token()) is not None:
+        assert token.value == lexer.sgf[token.start:token.end]
+        tokens.append((token.type, token.start, token.end))
+    return tokens
+
+
+@pytest.mark.parametrize('sgf', INPUTS)
+def test_same_token_stream(sgf):
+    expected = reference_tokens(sgf)
+    assert list(SGFLexer(sgf).tokenize(skip_ignore=False)) == expected
+    assert list(SGFLexer(sgf.encode('utf-8')).tokenize(skip_ignore=False)) == reference_tokens(sgf.encode('utf-8'))
+    assert next_tokens(SGFLexer(sgf)) == expected
+    assert list(SGFLexer(sgf).tokenize()) == [token for token in expected if token[0] is not SGFTokenType.IGNORE]
+
+
+@pytest.mark.parametrize('sgf', ['(;B[aa]?)', '(;B[aa', '(;B[aa];C[x\\])'])
+def test_same_errors(sgf):
+    with pytest.raises(LexicalError) as expected:
+        reference_tokens(sgf)
+    with pytest.raises(LexicalError) as error:
+        list(SGFLexer(sgf).tokenize())
+    assert (error.value.start, error.value.end) == (expected.value.start, expected.value.end)
@@ -0,0 +1,32 @@
+import pytest
+from sgf_tool import LexicalError, SGFError, SGFParser
+from sgf_tool.tensors import main_line
+from benchmarks.generators import make_collection, make_main_line, make_nested_variations, make_variation_fan
+
+TRICKY = '(;GM[1]C[root (;)];B[aa](;W[bb]C[x])(;W[cc]C[a \\] ( ; ) b](;B[dd])(;B[ee]))\n (;W[ff]N[]))'
+INPUTS = [TRICKY, make_nested_variations(4, 3, 2), make_variation_fan(30, 3), make_main_line(200)]
+
+
+def main_line_sgf(root):
+    return ''.join(str(node) for node in main_line(root))
+
+
+@pytest.mark.parametrize('sgf', INPUTS)
+def test_same_as_the_main_line_of_the_full_tree(sgf):
+    expected = main_line_sgf(SGFParser().parse(sgf))
+    root = SGFParser(main_line=True).parse(sgf)
+    assert root.to_sgf() == expected
+    assert SGFParser(main_line=True).parse_bytes(sgf.encode('utf-8')).to_sgf() == expected
+
+
+def test_collection():
+    sgf = make_collection(3, 10).replace(')\n', '(;B[aa])(;W[bb]))\n', 1)
+    full = [main_line_sgf(root) for root in SGFParser().parse_collection(sgf)]
+    assert [root.to_sgf() for root in SGFParser(main_line=True).parse_collection(sgf)] == full
+
+
+def test_errors_in_skipped_variations():
+    with pytest.raises(LexicalError):
+        SGFParser(main_line=True).parse('(;GM[1](;B[aa])(;B[bb]?))')
+    with pytest.raises(SGFError):
+        SGFParser(main_line=True).parse('(;GM[1](;B[aa])(;B[bb]')
@@ -0,0 +1,25 @@
+from sgf_tool import SGFParser
+from sgf_tool.utils import Algorithm
+
+
+def parse(sgf):
+    return SGFParser().parse(sgf)
+
+
+def test_merge_trees_matches_moves():
+    root = parse('(;GM[1]PB[a];B[aa];W[bb])')
+    counts = {}
+
+    def count(node, other):
+        counts[id(node)] = counts.get(id(node), 1) + 1
+
+    Algorithm.merge_trees(root, [parse('(;GM[1]PB[b];B[aa](;W[bb])(;W[cc]))'), parse('(;GM[1];B[dd])')], merge_func=count)
+    assert root.to_sgf() == parse('(;GM[1]PB[a](;B[aa](;W[bb])(;W[cc]))(;B[dd]))').to_sgf()
+    assert counts[id(root)] == 3
+    assert counts[id(root.get_child(0))] == 2
+
+
+def test_merge_trees_keeps_different_nodes_without_moves():
+    root = parse('(;GM[1];AB[aa];B[cc])')
+    Algorithm.merge_trees(root, [parse('(;GM[1];AB[bb];B[cc])'), parse('(;GM[1];AB[aa];B[dd])')])
+    assert root.to_sgf() == parse('(;GM[1](;AB[aa](;B[cc])(;B[dd]))(;AB[bb];B[cc]))').to_sgf()
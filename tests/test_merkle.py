@@ -0,0 +1,80 @@
+import pytest
+from sgf_tool import SGFNode, SGFParser, diff_trees, group_duplicates, same_subtree, subtree_hash, unique_trees
+from benchmarks.generators import make_nested_variations
+
+TREE = '(;GM[1]SZ[19];B[aa](;W[bb];B[cc])(;W[dd]C[x])(;W[ee]))'
+
+
+def parse(sgf):
+    return SGFParser().parse(sgf)
+
+
+def make_node(tag, value):
+    node = SGFNode()
+    node[tag] = [value]
+    return node
+
+
+def test_equal_trees_have_equal_hashes():
+    sgf = make_nested_variations(3, 3, 2)
+    assert subtree_hash(parse(sgf)) == subtree_hash(parse(sgf))
+    assert subtree_hash(parse(sgf)) != subtree_hash(parse(make_nested_variations(3, 3, 2, seed=1)))
+    # the order of the tags does not matter, the order of the children does
+    assert same_subtree(parse('(;GM[1]SZ[19])'), parse('(;SZ[19]GM[1])'))
+    assert not same_subtree(parse('(;GM[1](;B[aa])(;B[bb]))'), parse('(;GM[1](;B[bb])(;B[aa]))'))
+
+
+@pytest.mark.parametrize('edit, expected', [
+    (lambda root: root.get_child(0).get_child(1).__setitem__('C', ['y']), '(;GM[1]SZ[19];B[aa](;W[bb];B[cc])(;W[dd]C[y])(;W[ee]))'),
+    (lambda root: root.get_child(0).get_child(1).__delitem__('C'), '(;GM[1]SZ[19];B[aa](;W[bb];B[cc])(;W[dd])(;W[ee]))'),
+    (lambda root: root.get_child(0).get_child(2).detach(), '(;GM[1]SZ[19];B[aa](;W[bb];B[cc])(;W[dd]C[x]))'),
+    (lambda root: root.get_child(0).get_child(0).get_child(0).add_child(make_node('W', 'ff')), '(;GM[1]SZ[19];B[aa](;W[bb];B[cc];W[ff])(;W[dd]C[x])(;W[ee]))'),
+    (lambda root: root.get_child(0).get_child(2).add_child(root.get_child(0).get_child(0).detach()), '(;GM[1]SZ[19];B[aa](;W[dd]C[x])(;W[ee];W[bb];B[cc]))'),
+])
+def test_hash_is_invalidated_by_edits(edit, expected):
+    root = parse(TREE)
+    hashes = [subtree_hash(root), subtree_hash(root.get_child(0))]
+    edit(root)
+    # the cached hashes of the ancestors were reset
+    assert subtree_hash(root) != hashes[0]
+    assert subtree_hash(root.get_child(0)) != hashes[1]
+    assert subtree_hash(root) == subtree_hash(parse(expected))
+
+
+def test_detached_subtree_keeps_its_hash():
+    root = parse(TREE)
+    variation = root.get_child(0).get_child(0)
+    value = subtree_hash(variation)
+    variation.detach()
+    assert subtree_hash(variation) == value == subtree_hash(parse('(;W[bb];B[cc])'))
+
+
+def test_unique_trees_and_group_duplicates():
+    roots = [parse(TREE), parse('(;GM[1])'), parse(TREE), parse('(;GM[1])'), parse('(;GM[1];B[aa])')]
+    assert list(unique_trees(roots)) == [roots[0], roots[1], roots[4]]
+    assert group_duplicates(roots) == [[roots[0], roots[2]], [roots[1], roots[3]]]
+
+
+def test_diff_trees():
+    old = parse(TREE)
+    new = parse('(;GM[1]SZ[9];B[aa](;W[dd]C[x])(;W[bb];B[cc];W[ff])(;W[gg]))')
+    differences = {(d.kind, d.old_path, d.new_path) for d in diff_trees(old, new)}
+    assert differences == {
+        ('changed', (), ()),
+        ('moved', (0, 1), (0, 0)),
+        ('added', None, (0, 1, 0, 0)),
+        ('changed', (0, 2), (0, 2)),
+    }
+
+
+def test_diff_trees_removed_and_added():
+    old = parse('(;GM[1](;B[aa])(;B[bb])(;B[cc]))')
+    new = parse('(;GM[1](;B[cc])(;B[aa]))')
+    differences = diff_trees(old, new)
+    assert [(d.kind, d.old_path, d.new_path) for d in differences] == [
+        ('moved', (0,), (1,)), ('moved', (2,), (0,)), ('removed', (1,), None),
+    ]
+    assert differences[-1].old is old.get_child(1) and differences[-1].new is None
+    differences = diff_trees(new, old)
+    assert [(d.kind, d.old_path, d.new_path) for d in differences if d.kind == 'added'] == [('added', None, (1,))]
+    assert diff_trees(old, parse('(;GM[1](;B[aa])(;B[bb])(;B[cc]))')) == []
@@ -0,0 +1,93 @@
+import random
+import pytest
+from sgf_tool import SGFNode
+
+
+def check(parent, expected):
+    """
+    The links of the children of parent agree with each other and with the expected list.
+    """
+    assert parent.get_num_children() == len(expected)
+    assert list(parent.get_children_iter()) == expected
+    assert [parent.get_child(i) for i in range(len(expected))] == expected
+    assert parent.child is (expected[0] if expected else None)
+    assert parent.last_child is (expected[-1] if expected else None)
+    for i, child in enumerate(expected):
+        assert child.parent is parent
+        assert child.prev_sibling is (expected[i - 1] if i > 0 else None)
+        assert child.next_sibling is (expected[i + 1] if i + 1 < len(expected) else None)
+
+
+def make_node(name):
+    node = SGFNode()
+    node['N'] = [name]
+    return node
+
+
+def test_add_and_detach():
+    parent = make_node('p')
+    children = [make_node(str(i)) for i in range(4)]
+    for child in children:
+        parent.add_child(child)
+    check(parent, children)
+    assert children[1].detach() is children[1]
+    assert children[1].parent is None and children[1].prev_sibling is None and children[1].next_sibling is None
+    check(parent, [children[0], children[2], children[3]])
+    children[3].detach()
+    children[0].detach()
+    check(parent, [children[2]])
+    children[2].detach()
+    check(parent, [])
+    assert parent.get_child(0) is None
+
+
+def test_add_child_moves_a_node():
+    first = make_node('a')
+    second = make_node('b')
+    child = make_node('c')
+    first.add_child(child)
+    second.add_child(child)
+    check(first, [])
+    check(second, [child])
+
+
+def test_value_must_not_be_str():
+    with pytest.raises(ValueError):
+        make_node('a')['C'] = 'text'
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_random_operations(seed):
+    rng = random.Random(seed)
+    parents = [make_node(f'p{i}') for i in range(3)]
+    expected = {id(parent): [] for parent in parents}
+    nodes = [make_node(str(i)) for i in range(20)]
+    for _ in range(300):
+        node = rng.choice(nodes)
+        parent = rng.choice(parents)
+        if rng.random() < 0.3 and parent.get_num_children() > 0:
+            # read from the middle so that the list of children is cached
+            index = rng.randrange(parent.get_num_children())
+            assert parent.get_child(index) is expected[id(parent)][index]
+        elif rng.random() < 0.5:
+            if node.parent is not None:
+                expected[id(node.parent)].remove(node)
+            parent.add_child(node)
+            expected[id(parent)].append(node)
+        elif node.parent is not None:
+            expected[id(node.parent)].remove(node)
+            node.detach()
+        for other in parents:
+            check(other, expected[id(other)])
+
+
+def test_detach_keeps_the_list_of_children():
+    parent = make_node('p')
+    children = [make_node(str(i)) for i in range(5)]
+    for child in children:
+        parent.add_child(child)
+    assert parent.get_child(2) is children[2]
+    cached = parent._children
+    children[2].detach()
+    assert parent._children is cached
+    assert parent.get_child(2) is children[3]
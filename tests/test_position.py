@@ -0,0 +1,69 @@
+from sgf_tool import SGFParser
+from sgf_tool.position import BLACK, EMPTY, WHITE, Board, PositionIndex, parse_size
+
+
+def follow(root, *indices):
+    node = root
+    for index in indices:
+        node = node.get_child(index)
+    return node
+
+
+def test_capture_and_undo():
+    board = Board(5)
+    board.play(BLACK, board.point('ba'))
+    board.play(BLACK, board.point('ab'))
+    board.play(WHITE, board.point('aa'))  # suicide, removed
+    assert board.points[board.point('aa')] == EMPTY
+    board.play(BLACK, board.point('cb'))
+    white = board.point('bb')
+    board.play(WHITE, white)
+    before = (bytes(board.points), board.hash)
+    changes = board.play(BLACK, board.point('bc'))  # captures bb
+    assert board.points[white] == EMPTY
+    assert board.points[board.point('bc')] == BLACK
+    board.undo(changes)
+    assert (bytes(board.points), board.hash) == before
+    assert board.points[white] == WHITE
+
+
+def test_hash_depends_only_on_the_stones():
+    first = Board(9)
+    second = Board(9)
+    for point in ('cc', 'gg'):
+        first.play(BLACK, first.point(point))
+    for point in ('gg', 'cc'):
+        second.play(BLACK, second.point(point))
+    assert first.hash == second.hash and first.hash != 0
+    first.play(WHITE, None)  # pass
+    assert first.hash == second.hash
+
+
+def test_setup_and_sizes():
+    board = Board(*parse_size('7:5'))
+    assert (board.width, board.height) == (7, 5)
+    root = SGFParser().parse('(;SZ[7:5]AB[aa:bb]AW[ee])')
+    board.apply(root)
+    assert sum(1 for point in board.points if point == BLACK) == 4
+    assert board.points[board.point('ee')] == WHITE
+
+
+def test_transpositions():
+    root = SGFParser().parse('(;GM[1]SZ[9](;B[cc];W[gg];B[cg])(;B[cg];W[gg];B[cc])(;B[cc];W[gc];B[cg]))')
+    index = PositionIndex(root)
+    first = follow(root, 0, 0, 0)
+    second = follow(root, 1, 0, 0)
+    third = follow(root, 2, 0, 0)
+    assert index.transpositions(first) == [second]
+    assert index.canonical(second) is first
+    assert index.hash_of(third) != index.hash_of(first)
+    assert [first, second] in list(index.duplicates())
+    assert index.nodes_for(index.hash_of(root)) == [root]
+
+
+def test_side_to_move():
+    root = SGFParser().parse('(;GM[1]SZ[9](;B[cc];W[gg];B[cg];W[tt])(;B[cg];W[gg];B[cc]))')
+    after_pass = follow(root, 0, 0, 0, 0)
+    other = follow(root, 1, 0, 0)
+    assert PositionIndex(root).hash_of(after_pass) != PositionIndex(root).hash_of(other)
+    assert PositionIndex(root, include_side_to_move=False).transpositions(other) == [follow(root, 0, 0, 0), after_pass]
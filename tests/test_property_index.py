@@ -0,0 +1,42 @@
+from sgf_tool import PropertyIndex, SGFParser
+from sgf_tool.node import LazyValues
+from sgf_tool.utils import Algorithm
+
+SGF = '(;GM[1];B[aa](;W[bb];B[cc])(;W[dd];B[cc])(;W[ee]C[x];B[cc]))'
+
+
+def parents(nodes):
+    return [node.get_parent()['W'][0] for node in nodes]
+
+
+def test_index_lists_nodes_in_pre_order():
+    plain = SGFParser().parse(SGF)
+    expected = Algorithm.find_nodes_with_property(plain, 'B', 'cc')
+    assert parents(expected) == ['bb', 'dd', 'ee']
+
+    indexed = SGFParser(property_index=True).parse(SGF)
+    assert isinstance(indexed.property_index, PropertyIndex)
+    assert parents(Algorithm.find_nodes_with_property(indexed, 'B', 'cc')) == parents(expected)
+
+
+def test_index_follows_edits():
+    root = SGFParser(property_index=True).parse(SGF)
+    root.get_child(0).get_child(1).detach()
+    assert parents(Algorithm.find_nodes_with_property(root, 'B', 'cc')) == ['bb', 'ee']
+    root.get_child(0).get_child(0)['W'] = ['ff']
+    assert Algorithm.find_nodes_with_property(root, 'W', 'bb') == []
+    assert len(Algorithm.find_nodes_with_property(root, 'W', 'ff')) == 1
+
+
+def test_index_keeps_lazy_values():
+    comment = 'a long comment ' * 10
+    sgf = f'(;GM[1]CA[UTF-8];B[aa]C[{comment}];W[bb]C[{comment}])'
+    for root in (SGFParser(property_index=True).parse_bytes(sgf.encode('utf-8')),
+                 SGFParser(lazy_values=True, property_index=True).parse(sgf)):
+        first = root.get_child(0)
+        assert len(Algorithm.find_nodes_with_property(root, 'C', comment)) == 2
+        assert type(first.properties['C']) is LazyValues
+        first['C'] = ['short']
+        assert Algorithm.find_nodes_with_property(root, 'C', comment) == [first.get_child(0)]
+        first.get_child(0).detach()
+        assert Algorithm.find_nodes_with_property(root, 'C', comment) == []
@@ -0,0 +1,49 @@
+import pytest
+from sgf_tool import SGFDiagnosticCode, SGFParser
+from benchmarks.generators import make_nested_variations
+
+PARSERS = [
+    ('str', SGFParser(), str),
+    ('lazy', SGFParser(lazy_values=True), str),
+    ('bytes', SGFParser(), lambda sgf: sgf.encode('utf-8')),
+]
+
+
+def codes(diagnostics):
+    return [diagnostic.code for diagnostic in diagnostics]
+
+
+@pytest.mark.parametrize('name, parser, convert', PARSERS)
+def test_valid_input(name, parser, convert):
+    sgf = make_nested_variations(3, 2, 2)
+    root, diagnostics = parser.parse_tolerant(convert(sgf))
+    assert diagnostics == []
+    assert root.to_sgf() == SGFParser().parse(sgf).to_sgf()
+
+
+@pytest.mark.parametrize('name, parser, convert', PARSERS)
+def test_unescaped_bracket(name, parser, convert):
+    root, diagnostics = parser.parse_tolerant(convert('(;C[see [1]] for more]AB[aa][bb];B[aa])'))
+    assert codes(diagnostics) == [SGFDiagnosticCode.UNESCAPED_BRACKET] * 2
+    assert root['C'] == ['see [1\\]\\] for more']
+    assert root['AB'] == ['aa', 'bb']
+    # the repaired tree is valid SGF
+    text = root.to_sgf()
+    assert text == ';C[see [1\\]\\] for more]AB[aa][bb];B[aa]'
+    assert SGFParser().parse(f'({text})').to_sgf() == text
+
+
+@pytest.mark.parametrize('name, parser, convert', PARSERS)
+def test_repaired_value_among_others(name, parser, convert):
+    long = 'x' * 100
+    root, _ = parser.parse_tolerant(convert(f'(;C[{long}][a]b]][{long}];B[aa])'))
+    assert root['C'] == [long, 'a\\]b\\]', long]
+
+
+@pytest.mark.parametrize('name, parser, convert', PARSERS)
+def test_damaged_input(name, parser, convert):
+    root, diagnostics = parser.parse_tolerant(convert('(;GM[1];B[aa]?;W[bb](;B[cc]'))
+    unmatched = SGFDiagnosticCode.UNMATCHED_LEFT_PAREN
+    assert codes(diagnostics) == [unmatched, SGFDiagnosticCode.INVALID_CHARACTER, unmatched]
+    assert [(diagnostic.start, diagnostic.end) for diagnostic in diagnostics] == [(0, 1), (13, 14), (20, 21)]
+    assert root.to_sgf() == ';GM[1];B[aa];W[bb];B[cc]'
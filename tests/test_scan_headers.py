@@ -0,0 +1,46 @@
+import pytest
+from sgf_tool import SGFError, SGFParser, scan_headers, scan_headers_file
+from sgf_tool.utils import Algorithm
+from benchmarks.generators import make_collection, make_comment_heavy, make_main_line
+
+HEADER = '(;GM[1]FF[4]CA[UTF-8]SZ[19]PB[Noir é]PW[White]AB[aa][bb]C[a \\] b]'
+INPUTS = [HEADER + ';B[cc])', HEADER + '(;B[cc])(;B[dd]))', make_main_line(500), make_comment_heavy(20, 100), make_collection(3, 10)]
+
+
+def root_properties(root):
+    return {tag: list(root[tag]) for tag in root.get_tags()}
+
+
+@pytest.mark.parametrize('sgf', INPUTS)
+def test_same_properties_as_a_full_parse(sgf):
+    root = next(SGFParser().parse_collection(sgf))
+    assert scan_headers(sgf) == root_properties(root)
+    assert scan_headers(sgf.encode('utf-8')) == root_properties(root)
+    assert scan_headers(sgf, ['PB', 'SZ', 'XX']) == {tag: root[tag] for tag in ('PB', 'SZ') if tag in root}
+
+
+def test_no_game_and_rest_not_read():
+    assert scan_headers('') is None
+    assert scan_headers('  ') is None
+    # errors after the root node are not detected
+    assert scan_headers(HEADER + ';B[cc]?)') == root_properties(SGFParser().parse(HEADER + ';B[cc])'))
+    with pytest.raises(SGFError):
+        scan_headers('(GM[1];B[aa])')
+
+
+def test_file_and_encoding(tmp_path):
+    path = tmp_path / 'game.sgf'
+    path.write_bytes('(;CA[ISO-8859-1]PB[Noir é];B[aa])'.encode('iso-8859-1'))
+    assert scan_headers_file(path, ['PB']) == {'PB': ['Noir é']}
+
+
+@pytest.mark.parametrize('sgf', INPUTS)
+def test_projection(sgf):
+    tags = ['B', 'W', 'SZ']
+    full = [node for node, _ in Algorithm.dfs_iterator(next(SGFParser().parse_collection(sgf)))]
+    projected = [node for node, _ in Algorithm.dfs_iterator(next(SGFParser(projection=tags).parse_collection(sgf)))]
+    assert len(projected) == len(full)
+    for node, other in zip(full, projected):
+        assert root_properties(other) == {tag: node[tag] for tag in node.get_tags() if tag in tags}
+    root = next(SGFParser(projection=tags).parse_collection(sgf.encode('utf-8')))
+    assert set(root.get_tags()) <= set(tags)
@@ -0,0 +1,68 @@
+import io
+import pytest
+from sgf_tool import SGFParser
+from sgf_tool.serializer import dump, dumps
+from sgf_tool.utils import Algorithm
+from benchmarks.generators import make_comment_heavy, make_main_line, make_nested_variations, make_variation_fan
+
+GAMES = [
+    '(;GM[1]FF[4]PB[Noir é];B[aa]C[a \\] b](;W[bb]LB[aa:x][bb:y])(;W[cc]N[])(;W[dd];B[ee]))',
+    '(;GM[1])',
+    make_main_line(300),
+    make_variation_fan(30, 3),
+    make_nested_variations(4, 3, 2),
+    make_comment_heavy(10, 100),
+]
+
+
+def reference_to_sgf(node):
+    """
+    The original recursive SGFNode.to_sgf().
+    """
+    result = ';' + ''.join(f'{key}[{"][".join(value)}]' for key, value in node.properties.items())
+    if node.child:
+        result += reference_to_sgf(node.child)
+    if node.next_sibling:
+        if node.next_sibling.next_sibling:
+            result = '(' + result + ')' + reference_to_sgf(node.next_sibling)
+        else:
+            result = '(' + result + ')(' + reference_to_sgf(node.next_sibling) + ')'
+    return result
+
+
+@pytest.mark.parametrize('sgf', GAMES)
+def test_same_output_as_recursive_to_sgf(sgf):
+    root = SGFParser().parse(sgf)
+    for node, _ in Algorithm.dfs_iterator(root):
+        assert node.to_sgf() == reference_to_sgf(node)
+
+
+@pytest.mark.parametrize('sgf', GAMES)
+def test_dump(sgf):
+    root = SGFParser().parse(sgf)
+    text = io.StringIO()
+    dump(root, text, buffer_size=16)
+    assert text.getvalue() == dumps(root)
+    data = io.BytesIO()
+    dump(root, data, encoding='utf-8', buffer_size=16)
+    assert data.getvalue() == dumps(root).encode('utf-8')
+
+
+def test_deep_tree():
+    root = SGFParser().parse('(;GM[1]' + ';B[aa]' * 50000 + ')')
+    assert dumps(root) == ';GM[1]' + ';B[aa]' * 50000
+
+
+def test_escape():
+    root = SGFParser().parse('(;GM[1];C[x])')
+    root.get_child(0)['C'] = ['a ] b \\ c']
+    text = dumps(root, escape=True)
+    assert text == ';GM[1];C[a \\] b \\\\ c]'
+    assert SGFParser().parse(f'({text})').get_child(0)['C'] == ['a \\] b \\\\ c']
+
+
+def test_line_width():
+    root = SGFParser().parse(make_variation_fan(30, 3))
+    text = dumps(root, line_width=40)
+    assert text.replace('\n', '') == dumps(root)
+    assert all(len(line) <= 40 for line in text.split('\n'))
@@ -0,0 +1,82 @@
+import asyncio
+import random
+import pytest
+from sgf_tool import LexicalError, SGFError, SGFParser, SGFPushParser, parse_stream
+from sgf_tool.utils import Algorithm
+from benchmarks.generators import make_collection, make_nested_variations
+
+TEXT = make_collection(3, 20) + '(;GM[1]CA[UTF-8]C[héllo \\] wörld];B[aa]C[a](;W[bb])(;W[cc]N[é\\]x])\n)\n' + make_nested_variations(3, 2, 2)
+
+
+def split(data, rng, sizes=None):
+    chunks = []
+    position = 0
+    while position < len(data):
+        size = rng.choice(sizes) if sizes else rng.randint(1, 40)
+        chunks.append(data[position:position + size])
+        position += size
+    return chunks
+
+
+def push(chunks, **kwargs):
+    parser = SGFPushParser(**kwargs)
+    result = []
+    for chunk in chunks:
+        result.extend(parser.feed(chunk))
+    result.extend(parser.close())
+    return result
+
+
+@pytest.mark.parametrize('data', [TEXT, TEXT.encode('utf-8')])
+@pytest.mark.parametrize('seed', range(5))
+def test_any_chunk_split_gives_the_same_games(data, seed):
+    expected = [root.to_sgf() for root in SGFParser().parse_collection(data)]
+    rng = random.Random(seed)
+    sizes = [1] if seed == 0 else None
+    assert [root.to_sgf() for root in push(split(data, rng, sizes))] == expected
+
+
+def test_nodes_are_returned_in_order():
+    expected = [str(node) for root in SGFParser().parse_collection(TEXT) for node, _ in Algorithm.dfs_iterator(root)]
+    nodes = push(split(TEXT, random.Random(1)), nodes=True)
+    assert [str(node) for node in nodes] == expected
+
+
+def test_games_are_returned_as_soon_as_they_are_complete():
+    parser = SGFPushParser()
+    assert parser.feed('(;GM[1];B[aa]') == []
+    games = parser.feed(')(;GM[1]')
+    assert [game.to_sgf() for game in games] == [';GM[1];B[aa]']
+    assert parser.position == len('(;GM[1];B[aa])(;GM[1]')
+    assert len(parser.feed(')')) == 1
+    assert parser.close() == []
+
+
+def test_errors_have_stream_positions():
+    with pytest.raises(LexicalError) as info:
+        push(['(;GM[1]', ';B[aa]', ' ?'])
+    assert info.value.start == 14
+    with pytest.raises(SGFError) as info:
+        push(['(;GM[1]', ')', ')'])
+    assert info.value.start == 8
+    with pytest.raises(LexicalError) as info:
+        push(['(;GM[1]', ';B[a'])
+    assert info.value.start == 9
+
+
+def test_chunk_types_cannot_be_mixed():
+    parser = SGFPushParser()
+    parser.feed('(;GM[1]')
+    with pytest.raises(TypeError):
+        parser.feed(b')')
+
+
+def test_parse_stream():
+    async def chunks():
+        for chunk in split(TEXT.encode('utf-8'), random.Random(2)):
+            yield chunk
+
+    async def collect():
+        return [root.to_sgf() async for root in parse_stream(chunks())]
+
+    assert asyncio.run(collect()) == [root.to_sgf() for root in SGFParser().parse_collection(TEXT)]
@@ -0,0 +1,64 @@
+import os
+import pytest
+from sgf_tool import SGFParser
+from sgf_tool.position import BLACK, EMPTY, WHITE
+from benchmarks.generators import make_collection
+
+np = pytest.importorskip('numpy')
+from sgf_tool import tensors  # noqa: E402
+
+# black captures the white stone at aa with its third move, then passes
+CAPTURE = '(;GM[1]SZ[5];B[ab];W[aa];B[ba];W[ee];B[](;W[cc])(;W[dd]))'
+
+
+def test_move_array():
+    moves = tensors.move_array(SGFParser().parse(CAPTURE))
+    assert moves.dtype == np.int16
+    assert moves.tolist() == [
+        [BLACK, 0, 1, 0], [WHITE, 0, 0, 0], [BLACK, 1, 0, 0], [WHITE, 4, 4, 0], [BLACK, -1, -1, 1], [WHITE, 2, 2, 0],
+    ]
+
+
+def test_boards_before_each_move():
+    arrays = tensors.export_games([SGFParser().parse(CAPTURE)])
+    boards = arrays['boards']
+    assert boards.shape == (6, 5, 5) and boards.dtype == np.uint8
+    assert not boards[0].any()
+    assert boards[2][0, 0] == WHITE and boards[2][1, 0] == BLACK
+    # the capture by the third move is on the board before the fourth one
+    assert boards[3][0, 0] == EMPTY and boards[3][0, 1] == BLACK
+    assert np.count_nonzero(boards[3]) == 2
+    assert boards[5][4, 4] == WHITE and np.count_nonzero(boards[5]) == 3
+
+
+def test_export_games_offsets():
+    roots = list(SGFParser().parse_collection(make_collection(4, 15)))
+    arrays = tensors.export_games(roots, boards=False)
+    assert 'boards' not in arrays
+    assert arrays['offsets'].dtype == np.int64 and arrays['offsets'].tolist() == [0, 15, 30, 45, 60]
+    assert arrays['moves'].shape == (60, 4)
+    for index, root in enumerate(roots):
+        start, end = arrays['offsets'][index], arrays['offsets'][index + 1]
+        assert np.array_equal(arrays['moves'][start:end], tensors.move_array(root))
+
+
+def test_mixed_sizes_cannot_be_stacked():
+    roots = [SGFParser().parse('(;SZ[9];B[aa])'), SGFParser().parse('(;SZ[13];B[aa])')]
+    with pytest.raises(ValueError):
+        tensors.export_games(roots)
+
+
+@pytest.mark.parametrize('format', ['npy', 'npz'])
+def test_shards_round_trip(tmp_path, format):
+    roots = list(SGFParser().parse_collection(make_collection(5, 12)))
+    paths = tensors.write_shards(roots, tmp_path, games_per_shard=2, format=format, compress=True)
+    assert len(paths) == 3
+    loaded = [tensors.load_shard(path) for path in paths]
+    for shard, batch in zip(loaded, (roots[0:2], roots[2:4], roots[4:])):
+        expected = tensors.export_games(batch)
+        assert sorted(shard) == sorted(expected)
+        for name, values in expected.items():
+            assert np.array_equal(shard[name], values)
+    if format == 'npy':
+        assert os.path.exists(f'{paths[0]}.boards.npy')
+        assert isinstance(loaded[0]['moves'], np.memmap)
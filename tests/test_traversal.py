@@ -0,0 +1,55 @@
+from sgf_tool import SGFParser, Traversal, TraversalEvent, TraversalOrder
+from sgf_tool.utils import Algorithm
+
+SGF = '(;A[1](;B[1];C[1])(;D[1];E[1]))'
+
+
+def tags(nodes):
+    return [next(iter(node.get_tags())) for node in nodes]
+
+
+def test_orders():
+    root = SGFParser().parse(SGF)
+    assert tags(node for node, _ in Traversal(root)) == ['A', 'B', 'C', 'D', 'E']
+    assert tags(node for node, _ in Traversal(root, TraversalOrder.POST_ORDER)) == ['C', 'B', 'E', 'D', 'A']
+    assert tags(node for node, _ in Traversal(root, TraversalOrder.BFS)) == ['A', 'B', 'D', 'C', 'E']
+    assert [depth for _, depth in Traversal(root)] == [0, 1, 2, 1, 2]
+
+
+def test_skip_subtree():
+    root = SGFParser().parse(SGF)
+    traversal = Traversal(root)
+    visited = []
+    for node, _ in traversal:
+        visited.append(node)
+        if 'B' in node:
+            traversal.skip_subtree()
+    assert tags(visited) == ['A', 'B', 'D', 'E']
+
+
+def test_skip_after_leave_is_ignored():
+    root = SGFParser().parse(SGF)
+    traversal = Traversal(root, events=True)
+    entered = []
+    for event, node, _ in traversal:
+        if event is TraversalEvent.ENTER:
+            entered.append(node)
+        elif 'C' in node:
+            traversal.skip_subtree()
+    assert tags(entered) == ['A', 'B', 'C', 'D', 'E']
+
+
+def test_skip_in_post_order_is_ignored():
+    root = SGFParser().parse(SGF)
+    traversal = Traversal(root, TraversalOrder.POST_ORDER)
+    visited = []
+    for node, _ in traversal:
+        visited.append(node)
+        traversal.skip_subtree()
+    assert tags(visited) == ['C', 'B', 'E', 'D', 'A']
+
+
+def test_deep_tree():
+    root = SGFParser().parse('(;GM[1]' + ';B[aa]' * 20000 + ')')
+    assert sum(1 for _ in Algorithm.dfs_iterator(root)) == 20001
+    assert sum(1 for _ in Traversal(root, events=True)) == 40002
@@ -0,0 +1,81 @@
+import random
+import pytest
+from sgf_tool import SGFParser, TreeIndex
+from sgf_tool.utils import Algorithm
+from benchmarks.generators import make_main_line, make_nested_variations, make_variation_fan
+
+TREES = [make_nested_variations(4, 3, 2, seed=seed) for seed in range(3)] + [make_variation_fan(20, 3), make_main_line(300)]
+
+
+def ancestors(node):
+    """
+    The node and its ancestors up to the root, by walking the parents.
+    """
+    result = []
+    while node is not None:
+        result.append(node)
+        node = node.parent
+    return result
+
+
+def naive_path(node):
+    path = []
+    while node.parent is not None:
+        path.append(list(node.parent.get_children_iter()).index(node))
+        node = node.parent
+    return path[::-1]
+
+
+@pytest.mark.parametrize('sgf', TREES)
+def test_queries_agree_with_parent_walks(sgf):
+    root = SGFParser().parse(sgf)
+    index = TreeIndex(root)
+    nodes = [node for node, _ in Algorithm.dfs_iterator(root)]
+    assert index.nodes == nodes and len(index) == len(nodes)
+    for node in nodes:
+        chain = ancestors(node)
+        depth = len(chain) - 1
+        assert index.depth(node) == depth
+        assert index.parent(node) is node.parent
+        assert index.move_number(node) == sum(1 for n in chain if 'B' in n or 'W' in n)
+        assert index.path(node) == naive_path(node)
+        assert index.resolve(index.path(node)) is node
+        entry, exit = index.subtree_range(node)
+        assert index.nodes[entry:exit + 1] == [n for n, _ in Algorithm.dfs_iterator(node)]
+        for target in range(depth + 1):
+            assert index.ancestor_at_depth(node, target) is chain[depth - target]
+
+    rng = random.Random(0)
+    for _ in range(300):
+        node, other = rng.choice(nodes), rng.choice(nodes)
+        node_chain, other_chain = ancestors(node), ancestors(other)
+        common = next(n for n in node_chain if n in other_chain)
+        assert index.lowest_common_ancestor(node, other) is common
+        assert index.distance(node, other) == node_chain.index(common) + other_chain.index(common)
+        assert index.is_ancestor(node, other) == (node in other_chain)
+
+
+def test_invalid_queries():
+    root = SGFParser().parse('(;GM[1];B[aa](;W[bb])(;W[cc]))')
+    index = TreeIndex(root)
+    assert index.resolve([]) is root
+    assert index.resolve([0, 1]) is root.get_child(0).get_child(1)
+    for path in ([1], [0, 2], [0, -1], [0, 0, 0]):
+        with pytest.raises(IndexError):
+            index.resolve(path)
+    with pytest.raises(ValueError):
+        index.ancestor_at_depth(root.get_child(0), 2)
+    assert root.get_child(0) in index and SGFParser().parse('(;GM[1])') not in index
+
+
+def test_rebuild_after_an_edit():
+    root = SGFParser().parse('(;GM[1];B[aa](;W[bb];B[cc])(;W[dd]))')
+    index = TreeIndex(root)
+    moved = root.get_child(0).get_child(0).get_child(0)
+    root.get_child(0).get_child(1).add_child(moved)
+    root.get_child(0).get_child(0).detach()
+    index.rebuild()
+    assert len(index) == 4
+    assert index.path(moved) == [0, 0, 0]
+    assert index.resolve([0, 0, 0]) is moved
+    assert index.depth(moved) == 3 and index.move_number(moved) == 3